@@ -0,0 +1,200 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Runs the rcga over a grid of benchmark problems (model/benchmarks.py), dimensions and population sizes, with the
+# operators and the other parameters of inputs/inputs.yaml, and writes a json report to compare across commits.
+# For each run it reports:
+#   - evals_per_second:          model evaluations per second of wall time
+#   - overhead_per_generation:   wall time per generation not spent in the model (operators, bookkeeping)
+#   - peak_rss_mb:               peak resident memory of the process running it (None where unavailable)
+#   - convergence:               best fitness versus number of evaluations, one point per generation
+# Each run is executed in a fresh process, in the serial executor and without output files.
+# Example: python benchmark_main.py --problems sphere rastrigin --dims 10 30 --pop-sizes 100 --generations 50 --batch
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import argparse
+import copy
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import lib_path_ops
+import rcga_classes as rcga
+import rcga_registry
+import benchmarks
+import ga_main
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_peak_rss_mb():
+    """
+    Function that returns the peak resident memory of the current process in MB, or None if it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def get_commit():
+    """
+    Function that returns the current git commit, or None if it cannot be determined.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed_model(model, timer):
+    """
+    Function that wraps a model so that the time spent in it is accumulated in timer['model_time'].
+    """
+    def wrapper(inputs):
+        t0 = time.perf_counter()
+        try:
+            return model(inputs)
+        finally:
+            timer['model_time'] += time.perf_counter() - t0
+    wrapper.batch_evaluation = getattr(model, 'batch_evaluation', False)
+    return wrapper
+
+
+def run_benchmark(base_params, problem, n_dims, pop_size, max_gen, batch):
+    """
+    Function that runs the rcga on a benchmark problem and returns its measurements.
+    """
+    params = copy.deepcopy(base_params)
+    model_name = 'model_{}{}'.format(problem, '_batch' if batch else '')
+    timer = {'model_time': 0.0}
+    rcga_registry.register_operator('model', model_name + '_timed', timed_model(rcga_registry.resolve('model', model_name), timer))
+    params.update({
+        'model_function': model_name + '_timed',
+        'population_size': pop_size,
+        'max_generations': max_gen,
+        'evaluation_executor': 'serial',
+        'results_backend': 'none',
+        'write_to_console': False,
+        'checkpoint_every_generations': 0,
+        'checkpoint_every_seconds': 0,
+        'termination_params': {},
+    })
+
+    t0 = time.perf_counter()
+    ga = rcga.rcga(benchmarks.get_search_space(problem, n_dims), params)
+    ga.initialise()
+    convergence = [(ga.statistics['N_evals'], ga.best_ind.get_fitness())]
+    while ga.N_gen < ga.max_gen:
+        ga.step()
+        convergence.append((ga.statistics['N_evals'], ga.best_ind.get_fitness()))
+    ga.finalise()
+    wall_time = time.perf_counter() - t0
+
+    N_evals = ga.statistics['N_evals']
+    return {
+        'problem': problem,
+        'n_dims': n_dims,
+        'population_size': pop_size,
+        'max_generations': max_gen,
+        'batch': batch,
+        'population_backend': params.get('population_backend', 'list'),
+        'seed': params['seed'],
+        'N_evals': N_evals,
+        'N_failed_evals': ga.statistics['N_failed_evals'],
+        'wall_time': wall_time,
+        'model_time': timer['model_time'],
+        'evals_per_second': N_evals / wall_time if wall_time > 0 else None,
+        'overhead_per_generation': (wall_time - timer['model_time']) / (max_gen + 1),
+        'peak_rss_mb': get_peak_rss_mb(),
+        'best_fitness': ga.best_ind.get_fitness(),
+        'optimum': benchmarks.BENCHMARKS[problem]['optimum'],
+        'convergence': convergence,
+    }
+
+
+def run_benchmark_star(args):
+    """
+    Function that runs a benchmark from a tuple of arguments. A failed run is reported with its error.
+    """
+    try:
+        return run_benchmark(*args)
+    except Exception as e:
+        base_params, problem, n_dims, pop_size, max_gen, batch = args
+        return {'problem': problem, 'n_dims': n_dims, 'population_size': pop_size, 'max_generations': max_gen,
+                'batch': batch, 'error': '{}: {}'.format(type(e).__name__, e)}
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description="Runs the rcga over a grid of benchmark problems and writes a json report")
+    parser.add_argument('--problems', nargs='+', default=list(benchmarks.BENCHMARKS), choices=list(benchmarks.BENCHMARKS))
+    parser.add_argument('--dims', nargs='+', type=int, default=[2, 10, 30])
+    parser.add_argument('--pop-sizes', nargs='+', type=int, default=[50, 200])
+    parser.add_argument('--generations', type=int, default=50)
+    parser.add_argument('--batch', action='store_true', help="use the batch form of the models")
+    parser.add_argument('--population-backend', choices=['list', 'array'], default=None)
+    parser.add_argument('--seed', type=int, default=None, help="seed of the runs (default: the one in inputs.yaml)")
+    parser.add_argument('--output', default=None, help="json report file (default: outputs/benchmarks_<date_time>.json, - for stdout)")
+    return parser.parse_args()
+
+
+#----------------------------------------------------------------------------------------
+# EXECUTION
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    args = get_arguments()
+    search_space, base_params = ga_main.get_parameters(ga_main.root_dir)
+    if args.population_backend is not None:
+        base_params['population_backend'] = args.population_backend
+    if args.seed is not None:
+        base_params['seed'] = args.seed
+    base_params['plugins'] = list(base_params.get('plugins', [])) + ['benchmarks']
+
+    grid = [(base_params, problem, n_dims, pop_size, args.generations, args.batch)
+            for problem in args.problems for n_dims in args.dims for pop_size in args.pop_sizes]
+    runs = []
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for run in pool.imap(run_benchmark_star, grid):
+            if 'error' in run:
+                print("{problem}\tdims={n_dims}\tpop={population_size}\tfailed: {error}".format(**run))
+                runs.append(run)
+                continue
+            print("{problem}\tdims={n_dims}\tpop={population_size}\t{evals_per_second:.0f} evals/s\t"
+                  "{overhead_per_generation:.2e} s/gen overhead\tbest={best_fitness:.3e}".format(**run))
+            runs.append(run)
+
+    report = {
+        'commit': get_commit(),
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'runs': runs,
+    }
+    if args.output == '-':
+        print(json.dumps(report, indent=1))
+    else:
+        output_file = args.output or lib_path_ops.join_paths(base_params['Excel output dir'],
+                                                             datetime.datetime.now().strftime("benchmarks_%d%m%Y_%H%M%S.json"))
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=1)
+        print("Report written to {}".format(output_file))
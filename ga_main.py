@@ -12,9 +12,12 @@ __email__ = "luis.hmd@gmail.com"
 #----------------------------------------------------------------------------------------
 import sys
 import os
+import argparse
 import lib_path_ops
 import yaml
 import rcga_classes as rcga
+import rcga_islands
+import rcga_checkpoints
 
 
 #----------------------------------------------------------------------------------------
@@ -46,6 +49,12 @@ def get_parameters(root_dir):
         main_params_dic['selection_params'] = dict(cfg[main_params_dic['selection_params']])
         main_params_dic['crossover_params'] = dict(cfg[main_params_dic['crossover_params']])
         main_params_dic['mutation_params'] = dict(cfg[main_params_dic['mutation_params']])
+        # Sections that older inputs files may not have
+        optional_sections = ['island_params', 'termination_params', 'adaptation_params', 'surrogate_params',
+                             'constraint_params']
+        for section in optional_sections:
+            if section in main_params_dic:
+                main_params_dic[section] = dict(cfg[main_params_dic[section]])
 
         additional_params_dic = {
             "Excel output dir": lib_path_ops.join_paths(root_dir, 'outputs/'),
@@ -66,6 +75,18 @@ def get_parameters(root_dir):
 # EXECUTION
 #----------------------------------------------------------------------------------------
 if __name__ == "__main__":
-    search_space, params_dic = get_parameters(root_dir)
-    ga = rcga.rcga(search_space, params_dic)
-    best_ind = ga.execute()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Runs the real-coded genetic algorithm set in inputs/inputs.yaml")
+    parser.add_argument('--resume', metavar='CHECKPOINT_FILE', help="continue the run saved in a checkpoint file")
+    args = parser.parse_args()
+    if args.resume:
+        checkpoint = rcga_checkpoints.read_checkpoint(args.resume)
+        ga = rcga.rcga(checkpoint['search_space'], checkpoint['params'])
+        best_ind = ga.resume(args.resume)
+    else:
+        search_space, params_dic = get_parameters(root_dir)
+        if params_dic.get('island_params', {}).get('use_islands', False):
+            islands = rcga_islands.Island_model(search_space, params_dic)
+            best_solution, best_fitness = islands.execute()
+        else:
+            ga = rcga.rcga(search_space, params_dic)
+            best_ind = ga.execute()
\ No newline at end of file
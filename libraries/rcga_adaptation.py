@@ -0,0 +1,127 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Adaptation of the operator parameters (alpha, p_crossover, p_mutation, distribution_constant) during a generational
+# run, switched on in the Adaptation section of the inputs. After every generation three statistics are computed:
+#   - success_rate:   fraction of the offspring better than the median fitness of their parents' generation
+#   - diversity:      diversity of the population (see Population.get_diversity)
+#   - fitness_spread: standard deviation of the fitness divided by (|mean| + standard deviation), in [0, 1)
+# The search explores when the success rate is above target_success_rate (larger steps pay off, as in the 1/5th
+# success rule) or when it has stalled (diversity below min_diversity or fitness spread below min_fitness_spread), and
+# exploits otherwise. Exploring multiplies alpha and p_mutation by exp(adaptation_rate) and divides
+# distribution_constant by it; exploiting does the opposite. p_crossover grows while the diversity is above
+# min_diversity, as recombination needs diverse parents, and shrinks otherwise. Each parameter is kept within its
+# bounds. The statistics and the parameters of every generation are logged in the trajectory.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import math
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+# Adapted parameters: section of the main parameters they belong to and default bounds
+ADAPTED_PARAMETERS = {
+    'alpha': ('crossover_params', [0.1, 0.7]),
+    'p_crossover': ('crossover_params', [0.6, 1.0]),
+    'p_mutation': ('mutation_params', [0.005, 0.3]),
+    'distribution_constant': ('mutation_params', [1, 100]),
+}
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_success_rate(offspring_fitness, parents_median, reverse=False):
+    """
+    Function that returns the fraction of the offspring with a fitness better than the median of their parents'
+    generation. Offspring without fitness count as failures.
+    """
+    if len(offspring_fitness) == 0 or np.isnan(parents_median):
+        return 0.0
+    with np.errstate(invalid='ignore'):
+        better = offspring_fitness > parents_median if reverse else offspring_fitness < parents_median
+    return float(np.mean(better))
+
+
+def get_fitness_spread(fitness):
+    """
+    Function that returns the spread of a fitness vector: its standard deviation divided by (|mean| + standard
+    deviation), 0 when all the values are equal. NaN values are ignored.
+    """
+    fitness = fitness[~np.isnan(fitness)]
+    if len(fitness) == 0:
+        return 0.0
+    std = np.std(fitness)
+    if std == 0:
+        return 0.0
+    return float(std / (abs(np.mean(fitness)) + std))
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Adaptation(object):
+    """ Adjusts the crossover and mutation parameters of a run from the statistics of its population """
+    def __init__(self, params):
+        adaptation_params = params.get('adaptation_params', {})
+        self.reverse = params['opt_type'] == 'max'
+        self.target_success_rate = adaptation_params.get('target_success_rate', 0.2)
+        self.min_diversity = adaptation_params.get('min_diversity', 0.01)
+        self.min_fitness_spread = adaptation_params.get('min_fitness_spread', 0.001)
+        self.adaptation_rate = adaptation_params.get('adaptation_rate', 0.1)
+        self.bounds = {name: adaptation_params.get(name + '_bounds', bounds)
+                       for name, (section, bounds) in ADAPTED_PARAMETERS.items()}
+        self.trajectory = []
+
+    def get_parameters(self, params):
+        return {name: params[section][name] for name, (section, bounds) in ADAPTED_PARAMETERS.items()}
+
+    def __log(self, N_gen, params, success_rate, diversity, fitness_spread):
+        entry = {'generation': N_gen, 'success_rate': success_rate, 'diversity': diversity,
+                 'fitness_spread': fitness_spread}
+        entry.update(self.get_parameters(params))
+        self.trajectory.append(entry)
+        return entry
+
+    def start(self, N_gen, params, Pop):
+        """
+        Function that logs the statistics of the initial population and the initial parameters.
+        """
+        return self.__log(N_gen, params, None, Pop.get_diversity(), get_fitness_spread(Pop.get_fitness_array()))
+
+    def update(self, N_gen, params, Pop, offspring_fitness, parents_median):
+        """
+        Function that computes the statistics of a new generation, adjusts the parameters in params in place and logs
+        them. Returns the entry of the trajectory.
+        """
+        success_rate = get_success_rate(offspring_fitness, parents_median, reverse=self.reverse)
+        diversity = Pop.get_diversity()
+        fitness_spread = get_fitness_spread(Pop.get_fitness_array())
+        stalled = diversity < self.min_diversity or fitness_spread < self.min_fitness_spread
+        explore = 1 if success_rate > self.target_success_rate or stalled else -1
+        factors = {
+            'alpha': math.exp(explore*self.adaptation_rate),
+            'p_mutation': math.exp(explore*self.adaptation_rate),
+            'distribution_constant': math.exp(-explore*self.adaptation_rate),
+            'p_crossover': math.exp(self.adaptation_rate if diversity >= self.min_diversity else -self.adaptation_rate),
+        }
+        for name, (section, bounds) in ADAPTED_PARAMETERS.items():
+            value = params[section][name]*factors[name]
+            params[section][name] = float(min(max(value, self.bounds[name][0]), self.bounds[name][1]))
+        return self.__log(N_gen, params, success_rate, diversity, fitness_spread)
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,104 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# A checkpoint is a single uncompressed .npz file with everything needed to continue a generational run exactly where
+# it stopped: the search space and parameters (as json), the output directory, the generation number, the statistics,
+# the encoded solutions and fitness of the population (and their objectives in the multi-objective mode), the best
+# individual, the contents of the fitness cache, the state of the random streams, of the stopping rules, of the
+# parameter adaptation and the surrogate archive of the run and the state of the python and numpy global random
+# generators (which models may use). It holds no pickled objects.
+# The checkpoint is first written to a temporary file which then replaces the previous one, so that a crash while
+# writing leaves the previous checkpoint intact.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import json
+import os
+import random as rand
+import numpy as np
+import rcga_results
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+CHECKPOINT_VERSION = 3
+
+# Entries stored as json strings
+JSON_ENTRIES = ['search_space', 'params', 'statistics', 'rng_states', 'termination_state', 'adaptation_trajectory']
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_random_state():
+    """
+    Function that returns the state of the python and numpy global random generators as arrays.
+    """
+    version, internal_state, gauss_next = rand.getstate()
+    np_state = np.random.get_state()
+    return {
+        'random_version': np.array(version),
+        'random_state': np.array(internal_state, dtype=np.uint64),
+        'random_gauss_next': np.array(np.nan if gauss_next is None else gauss_next),
+        'np_random_keys': np_state[1],
+        'np_random_pos': np.array(np_state[2]),
+        'np_random_has_gauss': np.array(np_state[3]),
+        'np_random_cached_gaussian': np.array(np_state[4]),
+    }
+
+
+def set_random_state(checkpoint):
+    """
+    Function that restores the state of the python and numpy global random generators saved in a checkpoint.
+    """
+    gauss_next = float(checkpoint['random_gauss_next'])
+    rand.setstate((int(checkpoint['random_version']),
+                   tuple(int(x) for x in checkpoint['random_state']),
+                   None if np.isnan(gauss_next) else gauss_next))
+    np.random.set_state(('MT19937', checkpoint['np_random_keys'], int(checkpoint['np_random_pos']),
+                         int(checkpoint['np_random_has_gauss']), float(checkpoint['np_random_cached_gaussian'])))
+    return 0
+
+
+def write_checkpoint(checkpoint_file, checkpoint):
+    """
+    Function that atomically writes a checkpoint (dictionary of arrays, json entries given as python objects).
+    """
+    arrays = dict(checkpoint)
+    arrays['version'] = np.array(CHECKPOINT_VERSION)
+    for key in [key for key in JSON_ENTRIES if key in checkpoint]:
+        arrays[key] = np.array(json.dumps(rcga_results.to_json(checkpoint[key])))
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, checkpoint_file)
+    return 0
+
+
+def read_checkpoint(checkpoint_file):
+    """
+    Function that reads a checkpoint and returns it as a dictionary of arrays, with the json entries decoded.
+    """
+    with np.load(checkpoint_file) as data:
+        checkpoint = {key: data[key] for key in data.files}
+    if int(checkpoint['version']) != CHECKPOINT_VERSION:
+        raise ValueError("Unsupported checkpoint version {}".format(int(checkpoint['version'])))
+    for key in [key for key in JSON_ENTRIES if key in checkpoint]:
+        checkpoint[key] = json.loads(str(checkpoint[key]))
+    return checkpoint
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
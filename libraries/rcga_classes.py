@@ -10,15 +10,35 @@ __email__ = "luis.hmd@gmail.com"
 #----------------------------------------------------------------------------------------
 # IMPORTS
 #----------------------------------------------------------------------------------------
-import random as rand
+import collections
+import contextlib
 import copy
-import models
-import rcga_operators as op
-import datetime
-import lib_directory_ops
+import heapq
+import math
+import numbers
+import os
+import time
+import concurrent.futures as cf
+import numpy as np
 import lib_path_ops
-import lib_file_ops
-import lib_excel_ops_openpyxl as lib_excel
+import rcga_operators # registers the builtin operators
+import rcga_registry
+import rcga_evaluators as ev
+import rcga_results
+import rcga_checkpoints
+import rcga_profiling
+import rcga_termination
+import rcga_adaptation
+import rcga_surrogates
+import rcga_multiobjective
+import rcga_constraints
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+# Independent random streams of a run, all spawned from its seed
+RNG_STREAMS = ['initialisation', 'selection', 'crossover', 'mutation', 'evaluation', 'surrogate', 'constraints']
 
 
 #----------------------------------------------------------------------------------------
@@ -60,45 +80,190 @@ class Individual(object):
 
 
 class Search_space(object):
-    """ Creates a search space """
+    """
+    Creates a search space. The variables are compiled once into a fixed order, arrays of bounds and number of values,
+    the positions of the variables of each type and, for enumerate variables, maps from value to index.
+    """
     def __init__(self, search_space):
         self.search_space = search_space
+        self.__compile()
+
+    def __compile(self):
+        self.vars_names = tuple(self.search_space.keys())
+        self.types = {v: spec.get("Type") for v, spec in self.search_space.items()}
+        self.lbounds = {v: spec.get("LBound") for v, spec in self.search_space.items()}
+        self.ubounds = {v: spec.get("UBound") for v, spec in self.search_space.items()}
+        self.values = {v: spec.get("Values") for v, spec in self.search_space.items()}
+        self.values_indices = {}
+        for v in self.vars_names:
+            if self.types[v] == 'enumerate':
+                self.values_indices[v] = {}
+                for i, x in enumerate(self.values[v]):
+                    self.values_indices[v].setdefault(x, i)
+        self.types_array = np.array([self.types[v] for v in self.vars_names], dtype=object)
+        self.indices = {}
+        self.lb_array = np.array([np.nan if self.lbounds[v] is None else self.lbounds[v] for v in self.vars_names], dtype=float)
+        self.ub_array = np.array([np.nan if self.ubounds[v] is None else self.ubounds[v] for v in self.vars_names], dtype=float)
+        self.n_values_array = np.array([len(self.values[v]) if self.types[v] == 'enumerate' else
+                                        2 if self.types[v] == 'binary' else 0 for v in self.vars_names], dtype=int)
+        lower = np.where(self.n_values_array > 0, 0.0, self.lb_array)
+        width = np.where(self.n_values_array > 0, self.n_values_array - 1, self.ub_array - self.lb_array)
+        self.lower_array = np.where(np.isnan(lower), 0.0, lower)
+        self.width_array = np.where(np.isnan(width) | (width <= 0), 1.0, width)
+        for array in [self.lb_array, self.ub_array, self.n_values_array, self.lower_array, self.width_array]:
+            array.flags.writeable = False
+        self.variables = [(v, self.types[v], self.lbounds[v], self.ubounds[v], self.values[v], self.values_indices.get(v))
+                          for v in self.vars_names]
+        return 0
 
     def get_number_variables(self):
-        return len(self.search_space)
+        return len(self.vars_names)
 
     def get_variables_names(self):
-        return tuple(self.search_space.keys())
+        return self.vars_names
 
     def get_variable_type(self, var):
-        try:
-            return self.search_space[var]["Type"]
-        except KeyError:
-            return None
+        return self.types.get(var)
 
     def get_variable_lbound(self, var):
         """
         Function that returns the lower bound for a given variable.
         """
-        try:
-            return self.search_space[var]["LBound"]
-        except KeyError:
-            return None
+        return self.lbounds.get(var)
 
     def get_variable_ubound(self, var):
         """
         Function that returns the upper bound for a given variable.
         """
-        try:
-            return self.search_space[var]["UBound"]
-        except KeyError:
-            return None
+        return self.ubounds.get(var)
 
     def get_variable_values(self, var):
-        try:
-            return self.search_space[var]["Values"]
-        except KeyError:
-            return None
+        return self.values.get(var)
+
+    def get_value_index(self, var, value):
+        """
+        Function that returns the index of a value of an enumerate variable (None if it is not one of its values).
+        """
+        return self.values_indices[var].get(value)
+
+    def get_variables_indices(self, var_types):
+        """
+        Function that returns the positions (in the order of the variables names) of the variables of the given types.
+        """
+        key = tuple(var_types)
+        if key not in self.indices:
+            self.indices[key] = np.flatnonzero(np.isin(self.types_array, list(var_types)))
+            self.indices[key].flags.writeable = False
+        return self.indices[key]
+
+    def get_bounds_arrays(self):
+        """
+        Function that returns the lower and upper bounds of all the variables as two read-only arrays (NaN for
+        variables without bounds).
+        """
+        return self.lb_array, self.ub_array
+
+    def get_number_values_array(self):
+        """
+        Function that returns the number of values of all the variables (2 for binary, 0 for int and float), as a
+        read-only array.
+        """
+        return self.n_values_array
+
+    def get_normalisation_arrays(self):
+        """
+        Function that returns the lower ends and the widths of all the variables, to scale their encoded values to
+        [0, 1]: the bounds for int and float variables and the indices of the values for enumerate and binary ones.
+        Variables without width get a width of 1.
+        """
+        return self.lower_array, self.width_array
+
+    def repair_solution(self, solution):
+        """
+        Function that returns a copy of a solution dictionary within the search space, with the same rules as
+        repair_solutions: int and float variables are clipped to their bounds and binary variables are rounded to 0 or
+        1. Enumerate variables hold one of their values rather than an index: a number that is not one of them is
+        replaced by the closest numeric value, and any other unknown value by the first value (the index the array path
+        clips to from below).
+        """
+        solution_bounded = {}
+        for v, var_type, lb, ub, values, values_indices in self.variables:
+            x = solution[v]
+            if var_type == 'int' or var_type == 'float':
+                solution_bounded[v] = x if lb <= x <= ub else ub if x >= ub else lb
+            elif var_type == 'enumerate':
+                solution_bounded[v] = x if x in values_indices else self.__closest_value(values, x)
+            elif var_type == 'binary':
+                solution_bounded[v] = x if x in [0, 1] else int(min(max(round(x), 0), 1))
+            else:
+                print("Could not enforce bounds for variable {}".format(v))
+        return solution_bounded
+
+    def __closest_value(self, values, x):
+        """
+        Internal function that returns the value of an enumerate variable closest to x if x and some of the values are
+        numbers, or else the first value.
+        """
+        if isinstance(x, numbers.Real) and not isinstance(x, bool):
+            numeric = [value for value in values if isinstance(value, numbers.Real) and not isinstance(value, bool)]
+            if len(numeric) > 0:
+                return min(numeric, key=lambda value: abs(value - x))
+        return values[0]
+
+    def repair_solutions(self, solutions):
+        """
+        Function that brings a 2-D array of encoded solutions (individual x variable) within the search space in place:
+        int and float variables are clipped to their bounds, enumerate indices are floored and clipped to the range of
+        their values and binary variables are rounded to 0 or 1. Operators working on solution dictionaries apply the
+        same rule to the indices of enumerate values before writing them (see Search_space.repair_solution).
+        """
+        num_cols = self.get_variables_indices(['int', 'float'])
+        if len(num_cols) == solutions.shape[1]:
+            np.clip(solutions, self.lb_array, self.ub_array, out=solutions)
+        elif len(num_cols) > 0:
+            solutions[:, num_cols] = np.clip(solutions[:, num_cols], self.lb_array[num_cols], self.ub_array[num_cols])
+        enum_cols = self.get_variables_indices(['enumerate'])
+        if len(enum_cols) > 0:
+            solutions[:, enum_cols] = np.clip(np.floor(solutions[:, enum_cols]), 0, self.n_values_array[enum_cols] - 1)
+        bin_cols = self.get_variables_indices(['binary'])
+        if len(bin_cols) > 0:
+            solutions[:, bin_cols] = np.clip(np.rint(solutions[:, bin_cols]), 0, 1)
+        return solutions
+
+    def get_variables_columns(self, solutions):
+        """
+        Function that returns a dictionary from each variable name to its column of decoded values in a 2-D array of
+        encoded solutions (enumerate variables given by their values).
+        """
+        columns = {}
+        for j, (v, var_type, lb, ub, values, values_indices) in enumerate(self.variables):
+            if var_type == 'enumerate':
+                columns[v] = np.asarray(values)[solutions[:, j].astype(int)]
+            else:
+                columns[v] = solutions[:, j]
+        return columns
+
+    def encode_solution(self, solution):
+        """
+        Function that encodes a solution dictionary as a list of floats, in the order of the variables names.
+        Enumerate variables are encoded as the index of their value in the list of values.
+        """
+        return [float(values_indices[solution[v]]) if var_type == 'enumerate' else float(solution[v])
+                for v, var_type, lb, ub, values, values_indices in self.variables]
+
+    def decode_solution(self, row):
+        """
+        Function that decodes a row of floats (see encode_solution) back into a solution dictionary.
+        """
+        solution = {}
+        for (v, var_type, lb, ub, values, values_indices), x in zip(self.variables, row):
+            if var_type == 'enumerate':
+                solution[v] = values[int(x)]
+            elif var_type == 'binary':
+                solution[v] = int(x)
+            else:
+                solution[v] = float(x)
+        return solution
 
 
 class Population(object):
@@ -110,6 +275,7 @@ class Population(object):
         self.N_evals = 0
         self.seed = seed
         self.search_space = search_space
+        self.timer = None
 
     def __str__(self):
         s = "Size: {}\nSeed: {}\n".format(self.size, self.seed)
@@ -120,36 +286,24 @@ class Population(object):
     def copy(self):
         return copy.deepcopy(self)
 
-    def __enforce_solution_bounds(self, solution):
+    def empty_copy(self):
         """
-        Internal function that enforces the bounds prior to inserting an individual in the population.
+        Function that returns an empty population with the same search space, seed, backend and timer.
         """
-        solution_bounded = {}
-        vars_names = self.search_space.get_variables_names()
-        for v in vars_names:
-            var_type = self.search_space.get_variable_type(v)
-            if var_type == 'int' or var_type == 'float':
-                lb = self.search_space.get_variable_lbound(v)
-                ub = self.search_space.get_variable_ubound(v)
-                if (solution[v] >= lb) and (solution[v] <= ub):
-                    solution_bounded[v] = solution[v]
-                elif (solution[v] >= ub):
-                    solution_bounded[v] = ub
-                else: # solution[v] <= lb
-                    solution_bounded[v] = lb
-            elif var_type == 'enumerate':
-                values = self.search_space.get_variable_values(v)
-                if solution[v] in values:
-                    solution_bounded[v] = solution[v]
-                else:
-                     solution_bounded[v] = values[rand.randint(len(values))]
-            elif var_type == 'binary':
-                if solution[v] in [0,1]:
-                    solution_bounded[v] = solution[v]
-                else:
-                    solution_bounded[v] = rand.randint(2)
-            else:
-                print("Could not enforce bounds for variable {}".format(v))
+        Pop = self.__class__(self.search_space, seed=self.seed)
+        Pop.timer = self.timer
+        return Pop
+
+    def _enforce_solution_bounds(self, solution):
+        """
+        Internal function that enforces the bounds prior to inserting an individual in the population (see
+        Search_space.repair_solution).
+        """
+        if self.timer is not None:
+            t0 = time.perf_counter()
+        solution_bounded = self.search_space.repair_solution(solution)
+        if self.timer is not None:
+            self.timer.add_time('bounds', time.perf_counter() - t0)
         return solution_bounded
 
     def get_seed(self):
@@ -186,17 +340,24 @@ class Population(object):
         # Search for best individual
         for i in self.ind_list:
             fitness = i.get_fitness()
+            if fitness is None:
+                continue
             if opt_type == 'max' and fitness > best_fitness:
                 best_ind = i
+                best_fitness = fitness
             if opt_type == 'min' and fitness < best_fitness:
                 best_ind = i
+                best_fitness = fitness
         return best_ind
 
-    def initialise(self, pop_size):
+    def initialise(self, pop_size, rng=None):
         """
-        Function that initialises a population of a given size
+        Function that initialises a population of a given size, drawing the solutions from the numpy Generator rng (by
+        default one created from the population seed)
         """
-        rand.seed(a=self.seed)
+        if rng is None:
+            rng = np.random.default_rng(self.seed)
+        py_rng = rcga_operators.get_python_rng(rng)
         vars_names = self.search_space.get_variables_names()
         for i in range(pop_size):
             solution = {}
@@ -205,12 +366,12 @@ class Population(object):
                 if var_type == 'int' or var_type == 'float':
                     lb = self.search_space.get_variable_lbound(v)
                     ub = self.search_space.get_variable_ubound(v)
-                    solution[v] = lb + (ub - lb)*rand.random()
+                    solution[v] = lb + (ub - lb)*py_rng.random()
                 elif var_type == 'enumerate':
                     values = self.search_space.get_variable_values(v)
-                    solution[v] = values[rand.randint(0, len(values)-1)]
+                    solution[v] = values[py_rng.randrange(len(values))]
                 elif var_type == 'binary':
-                    solution[v] = rand.randint(2)
+                    solution[v] = py_rng.randrange(2)
                 else:
                     print("Could not determine type for variable {}".format(v))
                     solution[v] = None
@@ -237,116 +398,570 @@ class Population(object):
         """
         Function that inserts an individual in the population, given a solution.
         """
-        sol = self.__enforce_solution_bounds(solution)
+        sol = self._enforce_solution_bounds(solution)
         ind = Individual(self.size+1, sol, fitness=fitness)
         self.ind_list.append(ind)
         self.size += 1
         return 0
 
-    def evaluate_population(self, f_model):
+    def replace_individual(self, ind_index, solution, fitness=None):
         """
-        Function that evaluates the population
+        Function that replaces the individual with a given index by a new one, given a solution.
         """
-        for i in range(len(self.ind_list)):
-            if self.ind_list[i].get_fitness() == None:
-                fitness = eval(f_model)(self.ind_list[i].get_solution())
-                self.N_evals += 1
-                if fitness:
-                    self.ind_list[i].update_fitness(fitness)
-                else:
-                    self.N_failed_evals += 1
+        sol = self._enforce_solution_bounds(solution)
+        self.ind_list[ind_index] = Individual(ind_index+1, sol, fitness=fitness)
+        return 0
+
+    def insert_solutions_array(self, solutions, fitness=None):
+        """
+        Function that inserts a batch of encoded solutions (individual x variable) in the population, brought within the
+        search space at once (see Search_space.repair_solutions). Fitness is an optional vector, with NaN for
+        unevaluated individuals.
+        """
+        if self.timer is not None:
+            t0 = time.perf_counter()
+        solutions = self.search_space.repair_solutions(np.array(np.atleast_2d(solutions), dtype=float))
+        if self.timer is not None:
+            self.timer.add_time('bounds', time.perf_counter() - t0)
+        for i, row in enumerate(solutions):
+            f = None if fitness is None or np.isnan(fitness[i]) else float(fitness[i])
+            self.ind_list.append(Individual(self.size+1, self.search_space.decode_solution(row), fitness=f))
+            self.size += 1
+        return 0
+
+    def get_solutions_array(self):
+        """
+        Function that returns the encoded solutions of the population as a 2-D array (individual x variable).
+        """
+        return self.get_solutions_rows(range(self.size))
+
+    def get_fitness_array(self):
+        """
+        Function that returns the fitness vector of the population (NaN if not evaluated).
+        """
+        return np.array([np.nan if i.get_fitness() is None else i.get_fitness() for i in self.ind_list], dtype=float)
+
+    def get_diversity(self):
+        """
+        Function that returns the diversity of the population: the mean over the variables of the standard deviation of
+        their encoded values, each divided by the width of the variable (bounds, or number of values minus one).
+        It is 0 when all the individuals are equal.
+        """
+        if self.size == 0:
+            return 0.0
+        lower, width = self.search_space.get_normalisation_arrays()
+        return float(np.mean(np.std(self.get_solutions_array(), axis=0) / width))
+
+    def get_best_indices(self, n_best, reverse=False):
+        """
+        Function that returns the indices of the n_best individuals, best first, without sorting the population.
+        Individuals without fitness come last.
+        """
+        if reverse:
+            key = lambda i: float('-inf') if self.ind_list[i].get_fitness() is None else self.ind_list[i].get_fitness()
+            return heapq.nlargest(n_best, range(self.size), key=key)
+        else:
+            key = lambda i: float('+inf') if self.ind_list[i].get_fitness() is None else self.ind_list[i].get_fitness()
+            return heapq.nsmallest(n_best, range(self.size), key=key)
+
+    def get_subpopulation(self, ind_indices):
+        """
+        Function that returns a new population with copies of the individuals with the given indices (repeated indices
+        give repeated individuals), keeping their fitness.
+        """
+        Pop = self.empty_copy()
+        for i in ind_indices:
+            ind = self.ind_list[i]
+            Pop.ind_list.append(Individual(Pop.size+1, dict(ind.get_solution()), fitness=ind.get_fitness()))
+            Pop.size += 1
+        return Pop
+
+    def replace_generation(self, elite_indices, offspring, pop_size):
+        """
+        Function that turns the population into the next generation in place: the elite individuals are kept, followed
+        by the offspring population, up to pop_size individuals. Offspring are taken as they are (their bounds were
+        enforced when they were inserted) and the evaluation counters are reset.
+        """
+        ind_list = [self.ind_list[i] for i in elite_indices]
+        for ind in offspring.get_individuals():
+            if len(ind_list) >= pop_size:
+                break
+            ind_list.append(ind)
+        for i, ind in enumerate(ind_list):
+            ind.id = i + 1
+        self.ind_list = ind_list
+        self.size = len(ind_list)
+        self.N_evals = 0
+        self.N_failed_evals = 0
+        return 0
+
+    def get_unevaluated_indices(self):
+        """
+        Function that returns the indices of the individuals without fitness.
+        """
+        return [i for i in range(self.size) if self.ind_list[i].get_fitness() is None]
+
+    def get_solutions_rows(self, ind_indices):
+        """
+        Function that returns the encoded solutions (see Search_space.encode_solution) of the given individuals as a
+        2-D array (individual x variable).
+        """
+        rows = [self.search_space.encode_solution(self.ind_list[i].get_solution()) for i in ind_indices]
+        return np.array(rows, dtype=float).reshape(len(rows), self.search_space.get_number_variables())
+
+    def update_fitness(self, ind_indices, fitness):
+        """
+        Function that sets the fitness of the individuals with the given indices.
+        """
+        for i, f in zip(ind_indices, fitness):
+            self.ind_list[i].update_fitness(float(f))
+        return 0
+
+    def evaluate_population(self, model, evaluator=None, cache=None, duplicates=None):
+        """
+        Function that evaluates the individuals without fitness. Models flagged with batch_evaluation receive a 2-D
+        array with all those solutions at once and return a fitness vector; other models are called once per
+        individual with a solution dictionary. A None or NaN fitness counts as a failed evaluation.
+        The evaluator (see rcga_evaluators) decides where the model calls run; by default they run serially, or in an
+        asyncio event loop for coroutine models.
+        If a fitness cache is given, it is looked up before calling the model and updated with the new fitness values.
+        If the population has a timer (see rcga_profiling), the cache lookups, the evaluations and the latency of each
+        model call are recorded.
+        Duplicates are pairs (i, j) of individuals with the same solution: individual i is not evaluated and takes the
+        fitness of individual j (see rcga_evaluators.Deduplicator).
+        """
+        ind_indices = np.asarray(self.get_unevaluated_indices(), dtype=int)
+        if duplicates:
+            ind_indices = ind_indices[~np.isin(ind_indices, [i for i, j in duplicates])]
+        self.__evaluate_individuals(ind_indices, model, evaluator, cache)
+        if duplicates:
+            fitness = self.get_fitness_array()
+            copies = [(i, fitness[j]) for i, j in duplicates if not np.isnan(fitness[j])]
+            if copies:
+                self.update_fitness([i for i, f in copies], [f for i, f in copies])
         return [self.N_evals, self.N_failed_evals]
 
+    def __evaluate_individuals(self, ind_indices, model, evaluator, cache):
+        if len(ind_indices) == 0:
+            return 0
+        rows = self.get_solutions_rows(ind_indices)
+        if cache is not None:
+            if self.timer is not None:
+                t0 = time.perf_counter()
+            cached_fitness = cache.lookup(rows)
+            if self.timer is not None:
+                self.timer.add_time('cache', time.perf_counter() - t0)
+            hit = ~np.isnan(cached_fitness)
+            self.update_fitness(ind_indices[hit], cached_fitness[hit])
+            ind_indices = ind_indices[~hit]
+            rows = rows[~hit]
+            if len(ind_indices) == 0:
+                return 0
+        if ev.is_batch_model(model):
+            solutions = rows
+        else:
+            solutions = [self.get_individual(i).get_solution() for i in ind_indices]
+        latencies = None if self.timer is None else []
+        if self.timer is not None:
+            t0 = time.perf_counter()
+        if evaluator is None:
+            evaluator = ev.create_evaluator({}, model=model)
+            fitness = evaluator.evaluate(model, solutions, latencies=latencies)
+            evaluator.close()
+        else:
+            fitness = evaluator.evaluate(model, solutions, latencies=latencies)
+        if self.timer is not None:
+            self.timer.add_time('evaluation', time.perf_counter() - t0)
+            self.timer.add_latencies(latencies)
+        failed = np.isnan(fitness)
+        self.N_evals += len(ind_indices)
+        self.N_failed_evals += int(failed.sum())
+        self.update_fitness(ind_indices[~failed], fitness[~failed])
+        if cache is not None:
+            cache.store(rows[~failed], fitness[~failed])
+        return 0
+
+
+class Array_population(Population):
+    """
+    Creates a population stored as a structure of arrays: a 2-D array of solutions (individual x variable), a fitness
+    vector and an evaluated mask. Individuals are built on demand, so operators written for Population keep working.
+    """
+    def __init__(self, search_space, seed=None, capacity=0):
+        Population.__init__(self, search_space, seed=seed)
+        del self.ind_list
+        n_vars = search_space.get_number_variables()
+        self.solutions = np.empty((capacity, n_vars), dtype=float)
+        self.fitness = np.full(capacity, np.nan)
+        self.evaluated = np.zeros(capacity, dtype=bool)
+
+    def __str__(self):
+        s = "Size: {}\nSeed: {}\n".format(self.size, self.seed)
+        for i in self.get_individuals():
+            s += i.__str__() + "\n"
+        return s
+
+    def __reserve(self, n_new):
+        """
+        Internal function that grows the arrays (doubling their capacity) so that n_new more individuals fit.
+        """
+        capacity = self.solutions.shape[0]
+        if self.size + n_new <= capacity:
+            return 0
+        new_capacity = max(2*capacity, self.size + n_new)
+        solutions = np.empty((new_capacity, self.solutions.shape[1]), dtype=float)
+        solutions[:self.size] = self.solutions[:self.size]
+        fitness = np.full(new_capacity, np.nan)
+        fitness[:self.size] = self.fitness[:self.size]
+        evaluated = np.zeros(new_capacity, dtype=bool)
+        evaluated[:self.size] = self.evaluated[:self.size]
+        self.solutions, self.fitness, self.evaluated = solutions, fitness, evaluated
+        return 0
+
+    def get_solutions_array(self):
+        """
+        Function that returns a view of the solutions array (individual x variable) of the population.
+        """
+        return self.solutions[:self.size]
+
+    def get_fitness_array(self):
+        """
+        Function that returns a view of the fitness vector of the population (NaN if not evaluated).
+        """
+        return self.fitness[:self.size]
+
+    def get_evaluated_mask(self):
+        """
+        Function that returns a view of the mask of evaluated individuals.
+        """
+        return self.evaluated[:self.size]
+
+    def get_best_indices(self, n_best, reverse=False):
+        """
+        Function that returns the indices of the n_best individuals, best first, using a partial selection instead of
+        sorting the population. Ties keep the population order and individuals without fitness come last.
+        """
+        n_best = min(n_best, self.size)
+        if n_best <= 0:
+            return np.empty(0, dtype=int)
+        fitness = self.get_fitness_array()
+        if reverse:
+            fitness = -fitness
+        if n_best < self.size:
+            candidates = np.argpartition(fitness, n_best-1)[:n_best]
+            worst = fitness[candidates].max()
+            if not np.isnan(worst):
+                # Individuals tied with the worst candidate may have been left out
+                candidates = np.flatnonzero(fitness <= worst)
+        else:
+            candidates = np.arange(self.size)
+        order = np.lexsort((candidates, fitness[candidates]))
+        return candidates[order][:n_best]
+
+    def get_subpopulation(self, ind_indices):
+        """
+        Function that returns a new population with copies of the individuals with the given indices (repeated indices
+        give repeated individuals), keeping their fitness.
+        """
+        ind_indices = np.asarray(ind_indices, dtype=int)
+        Pop = self.empty_copy()
+        Pop.solutions = self.solutions[ind_indices]
+        Pop.fitness = self.fitness[ind_indices]
+        Pop.evaluated = self.evaluated[ind_indices]
+        Pop.size = len(ind_indices)
+        return Pop
+
+    def replace_generation(self, elite_indices, offspring, pop_size):
+        """
+        Function that turns the population into the next generation in place, reusing its arrays: the elite individuals
+        are kept, followed by the offspring population, up to pop_size individuals. Offspring are copied as they are
+        (their bounds were enforced when they were inserted) and the evaluation counters are reset.
+        """
+        n_elite = len(elite_indices)
+        n_offspring = min(offspring.get_size(), pop_size - n_elite)
+        if n_elite > 0:
+            elite_solutions = self.solutions[elite_indices]
+            elite_fitness = self.fitness[elite_indices]
+            elite_evaluated = self.evaluated[elite_indices]
+        self.size = 0
+        self.__reserve(n_elite + n_offspring)
+        if n_elite > 0:
+            self.solutions[:n_elite] = elite_solutions
+            self.fitness[:n_elite] = elite_fitness
+            self.evaluated[:n_elite] = elite_evaluated
+        new = slice(n_elite, n_elite + n_offspring)
+        self.solutions[new] = offspring.get_solutions_array()[:n_offspring]
+        self.fitness[new] = offspring.get_fitness_array()[:n_offspring]
+        self.evaluated[new] = ~np.isnan(self.fitness[new])
+        self.size = n_elite + n_offspring
+        self.N_evals = 0
+        self.N_failed_evals = 0
+        return 0
+
+    def get_individual(self, ind_index):
+        """
+        Function that returns a single individual from its index in the population
+        """
+        if ind_index < 0:
+            ind_index += self.size
+        if ind_index < 0 or ind_index >= self.size:
+            raise IndexError("population index out of range")
+        solution = self.search_space.decode_solution(self.solutions[ind_index])
+        if self.evaluated[ind_index]:
+            fitness = float(self.fitness[ind_index])
+        else:
+            fitness = None
+        return Individual(ind_index+1, solution, fitness=fitness)
+
+    def get_individuals(self):
+        """
+        Function that returns all the individual it contains.
+        """
+        return [self.get_individual(i) for i in range(self.size)]
+
+    def get_best_individual(self, opt_type):
+        """
+        Function that returns the best individual
+        """
+        if not self.get_evaluated_mask().any():
+            return None
+        fitness = np.where(self.get_evaluated_mask(), self.get_fitness_array(), np.nan)
+        if opt_type == 'max':
+            return self.get_individual(int(np.nanargmax(fitness)))
+        else:
+            return self.get_individual(int(np.nanargmin(fitness)))
+
+    def sort_by_fitness(self, reverse=False):
+        """
+        Function that sorts a population by fitness, depending on the optimisation type (min in ascending order).
+        return: Sorts the individuals in the population itself, so it sorts the population.
+        """
+        fitness = self.get_fitness_array()
+        if reverse:
+            order = np.argsort(-fitness, kind='stable')
+        else:
+            order = np.argsort(fitness, kind='stable')
+        self.solutions[:self.size] = self.solutions[order]
+        self.fitness[:self.size] = self.fitness[order]
+        self.evaluated[:self.size] = self.evaluated[order]
+        return 0
+
+    def insert_individual(self, solution, fitness=None):
+        """
+        Function that inserts an individual in the population, given a solution.
+        """
+        sol = self._enforce_solution_bounds(solution)
+        self.__reserve(1)
+        self.solutions[self.size] = self.search_space.encode_solution(sol)
+        if fitness is None:
+            self.fitness[self.size] = np.nan
+            self.evaluated[self.size] = False
+        else:
+            self.fitness[self.size] = fitness
+            self.evaluated[self.size] = True
+        self.size += 1
+        return 0
+
+    def replace_individual(self, ind_index, solution, fitness=None):
+        """
+        Function that replaces the individual with a given index by a new one, given a solution.
+        """
+        sol = self._enforce_solution_bounds(solution)
+        self.solutions[ind_index] = self.search_space.encode_solution(sol)
+        if fitness is None:
+            self.fitness[ind_index] = np.nan
+            self.evaluated[ind_index] = False
+        else:
+            self.fitness[ind_index] = fitness
+            self.evaluated[ind_index] = True
+        return 0
+
+    def insert_solutions_array(self, solutions, fitness=None):
+        """
+        Function that inserts a batch of encoded solutions (individual x variable) in the population, brought within the
+        search space at once (see Search_space.repair_solutions). Fitness is an optional vector, with NaN for
+        unevaluated individuals.
+        """
+        solutions = np.atleast_2d(np.asarray(solutions, dtype=float))
+        n_new = solutions.shape[0]
+        self.__reserve(n_new)
+        new = slice(self.size, self.size + n_new)
+        self.solutions[new] = solutions
+        if self.timer is not None:
+            t0 = time.perf_counter()
+        self.search_space.repair_solutions(self.solutions[new])
+        if self.timer is not None:
+            self.timer.add_time('bounds', time.perf_counter() - t0)
+        if fitness is None:
+            self.fitness[new] = np.nan
+        else:
+            self.fitness[new] = fitness
+        self.evaluated[new] = ~np.isnan(self.fitness[new])
+        self.size += n_new
+        return 0
+
+    def get_unevaluated_indices(self):
+        """
+        Function that returns the indices of the individuals without fitness.
+        """
+        return np.flatnonzero(~self.get_evaluated_mask())
+
+    def get_solutions_rows(self, ind_indices):
+        """
+        Function that returns the encoded solutions of the given individuals as a 2-D array (individual x variable).
+        """
+        return self.solutions[ind_indices]
+
+    def update_fitness(self, ind_indices, fitness):
+        """
+        Function that sets the fitness of the individuals with the given indices.
+        """
+        self.fitness[ind_indices] = fitness
+        self.evaluated[ind_indices] = True
+        return 0
 
 class rcga(object):
-    """ Creates a real-coded genetic algorithm """
-    def __init__(self, search_space, params):
+    """
+    Creates a real-coded genetic algorithm. If a callback is given, it is called at the end of every generation as
+    callback(ga, record), where record holds the generation number, the best fitness, the evaluation and cache counters
+    so far and, if profiling is on, the timings of the generation (see rcga_profiling).
+    """
+    def __init__(self, search_space, params, callback=None):
         self.N_gen = 0
         self.params = params
+        self.adaptation = None
+        if params.get('adaptation_params', {}).get('use_adaptation', False) and params.get('ga_mode', 'generational') == 'generational':
+            # The adapted parameters are changed in place
+            self.params = copy.deepcopy(params)
+            self.adaptation = rcga_adaptation.Adaptation(self.params)
+        self.multi_objective = rcga_multiobjective.create_multi_objective(params)
+        self.objectives = None
+        if self.multi_objective is not None and self.params['opt_type'] != 'min':
+            # Individuals are compared on their NSGA-II score, which is minimised
+            self.params = dict(self.params, opt_type='min')
         self.search_space = Search_space(search_space)
         self.seed = params['seed']
         self.pop_size = params['population_size']
         self.max_gen = params['max_generations']
         self.model_function = params['model_function']
-        self.opt_type = params['opt_type']
+        self.opt_type = self.params['opt_type']
+        self.population_backend = params.get('population_backend', 'list')
+        self.ga_mode = params.get('ga_mode', 'generational')
+        self.functions = rcga_registry.resolve_functions(params)
+        self.constraints = rcga_constraints.create_constraints(params, self.search_space, self.functions['constraints'])
         self.best_ind = None
         self.N_evals = 0
         self.N_failed_evals = 0
         self.statistics = {}
-        self.write = {}
+        self.Pop = None
+        self.evaluator = None
+        self.cache = None
+        self.deduplicator = ev.create_deduplicator(params)
+        self.results_writer = None
+        self.checkpoint_time = None
+        self.callback = callback
+        self.termination = rcga_termination.Termination(params)
+        self.termination_reason = None
+        self.surrogate = None
+        if self.ga_mode == 'generational':
+            self.surrogate = rcga_surrogates.create_surrogate(params, self.search_space)
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(len(RNG_STREAMS))
+        self.rngs = {name: np.random.default_rng(s) for name, s in zip(RNG_STREAMS, seed_sequences)}
+        self.timer = rcga_profiling.Phase_timer() if params.get('profiling', False) else None
         if self.opt_type == 'min':
             self.reverse = False
         else:
             self.reverse = True
+        if self.ga_mode not in ['generational', 'steady_state']:
+            raise ValueError("Unknown ga mode {}".format(self.ga_mode))
+        if self.multi_objective is not None:
+            if self.ga_mode != 'generational':
+                raise ValueError("The multi-objective mode needs the generational ga mode")
+            for name, option in [('deduplication', self.deduplicator), ('surrogate', self.surrogate),
+                                 ('adaptation', self.adaptation)]:
+                if option is not None:
+                    raise ValueError("The multi-objective mode does not support {}".format(name))
 
-    def __create_output_dir(self):
+    def __create_population(self):
         """
-        Internal function that creates the output dir and copies the template file
+        Internal function that creates an empty population with the configured backend
         """
-        # Create results directory and create output file from template
-        dir_name = datetime.datetime.now().strftime("%d%m%Y_%H%M%S")
-        output_dir = lib_directory_ops.create_dir(self.params['Excel output dir'], dir_name)
-        assert output_dir != None
-        new_file = 'output_' + dir_name + '.xlsx'
-        output_file = lib_path_ops.join_paths(output_dir, new_file)
-        r = lib_file_ops.copy_file(self.params['Excel template file'], output_file)
-        self.params['Excel output file'] = output_file
-        self.write['generation row index'] = 13
-        assert r != None
+        if self.population_backend == 'array':
+            Pop = Array_population(self.search_space, seed=self.seed, capacity=self.pop_size)
+        elif self.population_backend == 'list':
+            Pop = Population(self.search_space, seed=self.seed)
+        else:
+            raise ValueError("Unknown population backend {}".format(self.population_backend))
+        Pop.timer = self.timer
+        return Pop
 
-    def __write_parameters(self):
+    def __phase(self, name):
         """
-        Internal function that writes the parameters
+        Internal function that returns a context manager timing a phase of the generation, or doing nothing if
+        profiling is off.
         """
-        ws = self.wb["Parameters"]
-        # Write parameters
-        row_i = 4
-        for param in self.params.keys():
-            ws.cell(row=row_i, column=1, value=param)
-            if type(self.params[param]) == type({}):
-                ws.cell(row=row_i, column=2, value=str(self.params[param]))
-            else:
-                ws.cell(row=row_i, column=2, value=self.params[param])
-            row_i += 1
+        if self.timer is None:
+            return contextlib.nullcontext()
+        return self.timer.phase(name)
+
+    def __end_generation(self):
+        """
+        Internal function called at the end of every generation: it closes the generation of the timer and passes its
+        record to the callback. It does nothing if there is no callback and profiling is off.
+        """
+        if self.callback is None and self.timer is None:
+            return 0
+        record = {
+            'N_gen': self.N_gen,
+            'best_fitness': self.best_ind.get_fitness(),
+            'N_evals': self.statistics['N_evals'],
+            'N_failed_evals': self.statistics['N_failed_evals'],
+        }
+        if self.cache is not None:
+            record['N_cache_hits'] = self.cache.get_hits()
+            record['N_cache_misses'] = self.cache.get_misses()
+        if self.deduplicator is not None:
+            for key in ['N_duplicates_parent', 'N_duplicates_intra', 'N_duplicates_regenerated', 'N_duplicates_reused']:
+                record[key] = self.statistics[key]
+        if self.constraints is not None:
+            for key in ['N_infeasible_skipped', 'N_infeasible_repaired', 'N_infeasible_resampled']:
+                record[key] = self.statistics[key]
+        if self.surrogate is not None:
+            record['N_surrogate_predicted'] = self.statistics['N_surrogate_predicted']
+            record['N_surrogate_explored'] = self.statistics['N_surrogate_explored']
+        if self.adaptation is not None:
+            record['adaptation'] = dict(self.adaptation.trajectory[-1])
+        if self.timer is not None:
+            record.update(self.timer.end_generation())
+        if self.callback is not None:
+            self.callback(self, record)
         return 0
 
-    def __write_optimal_point(self):
+    def __check_termination(self):
         """
-        Internal function that writes the optimal point
+        Internal function that checks the stopping rules at the end of a generation (see rcga_termination).
         """
-        ws = self.wb["Optimisation"]
-        if self.params['write_to_console']:
-            print("\nOptimal point:")
-        # Write optimal point
-        col_i = 2
-        for v in self.search_space.get_variables_names():
-            ws.cell(row=5, column=col_i, value=v)
-            ws.cell(row=6, column=col_i, value=self.best_ind.get_solution()[v])
-            if self.params['write_to_console']:
-                s = '{}: {}'.format(v, self.best_ind.get_solution()[v])
-                print(s)
-            col_i += 1
+        diversity = self.Pop.get_diversity() if self.termination.uses_diversity() else None
+        best_fitness = self.best_ind.get_fitness() if self.multi_objective is None else None
+        self.termination_reason = self.termination.update(self.N_gen, best_fitness, self.statistics['N_evals'],
+                                                          diversity=diversity)
+        if self.termination_reason is not None:
+            self.statistics['termination_reason'] = self.termination_reason
         return 0
 
     def __write_generation(self):
         """
-        Internal function that writes the generation results
-        """
-        ws = self.wb["Optimisation"]
-        # Write variables names
-        col_i = 3
-        for v in self.search_space.get_variables_names():
-            ws.cell(row=12, column=col_i, value=v)
-            col_i += 1
-        # Write generation info
-        row_i = self.write['generation row index']
-        ws.cell(row=row_i, column=1, value=self.N_gen)
-        ws.cell(row=row_i, column=2, value=self.best_ind.get_fitness())
-        col_i = 3
-        for v in self.search_space.get_variables_names():
-            ws.cell(row=row_i, column=col_i, value=self.best_ind.get_solution()[v])
-            col_i += 1
-        self.write['generation row index'] += 1
+        Internal function that writes the generation results (the Pareto front in the multi-objective mode)
+        """
+        if self.multi_objective is not None:
+            front = self.multi_objective.get_front_indices(self.Pop.get_fitness_array(), self.objectives)
+            with self.__phase('results'):
+                self.results_writer.write_front(self.N_gen, self.Pop.get_solutions_rows(front), self.objectives[front])
+            if self.params['write_to_console']:
+                print("\t{}\t{}".format(self.N_gen, len(front)))
+            return 0
+        with self.__phase('results'):
+            self.results_writer.write_generation(self.N_gen, self.best_ind.get_fitness(), self.best_ind.get_solution())
 
         # Write to console
         if self.params['write_to_console']:
@@ -354,91 +969,649 @@ class rcga(object):
             print(s)
         return 0
 
-    def __write_statistics(self):
+    def __write_optimal_point(self):
         """
-        Internal function that writes the statistics
+        Internal function that writes the optimal point. In the multi-objective mode the final Pareto front was written
+        with the last generation.
         """
-        ws = self.wb["Statistics"]
-        # Write statistics
-        ws.cell(row=3, column=2, value=self.statistics['N_failed_evals'])
-        ws.cell(row=4, column=2, value=self.statistics['N_evals'])
+        if self.multi_objective is not None:
+            if self.params['write_to_console']:
+                print("\nPareto front: {} solutions".format(len(self.get_pareto_front()[0])))
+            return 0
+        self.results_writer.write_optimal_point(self.best_ind.get_solution())
+        if self.params['write_to_console']:
+            print("\nOptimal point:")
+            for v in self.search_space.get_variables_names():
+                s = '{}: {}'.format(v, self.best_ind.get_solution()[v])
+                print(s)
         return 0
 
-    def execute(self):
+    def __get_checkpoint_file(self):
         """
-        Main function of the class, as it runs the rcga algorithm.
+        Internal function that returns the path of the checkpoint file. Relative paths are taken from the output
+        directory of the run, or from the outputs directory if the results backend writes nothing.
         """
+        checkpoint_file = self.params.get('checkpoint_file', 'checkpoint.npz')
+        if os.path.isabs(checkpoint_file):
+            return checkpoint_file
+        output_dir = self.results_writer.get_output_dir()
+        if output_dir is None:
+            output_dir = self.params['Excel output dir']
+        return lib_path_ops.join_paths(output_dir, checkpoint_file)
 
-        # Get functions
-        f_model = 'models.' + self.params['model_function']
-        f_elitism = 'op.'+self.params['elitism_params']['elitism_function']
-        f_selection = 'op.' + self.params['selection_params']['selection_function']
-        f_crossover = 'op.' + self.params['crossover_params']['crossover_function']
-        f_mutation = 'op.' + self.params['mutation_params']['mutation_function']
+    def __checkpoint_if_due(self):
+        """
+        Internal function that saves a checkpoint every checkpoint_every_generations generations and/or every
+        checkpoint_every_seconds seconds (0 disables each rule). The last generation is not checkpointed.
+        """
+        every_generations = self.params.get('checkpoint_every_generations', 0)
+        every_seconds = self.params.get('checkpoint_every_seconds', 0)
+        due = (every_generations > 0 and self.N_gen % every_generations == 0) or \
+              (every_seconds > 0 and time.time() - self.checkpoint_time >= every_seconds)
+        if due and not self.is_finished():
+            with self.__phase('checkpoint'):
+                self.save_checkpoint()
+        return 0
 
-        # Initialise and evaluate population
-        Pop = Population(self.search_space, seed=self.seed)
-        Pop.initialise(self.pop_size)
-        N_evals, N_failed_evals = Pop.evaluate_population(f_model)
-        self.best_ind = Pop.get_best_individual(self.opt_type)
+    def __select_parents(self, Pop, rng):
+        """
+        Internal function that draws the indices of the two parents of an offspring pair (steady-state mode), each the
+        winner of a tournament of n_ind_tournament individuals. The second tournament is held among the individuals
+        whose solution differs from the first parent, so that a parent is never crossed with a copy of itself.
+        Individuals without fitness lose every tournament.
+        """
+        fitness = Pop.get_fitness_array()
+        fitness = np.where(np.isnan(fitness), -np.inf if self.reverse else np.inf, fitness)
+        solutions = Pop.get_solutions_array()
+        n_ind_tournament = self.params['selection_params'].get('n_ind_tournament', 2)
+
+        def tournament(candidates):
+            drawn = rng.choice(candidates, size=min(n_ind_tournament, len(candidates)), replace=False)
+            return drawn[np.argmax(fitness[drawn])] if self.reverse else drawn[np.argmin(fitness[drawn])]
+
+        first = tournament(np.arange(Pop.get_size()))
+        others = np.flatnonzero(np.any(solutions != solutions[first], axis=1))
+        if len(others) == 0:
+            # All the individuals have the same solution
+            return [first, first]
+        return [first, tournament(others)]
+
+    def __create_offspring(self, Pop, offspring_params):
+        """
+        Internal function that creates a pair of offspring (steady-state mode): two distinct parents are drawn (see
+        __select_parents), then crossed and mutated by the crossover and mutation operators.
+        If the crossover gives no offspring (e.g. p_crossover is 0), the parents are mutated instead. Returns the
+        encoded solutions and fitness of the offspring (NaN if they must be evaluated).
+        """
+        parents = self.__select_parents(Pop, self.rngs['selection'])
+        mating_pop = self.__create_population()
+        mating_pop.insert_solutions_array(Pop.get_solutions_array()[parents], fitness=Pop.get_fitness_array()[parents])
+        crossed_pop = self.functions['crossover'](mating_pop, offspring_params, rng=self.rngs['crossover'])
+        if crossed_pop.get_size() == 0:
+            crossed_pop = mating_pop
+        mut_pop = self.functions['mutation'](crossed_pop, offspring_params, rng=self.rngs['mutation'])
+        if self.constraints is not None:
+            self.__apply_constraints(Pop, mut_pop, lambda n: self.__regenerate(mating_pop, n).get_solutions_array())
+        return list(zip(mut_pop.get_solutions_array(), mut_pop.get_fitness_array()))
+
+    def __create_random_solutions(self, n_solutions):
+        """
+        Internal function that draws n_solutions new random encoded solutions, as for the initial population.
+        """
+        Pop = self.__create_population()
+        Pop.initialise(n_solutions, rng=self.rngs['initialisation'])
+        return Pop.get_solutions_array()
+
+    def __regenerate(self, mating_pop, n_offspring):
+        """
+        Internal function that creates about n_offspring new offspring from the mating pool with the crossover and
+        mutation operators (crossover operators may round the number up).
+        """
+        regenerate_params = copy.deepcopy(self.params)
+        regenerate_params['population_size'] = n_offspring
+        crossed_pop = self.functions['crossover'](mating_pop, regenerate_params, rng=self.rngs['crossover'])
+        return self.functions['mutation'](crossed_pop, regenerate_params, rng=self.rngs['mutation'])
+
+    def __apply_constraints(self, Pop, offspring, create_solutions):
+        """
+        Internal function that checks the constraints (see rcga_constraints) on the individuals of the offspring
+        population without fitness, before they reach the model. Infeasible individuals are repaired towards the
+        feasible individuals of the population Pop, or replaced by the encoded solutions returned by
+        create_solutions(n), as set in infeasible_handling. Those still infeasible take the penalty fitness (none in
+        the multi-objective mode). Returns their indices.
+        """
+        ind_indices = np.asarray(offspring.get_unevaluated_indices(), dtype=int)
+        violations = self.constraints.get_violations(offspring.get_solutions_rows(ind_indices))
+        infeasible = violations > 0
+        ind_indices = ind_indices[infeasible]
+        violations = violations[infeasible]
+        if self.constraints.handling == 'resample':
+            for retry in range(self.constraints.max_resamples):
+                if len(ind_indices) == 0:
+                    break
+                solutions = create_solutions(len(ind_indices))[:len(ind_indices)]
+                for i, row in zip(ind_indices, solutions):
+                    offspring.replace_individual(i, self.search_space.decode_solution(row))
+                self.statistics['N_infeasible_resampled'] += len(solutions)
+                violations = self.constraints.get_violations(offspring.get_solutions_rows(ind_indices))
+                infeasible = violations > 0
+                ind_indices = ind_indices[infeasible]
+                violations = violations[infeasible]
+        elif self.constraints.handling == 'repair' and len(ind_indices) > 0:
+            references = Pop.get_solutions_array()
+            references = references[self.constraints.get_violations(references) == 0]
+            solutions, feasible = self.constraints.repair(offspring.get_solutions_rows(ind_indices), references,
+                                                          self.rngs['constraints'])
+            for i, row in zip(ind_indices[feasible], solutions[feasible]):
+                offspring.replace_individual(i, self.search_space.decode_solution(row))
+            self.statistics['N_infeasible_repaired'] += int(feasible.sum())
+            ind_indices = ind_indices[~feasible]
+            violations = violations[~feasible]
+        if self.multi_objective is None and len(ind_indices) > 0:
+            offspring.update_fitness(ind_indices, self.constraints.get_penalty_fitness(violations, reverse=self.reverse))
+        self.statistics['N_infeasible_skipped'] += len(ind_indices)
+        return ind_indices
+
+    def __deduplicate(self, Pop, mating_pop, offspring):
+        """
+        Internal function that looks for the offspring duplicating an individual of the current population or an
+        earlier offspring, before they are evaluated. In 'regenerate' mode the duplicates are replaced by new offspring
+        of the mating pool, up to deduplication_max_retries times. The offspring still duplicating the current
+        population then take the fitness found there. Returns the pairs (i, j) of offspring i duplicating an earlier
+        offspring j, which take its fitness once it is evaluated.
+        """
+        reference = self.deduplicator.index_population(Pop)
+        parent_duplicates, parent_fitness, duplicates = self.deduplicator.find_duplicates(reference, offspring)
+        self.statistics['N_duplicates_parent'] += len(parent_duplicates)
+        self.statistics['N_duplicates_intra'] += len(duplicates)
+        if self.deduplicator.mode == 'regenerate':
+            for retry in range(self.deduplicator.max_retries):
+                ind_indices = parent_duplicates + [i for i, j in duplicates]
+                if len(ind_indices) == 0:
+                    break
+                mut_pop = self.__regenerate(mating_pop, len(ind_indices))
+                n_new = min(len(ind_indices), mut_pop.get_size())
+                for i, solution, fitness in zip(ind_indices[:n_new], mut_pop.get_solutions_array(), mut_pop.get_fitness_array()):
+                    offspring.replace_individual(i, self.search_space.decode_solution(solution),
+                                                 fitness=None if np.isnan(fitness) else fitness)
+                self.statistics['N_duplicates_regenerated'] += n_new
+                parent_duplicates, parent_fitness, duplicates = self.deduplicator.find_duplicates(reference, offspring)
+        if len(parent_duplicates) > 0:
+            offspring.update_fitness(parent_duplicates, parent_fitness)
+        self.statistics['N_duplicates_reused'] += len(parent_duplicates)
+        return duplicates
+
+    def __screen_offspring(self, Pop, duplicates):
+        """
+        Internal function that predicts with the surrogate the fitness of the individuals to be evaluated, and leaves
+        for the true model the screen_fraction best predicted, those predicted better than the current best individual
+        and an exploration_fraction of the others drawn at random. The others take their predicted fitness. Nothing is
+        screened until the archive has min_archive_size solutions. Returns the indices of the individuals left for
+        the true model.
+        """
+        surrogate_params = self.params['surrogate_params']
+        ind_indices = np.asarray(Pop.get_unevaluated_indices(), dtype=int)
+        if duplicates:
+            ind_indices = ind_indices[~np.isin(ind_indices, [i for i, j in duplicates])]
+        if len(ind_indices) == 0 or self.surrogate.get_size() < surrogate_params.get('min_archive_size', 50):
+            return ind_indices
+        predicted = self.surrogate.predict(Pop.get_solutions_rows(ind_indices))
+        order = np.argsort(-predicted if self.reverse else predicted, kind='stable')
+        keep = np.zeros(len(ind_indices), dtype=bool)
+        keep[order[:math.ceil(surrogate_params.get('screen_fraction', 0.3)*len(ind_indices))]] = True
+        best_fitness = self.best_ind.get_fitness()
+        if best_fitness is not None:
+            keep |= predicted > best_fitness if self.reverse else predicted < best_fitness
+        rest = np.flatnonzero(~keep)
+        n_explore = min(len(rest), int(round(surrogate_params.get('exploration_fraction', 0.05)*len(ind_indices))))
+        if n_explore > 0:
+            keep[self.rngs['surrogate'].choice(rest, n_explore, replace=False)] = True
+        Pop.update_fitness(ind_indices[~keep], predicted[~keep])
+        self.statistics['N_surrogate_predicted'] += int((~keep).sum())
+        self.statistics['N_surrogate_explored'] += n_explore
+        return ind_indices[keep]
+
+    def __evaluate_objectives(self, Pop, ind_indices):
+        """
+        Internal function that evaluates the objectives of the individuals with the given indices (multi-objective
+        mode). Returns a 2-D array (individual x objective), with NaN rows for failed evaluations, and the numbers of
+        evaluations and failed evaluations.
+        """
+        model = self.functions['model']
+        if len(ind_indices) == 0:
+            return np.empty((0, self.multi_objective.get_number_objectives())), 0, 0
+        if ev.is_batch_model(model):
+            solutions = Pop.get_solutions_rows(ind_indices)
+        else:
+            solutions = [Pop.get_individual(i).get_solution() for i in ind_indices]
+        latencies = None if self.timer is None else []
+        with self.__phase('evaluation'):
+            objectives = self.evaluator.evaluate(model, solutions, latencies=latencies)
+        if latencies is not None:
+            self.timer.add_latencies(latencies)
+        objectives = self.multi_objective.to_objectives_array(objectives)
+        return objectives, len(ind_indices), int(np.any(np.isnan(objectives), axis=1).sum())
+
+    def __replace_multi_objective(self, Pop, offspring, infeasible=()):
+        """
+        Internal function that evaluates the objectives of the offspring and returns the next population: the best
+        population_size individuals of the current population and the offspring together, by non-domination rank and
+        crowding distance (see rcga_multiobjective). Offspring identical to a member of the current population take its
+        objectives instead of being evaluated, and infeasible offspring (see __apply_constraints) are not evaluated.
+        Returns the population and the numbers of evaluations and failed evaluations.
+        """
+        decimals = self.params.get('fitness_cache_decimals', 10)
+        solutions = Pop.get_solutions_array()
+        offspring_solutions = offspring.get_solutions_array()
+        members = dict(zip(ev.get_solution_keys(solutions, decimals), range(len(solutions))))
+        offspring_objectives = np.full((len(offspring_solutions), self.multi_objective.get_number_objectives()), np.nan)
+        found = np.zeros(len(offspring_solutions), dtype=bool)
+        found[np.asarray(infeasible, dtype=int)] = True
+        for i, key in enumerate(ev.get_solution_keys(offspring_solutions, decimals)):
+            if key in members and not found[i]:
+                offspring_objectives[i] = self.objectives[members[key]]
+                found[i] = True
+        offspring_objectives[~found], N_evals, N_failed_evals = self.__evaluate_objectives(offspring,
+                                                                                           np.flatnonzero(~found))
+        with self.__phase('replacement'):
+            solutions = np.concatenate([solutions, offspring_solutions])
+            objectives = np.concatenate([self.objectives, offspring_objectives])
+            selected, scores = self.multi_objective.select(objectives, self.pop_size)
+            Pop = self.__create_population()
+            Pop.insert_solutions_array(solutions[selected], scores)
+        self.objectives = objectives[selected]
+        return Pop, N_evals, N_failed_evals
+
+    def __replace_worst(self, Pop, solution, fitness):
+        """
+        Internal function that replaces the worst individual of the population by a new one, unless it is worse.
+        Returns the encoded solution of the individual replaced, or None if the new one was not inserted.
+        """
+        worst_index = Pop.get_best_indices(1, reverse=not self.reverse)[0]
+        worst_fitness = Pop.get_fitness_array()[worst_index]
+        if np.isnan(worst_fitness) or (fitness >= worst_fitness if self.reverse else fitness <= worst_fitness):
+            replaced = Pop.get_solutions_rows([worst_index])[0]
+            Pop.replace_individual(worst_index, self.search_space.decode_solution(solution), fitness=fitness)
+            return replaced
+        return None
+
+    def __execute_steady_state(self, Pop, evaluator, cache):
+        """
+        Internal function that runs the steady-state mode. There is no generational barrier: whenever an evaluation
+        finishes, its individual replaces the worst member of the population (unless it is worse) and a new offspring
+        is submitted, so that all workers are kept busy. A generation is reported every population_size offspring and
+        the run stops after max_generations of them, or when a stopping rule is met. The evaluations still pending
+        are then cancelled or discarded.
+        Offspring whose solution is already in the population or being evaluated are dropped, and do not count toward
+        the generations. If 10 x population_size offspring in a row are dropped with no evaluation pending, the
+        population is taken to be unable to create new solutions and the run stops with termination_reason
+        'no_new_offspring'.
+        """
+        if isinstance(evaluator, ev.Asyncio_evaluator):
+            raise ValueError("The steady_state mode does not support the asyncio executor")
+        f_model = self.functions['model']
+        # The crossover operators create population_size offspring: ask them for a pair
+        offspring_params = copy.deepcopy(self.params)
+        offspring_params['population_size'] = 2
+        members = collections.Counter(row.tobytes() for row in Pop.get_solutions_array())
+        pending = set()
+        max_dropped = 10*self.pop_size
+        self.statistics['N_duplicates_dropped'] = 0
+
+        def insert(solution, key, fitness):
+            replaced = self.__replace_worst(Pop, solution, fitness)
+            if replaced is not None:
+                members[replaced.tobytes()] -= 1
+                members[key] += 1
+            return 0
+
+        n_offspring = self.max_gen * self.pop_size
+        n_submitted = 0
+        n_done = 0
+        offspring = []
+        jobs = {}
+        while n_done < n_offspring and self.termination_reason is None:
+            # Keep all workers busy
+            n_dropped = 0
+            while len(jobs) < evaluator.get_n_workers() and n_submitted < n_offspring and n_dropped < max_dropped:
+                while not offspring:
+                    offspring = self.__create_offspring(Pop, offspring_params)
+                solution, fitness = offspring.pop(0)
+                key = solution.tobytes()
+                if members[key] > 0 or key in pending:
+                    self.statistics['N_duplicates_dropped'] += 1
+                    n_dropped += 1
+                    continue
+                n_dropped = 0
+                n_submitted += 1
+                if np.isnan(fitness) and cache is not None:
+                    fitness = cache.lookup(solution[np.newaxis, :])[0]
+                if not np.isnan(fitness):
+                    insert(solution, key, fitness)
+                    n_done += 1
+                    continue
+                if ev.is_batch_model(f_model):
+                    job = evaluator.submit(f_model, solution[np.newaxis, :])
+                else:
+                    job = evaluator.submit(f_model, [self.search_space.decode_solution(solution)])
+                jobs[job] = (solution, key)
+                pending.add(key)
+            if len(jobs) == 0 and n_dropped == max_dropped:
+                # The new offspring are all copies of individuals of the population
+                self.termination_reason = 'no_new_offspring'
+                self.statistics['termination_reason'] = self.termination_reason
+                break
+
+            # Insert finished offspring as they arrive
+            done, not_done = cf.wait(list(jobs.keys()), return_when=cf.FIRST_COMPLETED)
+            for job in done:
+                solution, key = jobs.pop(job)
+                pending.discard(key)
+                fitness = job.result()[0]
+                self.statistics['N_evals'] += 1
+                if np.isnan(fitness):
+                    self.statistics['N_failed_evals'] += 1
+                else:
+                    if cache is not None:
+                        cache.store(solution[np.newaxis, :], [fitness])
+                    insert(solution, key, fitness)
+                n_done += 1
+
+            # Report a generation every population_size offspring
+            while self.N_gen < n_done // self.pop_size and self.termination_reason is None:
+                self.N_gen += 1
+                self.best_ind = Pop.get_best_individual(self.opt_type)
+                self.__check_termination()
+                self.__write_generation()
+                self.__end_generation()
+        for job in jobs:
+            job.cancel()
+        return Pop
+
+    def initialise(self):
+        """
+        Function that initialises and evaluates the population, opens the results writer and writes generation 0.
+        """
+        self.Pop = self.__create_population()
+        self.Pop.initialise(self.pop_size, rng=self.rngs['initialisation'])
+        self.evaluator = ev.create_evaluator(self.params, model=self.functions['model'], rng=self.rngs['evaluation'])
+        infeasible = np.empty(0, dtype=int)
+        if self.constraints is not None:
+            for key in ['N_infeasible_skipped', 'N_infeasible_repaired', 'N_infeasible_resampled']:
+                self.statistics[key] = 0
+            with self.__phase('constraints'):
+                infeasible = self.__apply_constraints(self.Pop, self.Pop, self.__create_random_solutions)
+        if self.multi_objective is not None:
+            ind_indices = np.arange(self.Pop.get_size())
+            feasible = np.setdiff1d(ind_indices, infeasible)
+            self.objectives = np.full((self.Pop.get_size(), self.multi_objective.get_number_objectives()), np.nan)
+            self.objectives[feasible], N_evals, N_failed_evals = self.__evaluate_objectives(self.Pop, feasible)
+            self.Pop.update_fitness(ind_indices, self.multi_objective.get_scores(self.objectives))
+        else:
+            self.cache = ev.create_fitness_cache(self.params)
+            N_evals, N_failed_evals = self.Pop.evaluate_population(self.functions['model'], evaluator=self.evaluator,
+                                                                   cache=self.cache)
+        self.best_ind = self.Pop.get_best_individual(self.opt_type)
 
         # Statistics
         self.statistics['N_evals'] = N_evals
         self.statistics['N_failed_evals'] = N_failed_evals
+        if self.deduplicator is not None:
+            for key in ['N_duplicates_parent', 'N_duplicates_intra', 'N_duplicates_regenerated', 'N_duplicates_reused']:
+                self.statistics[key] = 0
+        if self.surrogate is not None:
+            # Penalised individuals would mislead the surrogate
+            feasible = np.setdiff1d(np.arange(self.Pop.get_size()), infeasible)
+            self.surrogate.add(self.Pop.get_solutions_rows(feasible), self.Pop.get_fitness_array()[feasible])
+            self.statistics['N_surrogate_predicted'] = 0
+            self.statistics['N_surrogate_explored'] = 0
 
         # Create output directory and files
-        self.__create_output_dir()
-        self.wb = lib_excel.open_workbook(self.params['Excel output file'])
+        self.results_writer = rcga_results.create_results_writer(self.params, self.search_space)
+        self.results_writer.open()
 
         # Write initial results
         if self.params['write_to_console']:
-            print("\nGen.\tFitness")
-        self.__write_parameters()
+            print("\nGen.\t{}".format("Fitness" if self.multi_objective is None else "Front size"))
+        self.results_writer.write_parameters(self.params)
+        if self.adaptation is not None:
+            self.adaptation.start(self.N_gen, self.params, self.Pop)
+        self.__check_termination()
         self.__write_generation()
+        self.checkpoint_time = time.time()
+        self.__end_generation()
+        return 0
+
+    def step(self):
+        """
+        Function that determines the next generation.
+        """
+        Pop = self.Pop
 
-        # Determine next generation
-        while self.N_gen < self.max_gen:
-            # Select mating pool
-            mating_pop = eval(f_selection)(Pop, self.params)
+        # Select mating pool
+        with self.__phase('selection'):
+            mating_pop = self.functions['selection'](Pop, self.params, rng=self.rngs['selection'])
 
-            # Apply crossover
-            crossed_pop = eval(f_crossover)(mating_pop, self.params)
+        # Apply crossover
+        with self.__phase('crossover'):
+            crossed_pop = self.functions['crossover'](mating_pop, self.params, rng=self.rngs['crossover'])
 
-            # Apply mutation
-            mut_pop = eval(f_mutation)(crossed_pop, self.params)
+        # Apply mutation
+        with self.__phase('mutation'):
+            mut_pop = self.functions['mutation'](crossed_pop, self.params, rng=self.rngs['mutation'])
+
+        # Check the constraints before any model call
+        infeasible = ()
+        if self.constraints is not None:
+            with self.__phase('constraints'):
+                infeasible = self.__apply_constraints(
+                    Pop, mut_pop, lambda n: self.__regenerate(mating_pop, n).get_solutions_array())
+
+        if self.multi_objective is not None:
+            # Parents and offspring compete for the next population, which keeps the best of both
+            Pop, N_evals, N_failed_evals = self.__replace_multi_objective(Pop, mut_pop, infeasible=infeasible)
+            self.Pop = Pop
+            del mut_pop
+        else:
+            # Remove duplicate offspring
+            duplicates = None
+            if self.deduplicator is not None:
+                with self.__phase('deduplication'):
+                    duplicates = self.__deduplicate(Pop, mating_pop, mut_pop)
 
             # Apply elitism
-            elitism_ind_list = eval(f_elitism)(Pop, self.params, reverse=self.reverse)
+            with self.__phase('elitism'):
+                elite_indices = self.functions['elitism'](Pop, self.params, reverse=self.reverse)
+            n_elite = len(elite_indices)
+            if self.adaptation is not None:
+                parents_median = np.nanmedian(mating_pop.get_fitness_array())
 
             # Build new population
-            del Pop
-            Pop = Population(self.search_space, seed=self.seed)
-            for i in elitism_ind_list:
-                Pop.insert_individual(i.get_solution(), fitness=i.get_fitness())
-            for i in mut_pop.get_individuals():
-                if Pop.get_size() < self.pop_size:
-                    Pop.insert_individual(i.get_solution())
-            N_evals, N_failed_evals = Pop.evaluate_population(f_model)
-            self.best_ind = Pop.get_best_individual(self.opt_type)
+            with self.__phase('replacement'):
+                Pop.replace_generation(elite_indices, mut_pop, self.pop_size)
+            del mut_pop
+            if duplicates:
+                # Offspring indices to population indices
+                duplicates = [(n_elite + i, n_elite + j) for i, j in duplicates if n_elite + i < Pop.get_size()]
+                self.statistics['N_duplicates_reused'] += len(duplicates)
+            if self.surrogate is not None:
+                with self.__phase('surrogate'):
+                    screened_indices = self.__screen_offspring(Pop, duplicates)
+            N_evals, N_failed_evals = Pop.evaluate_population(self.functions['model'], evaluator=self.evaluator,
+                                                              cache=self.cache, duplicates=duplicates)
+            if self.surrogate is not None:
+                with self.__phase('surrogate'):
+                    self.surrogate.add(Pop.get_solutions_rows(screened_indices), Pop.get_fitness_array()[screened_indices])
+        self.best_ind = Pop.get_best_individual(self.opt_type)
 
-            # Increment generation
-            self.N_gen += 1
+        # Increment generation
+        self.N_gen += 1
 
-            # Statistics
-            self.statistics['N_evals'] += N_evals
-            self.statistics['N_failed_evals'] += N_failed_evals
+        # Statistics
+        self.statistics['N_evals'] += N_evals
+        self.statistics['N_failed_evals'] += N_failed_evals
+        if self.adaptation is not None:
+            with self.__phase('adaptation'):
+                self.adaptation.update(self.N_gen, self.params, Pop, Pop.get_fitness_array()[n_elite:], parents_median)
+        self.__check_termination()
 
-            # Write results
-            self.__write_generation()
+        # Write results
+        self.__write_generation()
+        self.__checkpoint_if_due()
+        self.__end_generation()
+        return 0
 
-        # Write optimal results and statistics
+    def finalise(self):
+        """
+        Function that writes the optimal point and the statistics and closes the evaluator and the results writer.
+        """
+        if self.cache is not None:
+            self.statistics['N_cache_hits'] = self.cache.get_hits()
+            self.statistics['N_cache_misses'] = self.cache.get_misses()
+        if self.timer is not None:
+            self.statistics.update(self.timer.get_statistics())
         self.__write_optimal_point()
-        self.__write_statistics()
+        self.results_writer.write_statistics(self.statistics)
+        if self.adaptation is not None:
+            self.results_writer.write_adaptation(self.adaptation.trajectory)
 
         # Close necessary files
-        lib_excel.save_workbook(self.wb, self.params['Excel output file'])
-        self.wb.close()
+        self.evaluator.close()
+        self.results_writer.close()
+        return 0
+
+    def get_pareto_front(self):
+        """
+        Function that returns the Pareto front of the current population (multi-objective mode): the list of its
+        solutions and the 2-D array of their objectives.
+        """
+        front = self.multi_objective.get_front_indices(self.Pop.get_fitness_array(), self.objectives)
+        return [self.Pop.get_individual(i).get_solution() for i in front], self.objectives[front]
+
+    def get_migrants(self, n_migrants):
+        """
+        Function that returns the encoded solutions and the fitness of the n_migrants best individuals.
+        """
+        best_indices = np.asarray(self.Pop.get_best_indices(n_migrants, reverse=self.reverse), dtype=int)
+        return self.Pop.get_solutions_rows(best_indices), self.Pop.get_fitness_array()[best_indices]
+
+    def insert_migrants(self, solutions, fitness):
+        """
+        Function that inserts evaluated individuals coming from another population, each one replacing the worst
+        individual unless it is worse.
+        """
+        for solution, f in zip(solutions, fitness):
+            self.__replace_worst(self.Pop, solution, f)
+        self.best_ind = self.Pop.get_best_individual(self.opt_type)
+        return 0
+
+    def save_checkpoint(self, checkpoint_file=None):
+        """
+        Function that flushes the results writer and saves the state of the run to a checkpoint file (by default the
+        one set in checkpoint_file). Only generational runs can be checkpointed.
+        """
+        if self.ga_mode != 'generational':
+            raise ValueError("Only the generational ga mode supports checkpoints")
+        if checkpoint_file is None:
+            checkpoint_file = self.__get_checkpoint_file()
+        self.results_writer.flush()
+        output_dir = self.results_writer.get_output_dir()
+        checkpoint = {
+            'search_space': self.search_space.search_space,
+            'params': self.params,
+            'statistics': self.statistics,
+            'output_dir': np.array('' if output_dir is None else output_dir),
+            'N_gen': np.array(self.N_gen),
+            'solutions': self.Pop.get_solutions_array(),
+            'fitness': self.Pop.get_fitness_array(),
+            'best_solution': np.array(self.search_space.encode_solution(self.best_ind.get_solution()), dtype=float),
+            'best_fitness': np.array(np.nan if self.best_ind.get_fitness() is None else self.best_ind.get_fitness()),
+        }
+        if self.cache is not None:
+            keys, fitness, hits, misses = self.cache.get_state()
+            checkpoint.update({'cache_keys': keys, 'cache_fitness': fitness,
+                               'cache_hits': np.array(hits), 'cache_misses': np.array(misses)})
+        checkpoint['rng_states'] = {name: rng.bit_generator.state for name, rng in self.rngs.items()}
+        checkpoint['termination_state'] = self.termination.get_state()
+        if self.adaptation is not None:
+            checkpoint['adaptation_trajectory'] = self.adaptation.trajectory
+        if self.surrogate is not None:
+            checkpoint['surrogate_solutions'], checkpoint['surrogate_fitness'] = self.surrogate.get_state()
+        if self.multi_objective is not None:
+            checkpoint['objectives'] = self.objectives
+        checkpoint.update(rcga_checkpoints.get_random_state())
+        rcga_checkpoints.write_checkpoint(checkpoint_file, checkpoint)
+        self.checkpoint_time = time.time()
+        return 0
 
+    def load_checkpoint(self, checkpoint_file):
+        """
+        Function that restores the state of a run saved in a checkpoint file, in place of initialise. The results writer
+        reopens the output directory of the run and discards anything written after the checkpoint.
+        """
+        checkpoint = rcga_checkpoints.read_checkpoint(checkpoint_file)
+        self.N_gen = int(checkpoint['N_gen'])
+        self.statistics = dict(checkpoint['statistics'])
+        self.Pop = self.__create_population()
+        self.Pop.insert_solutions_array(checkpoint['solutions'], checkpoint['fitness'])
+        self.best_ind = self.Pop.get_best_individual(self.opt_type)
+        self.evaluator = ev.create_evaluator(self.params, model=self.functions['model'], rng=self.rngs['evaluation'])
+        if self.multi_objective is None:
+            self.cache = ev.create_fitness_cache(self.params)
+        else:
+            self.objectives = np.asarray(checkpoint['objectives'], dtype=float)
+        for name, state in checkpoint['rng_states'].items():
+            self.rngs[name].bit_generator.state = state
+        if 'termination_state' in checkpoint:
+            self.termination.set_state(checkpoint['termination_state'])
+        self.termination_reason = self.statistics.get('termination_reason', None)
+        if self.adaptation is not None and 'adaptation_trajectory' in checkpoint:
+            self.adaptation.trajectory = checkpoint['adaptation_trajectory']
+        if self.surrogate is not None and 'surrogate_solutions' in checkpoint:
+            self.surrogate.set_state(checkpoint['surrogate_solutions'], checkpoint['surrogate_fitness'])
+        if self.cache is not None and 'cache_keys' in checkpoint:
+            self.cache.set_state(checkpoint['cache_keys'], checkpoint['cache_fitness'],
+                                 checkpoint['cache_hits'], checkpoint['cache_misses'])
+        rcga_checkpoints.set_random_state(checkpoint)
+
+        # Reopen the output directory and files
+        self.results_writer = rcga_results.create_results_writer(self.params, self.search_space)
+        if str(checkpoint['output_dir']):
+            self.results_writer.output_dir = str(checkpoint['output_dir'])
+        self.results_writer.resume(self.N_gen)
+        if self.params['write_to_console']:
+            print("\nResuming from generation {}".format(self.N_gen))
+            print("\nGen.\t{}".format("Fitness" if self.multi_objective is None else "Front size"))
+        self.checkpoint_time = time.time()
+        return 0
+
+    def is_finished(self):
+        """
+        Function that returns whether the run has reached max_generations or met a stopping rule.
+        """
+        return self.termination_reason is not None or self.N_gen >= self.max_gen
+
+    def resume(self, checkpoint_file):
+        """
+        Function that continues a run saved in a checkpoint file until it finishes.
+        """
+        self.load_checkpoint(checkpoint_file)
+        while not self.is_finished():
+            self.step()
+        self.finalise()
+        return self.best_ind
+
+    def execute(self):
+        """
+        Main function of the class, as it runs the rcga algorithm.
+        """
+        self.initialise()
+        if self.ga_mode == 'steady_state':
+            self.Pop = self.__execute_steady_state(self.Pop, self.evaluator, self.cache)
+        else:
+            while not self.is_finished():
+                self.step()
+        self.finalise()
         return self.best_ind
 
 #----------------------------------------------------------------------------------------
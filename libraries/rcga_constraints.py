@@ -0,0 +1,153 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Constraints checked on the new individuals before the model is called, set in the Constraints section of the inputs.
+# They are meant for cheap checks (geometry, budget) that reject designs before an expensive evaluation:
+#   - constraints:          expressions over the variables names, e.g. 'x1 + x2 <= 100', evaluated with numpy on the
+#                           columns of all the new solutions at once. Combine conditions with & and |, not and/or.
+#                           numpy is available as np, along with sqrt, exp, log, sin, cos, tan, abs, minimum, maximum
+#                           and pi
+#   - constraint_functions: names of functions registered as 'constraint' (or defined in model/models.py) that
+#                           receive the same dictionary {variable name: column of values} and return a vector
+# A constraint returning booleans is satisfied where True. A constraint returning numbers is written g <= 0: it is
+# satisfied where g <= 0 and violated by g otherwise. Enumerate variables are given by their values.
+# Infeasible individuals are never sent to the model. How they are handled is set by infeasible_handling:
+#   - penalty:  they take the fitness penalty + total violation (negated when maximising), worse than any feasible one
+#   - repair:   they are moved along the segment towards a feasible individual of the current population drawn at
+#               random, to the feasible point closest to them found by repair_steps bisection steps
+#   - resample: they are replaced by new individuals (new offspring of the mating pool, or new random ones for the
+#               initial population), up to max_resamples times
+# Those still infeasible after a repair or resample take the penalty. In the multi-objective mode they are ranked last,
+# like failed evaluations. The numbers of infeasible individuals skipped, repaired and resampled are written to the
+# statistics, apart from the failed evaluations.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+HANDLINGS = ['penalty', 'repair', 'resample']
+
+# Names available to the constraint expressions besides the variables
+EXPRESSION_NAMES = {'np': np, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'sin': np.sin, 'cos': np.cos,
+                    'tan': np.tan, 'abs': np.abs, 'minimum': np.minimum, 'maximum': np.maximum, 'pi': np.pi}
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def create_constraints(params, search_space, functions):
+    """
+    Function that creates the constraints set in the constraint parameters, with the constraint functions already
+    resolved, or returns None if there are none.
+    """
+    constraint_params = params.get('constraint_params', {})
+    expressions = constraint_params.get('constraints', None) or []
+    if len(expressions) == 0 and len(functions) == 0:
+        return None
+    return Constraints(search_space, expressions, functions,
+                       handling=constraint_params.get('infeasible_handling', 'penalty'),
+                       penalty=constraint_params.get('penalty', 1e10),
+                       max_resamples=constraint_params.get('max_resamples', 10),
+                       repair_steps=constraint_params.get('repair_steps', 10))
+
+
+def to_violations(result, n_solutions):
+    """
+    Function that converts the output of a constraint into a vector of violations (0 where it is satisfied).
+    """
+    result = np.broadcast_to(np.asarray(result), (n_solutions,))
+    if result.dtype == bool:
+        return (~result).astype(float)
+    return np.maximum(result.astype(float), 0.0)
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Constraints(object):
+    """ Checks the constraints of a search space on batches of encoded solutions """
+    def __init__(self, search_space, expressions, functions, handling='penalty', penalty=1e10, max_resamples=10,
+                 repair_steps=10):
+        if handling not in HANDLINGS:
+            raise ValueError("Unknown infeasible handling {}".format(handling))
+        self.search_space = search_space
+        self.expressions = list(expressions)
+        self.compiled = [compile(expression, '<constraint>', 'eval') for expression in self.expressions]
+        for expression, code in zip(self.expressions, self.compiled):
+            unknown = [name for name in code.co_names
+                       if name not in search_space.get_variables_names() and name not in EXPRESSION_NAMES]
+            if unknown:
+                raise ValueError("Constraint {} uses unknown names {}".format(expression, ', '.join(unknown)))
+        self.functions = list(functions)
+        self.handling = handling
+        self.penalty = penalty
+        self.max_resamples = max_resamples
+        self.repair_steps = repair_steps
+
+    def get_violations(self, solutions):
+        """
+        Function that returns the total violation of the constraints by each row of a 2-D array of encoded solutions
+        (0 for feasible solutions).
+        """
+        n_solutions = len(solutions)
+        violations = np.zeros(n_solutions)
+        if n_solutions == 0:
+            return violations
+        columns = self.search_space.get_variables_columns(solutions)
+        names = dict(EXPRESSION_NAMES, **columns)
+        for code in self.compiled:
+            violations += to_violations(eval(code, {'__builtins__': {}}, names), n_solutions)
+        for function in self.functions:
+            violations += to_violations(function(columns), n_solutions)
+        return violations
+
+    def get_penalty_fitness(self, violations, reverse=False):
+        """
+        Function that returns the fitness given to infeasible solutions: the penalty plus their violation, negated when
+        maximising.
+        """
+        fitness = self.penalty + violations
+        return -fitness if reverse else fitness
+
+    def repair(self, solutions, references, rng):
+        """
+        Function that moves each infeasible solution towards a feasible reference drawn at random by rng, to the
+        feasible point closest to it found by bisection on the segment between them. The points are brought within
+        the search space before being checked. Returns the repaired solutions and a mask of those now feasible. The
+        solutions for which no feasible point is found are returned unchanged, with a False mask.
+        """
+        solutions = np.array(solutions, dtype=float)
+        if len(solutions) == 0 or len(references) == 0:
+            return solutions, np.zeros(len(solutions), dtype=bool)
+        start = references[rng.integers(len(references), size=len(solutions))]
+        direction = solutions - start
+        low = np.zeros(len(solutions))
+        high = np.ones(len(solutions))
+        repaired = solutions.copy()
+        found = np.zeros(len(solutions), dtype=bool)
+        for step in range(self.repair_steps):
+            t = (low + high) / 2
+            candidates = self.search_space.repair_solutions(start + t[:, np.newaxis]*direction)
+            feasible = self.get_violations(candidates) == 0
+            repaired[feasible] = candidates[feasible]
+            found |= feasible
+            low = np.where(feasible, t, low)
+            high = np.where(feasible, high, t)
+        return repaired, found
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,511 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Evaluators decide where the model calls of Population.evaluate_population run. They all take a model and either a
+# list of solution dictionaries or a 2-D array of encoded solutions (batch models), and return a fitness vector aligned
+# with the solutions given, with NaN for failed evaluations. Models that return a vector of objectives (multi-objective
+# mode, see rcga_multiobjective.py) give a 2-D array instead, with one row per solution and one column per objective.
+# Pool evaluators split the solutions in chunks, submit one job per chunk and place each result back at the position of
+# its chunk, so the order in which jobs finish does not matter.
+# Models defined with 'async def' (e.g. thin clients of a simulation daemon) are run by the asyncio evaluator, which
+# keeps up to max_concurrency calls in flight from a single thread. Calls that exceed evaluation_timeout fail.
+# When profiling is on, evaluate also appends the latency of each model call to the latencies list it is given.
+# Models that use the python or numpy global random generators get reproducible draws in the serial and process
+# evaluators: before each chunk, those generators are seeded from the evaluation stream of the run, in the order in
+# which the chunks are submitted, so the draws do not depend on which worker runs which chunk. Thread and asyncio
+# evaluators share the global generators between concurrent calls and cannot make them reproducible.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import asyncio
+import inspect
+import math
+import os
+import random as rand
+import time
+import collections
+import concurrent.futures as cf
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def is_batch_model(model):
+    """
+    Function that determines whether a model evaluates a whole 2-D array of solutions at once. Such models are flagged
+    with the attribute batch_evaluation = True (see model/models.py).
+    """
+    return getattr(model, 'batch_evaluation', False)
+
+
+def is_failed_fitness(fitness):
+    """
+    Function that determines whether a fitness value corresponds to a failed evaluation (None or NaN).
+    """
+    return fitness is None or (np.ndim(fitness) == 0 and fitness != fitness)
+
+
+def evaluate_batch(model, solutions):
+    """
+    Function that evaluates a batch model on a 2-D array of encoded solutions and returns a fitness vector, with NaN
+    for failed evaluations.
+    """
+    return to_fitness_vector(model(solutions), len(solutions))
+
+
+def to_fitness_vector(fitness, n_solutions):
+    """
+    Function that converts the output of a batch model into a fitness vector (or a 2-D array of objectives) and checks
+    its length.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    if fitness.ndim < 2:
+        fitness = fitness.reshape(-1)
+    if fitness.shape[0] != n_solutions:
+        raise ValueError("Batch model returned {} fitness values for {} solutions".format(fitness.shape[0], n_solutions))
+    return fitness
+
+
+def to_fitness_array(fitness):
+    """
+    Function that converts the outputs of a model called once per solution into a fitness vector, or into a 2-D array
+    (solution x objective) if any of them is a vector of objectives. Failed evaluations give NaN (a row of NaN).
+    """
+    if all(np.ndim(f) == 0 for f in fitness):
+        return np.array([np.nan if is_failed_fitness(f) else f for f in fitness], dtype=float)
+    n_objectives = max(np.size(f) for f in fitness if np.ndim(f) > 0)
+    rows = np.full((len(fitness), n_objectives), np.nan)
+    for i, f in enumerate(fitness):
+        if not is_failed_fitness(f):
+            rows[i] = f
+    return rows
+
+
+def concatenate_fitness(chunks):
+    """
+    Function that concatenates the fitness of consecutive chunks of solutions. If some chunks hold objective vectors,
+    the vectors of the other chunks (failed chunks, all NaN) are broadcast to the same number of objectives.
+    """
+    if len(chunks) == 0:
+        return np.empty(0)
+    n_objectives = max(chunk.shape[1] if chunk.ndim == 2 else 0 for chunk in chunks)
+    if n_objectives == 0:
+        return np.concatenate(chunks)
+    return np.concatenate([chunk if chunk.ndim == 2 else np.repeat(chunk[:, np.newaxis], n_objectives, axis=1)
+                           for chunk in chunks])
+
+
+def evaluate_solutions(model, solutions, latencies=None):
+    """
+    Function that evaluates a model once per solution dictionary and returns a fitness vector, with NaN for failed
+    evaluations. If a latencies list is given, the duration of each call is appended to it.
+    """
+    if latencies is None:
+        fitness = [model(solution) for solution in solutions]
+    else:
+        fitness = []
+        for solution in solutions:
+            t0 = time.perf_counter()
+            fitness.append(model(solution))
+            latencies.append(time.perf_counter() - t0)
+    return to_fitness_array(fitness)
+
+
+def seed_global_rngs(seed):
+    """
+    Function that seeds the python and numpy global random generators, for models that use them.
+    """
+    rand.seed(seed)
+    np.random.seed(seed)
+    return 0
+
+
+def evaluate_chunk(model, solutions, seed=None):
+    """
+    Function that evaluates a chunk of solutions with the protocol of the model. It is the job submitted to the pools.
+    If a seed is given, the global random generators are seeded with it first.
+    """
+    if seed is not None:
+        seed_global_rngs(seed)
+    if is_batch_model(model):
+        return evaluate_batch(model, solutions)
+    else:
+        return evaluate_solutions(model, solutions)
+
+
+def evaluate_chunk_timed(model, solutions, seed=None):
+    """
+    Function that evaluates a chunk of solutions like evaluate_chunk and also returns the latencies of the model calls
+    (one per solution, or a single one for batch models).
+    """
+    if seed is not None:
+        seed_global_rngs(seed)
+    latencies = []
+    if is_batch_model(model):
+        t0 = time.perf_counter()
+        fitness = evaluate_batch(model, solutions)
+        latencies.append(time.perf_counter() - t0)
+    else:
+        fitness = evaluate_solutions(model, solutions, latencies=latencies)
+    return fitness, latencies
+
+
+def is_coroutine_model(model):
+    """
+    Function that determines whether a model is a coroutine function (defined with async def).
+    """
+    return inspect.iscoroutinefunction(model)
+
+
+def create_evaluator(params, model=None, rng=None):
+    """
+    Function that creates the evaluator set in the main parameters (evaluation_executor, n_workers, chunk_size,
+    max_concurrency, evaluation_timeout). Coroutine models are run by the asyncio evaluator unless another executor is
+    explicitly set, which is an error. The numpy Generator rng, if given, seeds the global random generators of the
+    serial and process evaluators before each chunk.
+    """
+    executor = params.get('evaluation_executor', 'serial')
+    n_workers = params.get('n_workers', None)
+    chunk_size = params.get('chunk_size', None)
+    if is_coroutine_model(model):
+        if executor not in ['serial', 'asyncio']:
+            raise ValueError("Model {} is a coroutine and can only be evaluated with the asyncio executor".format(model.__name__))
+        executor = 'asyncio'
+    if executor == 'serial':
+        return Serial_evaluator(rng=rng)
+    elif executor == 'asyncio':
+        return Asyncio_evaluator(max_concurrency=params.get('max_concurrency', 0), timeout=params.get('evaluation_timeout', 0), chunk_size=chunk_size)
+    elif executor == 'thread':
+        return Thread_pool_evaluator(n_workers=n_workers, chunk_size=chunk_size)
+    elif executor == 'process':
+        return Process_pool_evaluator(n_workers=n_workers, chunk_size=chunk_size, rng=rng)
+    else:
+        raise ValueError("Unknown evaluation executor {}".format(executor))
+
+
+def get_chunk_seed(rng):
+    """
+    Function that draws the seed of the next chunk from a numpy Generator (None if there is none).
+    """
+    if rng is None:
+        return None
+    return int(rng.integers(2**32))
+
+
+def get_solution_keys(solutions, decimals):
+    """
+    Function that returns the canonical keys of a 2-D array of encoded solutions rounded to a number of decimals.
+    Adding 0.0 turns -0.0 into 0.0.
+    """
+    quantized = np.round(np.asarray(solutions, dtype=float), decimals) + 0.0
+    return [row.tobytes() for row in quantized]
+
+
+def create_deduplicator(params):
+    """
+    Function that creates the offspring deduplicator set in the main parameters (deduplication,
+    deduplication_decimals, deduplication_max_retries). Returns None if deduplication is off ('none').
+    """
+    mode = params.get('deduplication', 'none')
+    if mode == 'none':
+        return None
+    return Deduplicator(mode, decimals=params.get('deduplication_decimals', 8),
+                        max_retries=params.get('deduplication_max_retries', 3))
+
+
+def create_fitness_cache(params):
+    """
+    Function that creates the fitness cache set in the main parameters (fitness_cache_size, fitness_cache_decimals).
+    Returns None if the cache is disabled (size 0).
+    """
+    max_size = params.get('fitness_cache_size', 0)
+    if not max_size:
+        return None
+    return Fitness_cache(max_size, decimals=params.get('fitness_cache_decimals', 10))
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Fitness_cache(object):
+    """
+    Bounded cache of fitness values keyed on the encoded solutions rounded to a number of decimals. When it is full,
+    the least recently used entry is evicted.
+    """
+    def __init__(self, max_size, decimals=10):
+        self.max_size = max_size
+        self.decimals = decimals
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_size(self):
+        return len(self.entries)
+
+    def get_hits(self):
+        return self.hits
+
+    def get_misses(self):
+        return self.misses
+
+    def get_keys(self, solutions):
+        return get_solution_keys(solutions, self.decimals)
+
+    def lookup(self, solutions):
+        """
+        Function that returns the cached fitness of each solution, with NaN for the solutions not in the cache.
+        """
+        fitness = np.full(len(solutions), np.nan)
+        for i, key in enumerate(self.get_keys(solutions)):
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                fitness[i] = self.entries[key]
+                self.hits += 1
+            else:
+                self.misses += 1
+        return fitness
+
+    def store(self, solutions, fitness):
+        """
+        Function that stores the fitness of each solution, evicting the least recently used entries if needed.
+        """
+        for key, f in zip(self.get_keys(solutions), fitness):
+            self.entries[key] = f
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return 0
+
+    def get_state(self):
+        """
+        Function that returns the cache contents as arrays, least recently used first: the keys as rows of bytes, their
+        fitness, and the hits and misses counters.
+        """
+        keys = np.array([np.frombuffer(key, dtype=np.uint8) for key in self.entries.keys()], dtype=np.uint8)
+        fitness = np.array(list(self.entries.values()), dtype=float)
+        return keys, fitness, self.hits, self.misses
+
+    def set_state(self, keys, fitness, hits, misses):
+        """
+        Function that restores the cache contents returned by get_state.
+        """
+        self.entries = collections.OrderedDict((row.tobytes(), float(f)) for row, f in zip(keys, fitness))
+        self.hits = int(hits)
+        self.misses = int(misses)
+        return 0
+
+
+class Deduplicator(object):
+    """
+    Finds the offspring that duplicate a solution of the parent population or an earlier offspring of the same
+    generation, comparing the encoded solutions rounded to a number of decimals. The mode decides what is done with
+    them (see rcga): 'reuse' takes the fitness of the solution they duplicate and 'regenerate' replaces them by new
+    offspring, up to max_retries times, before reusing.
+    """
+    def __init__(self, mode, decimals=8, max_retries=3):
+        if mode not in ['reuse', 'regenerate']:
+            raise ValueError("Unknown deduplication mode {}".format(mode))
+        self.mode = mode
+        self.decimals = decimals
+        self.max_retries = max_retries
+
+    def index_population(self, Pop):
+        """
+        Function that returns a dictionary from the keys of the evaluated individuals of a population to their fitness.
+        """
+        fitness = Pop.get_fitness_array()
+        evaluated = np.flatnonzero(~np.isnan(fitness))
+        keys = get_solution_keys(Pop.get_solutions_rows(evaluated), self.decimals)
+        return dict(zip(keys, fitness[evaluated]))
+
+    def find_duplicates(self, reference, offspring):
+        """
+        Function that checks the unevaluated individuals of the offspring population against a reference (see
+        index_population) and against each other. Returns the indices of the offspring found in the reference, their
+        fitness there, and the pairs (i, j) of offspring i duplicating an earlier offspring j.
+        """
+        ind_indices = np.asarray(offspring.get_unevaluated_indices(), dtype=int)
+        parent_duplicates = []
+        parent_fitness = []
+        duplicates = []
+        seen = {}
+        for i, key in zip(ind_indices, get_solution_keys(offspring.get_solutions_rows(ind_indices), self.decimals)):
+            if key in reference:
+                parent_duplicates.append(int(i))
+                parent_fitness.append(reference[key])
+            elif key in seen:
+                duplicates.append((int(i), seen[key]))
+            else:
+                seen[key] = int(i)
+        return parent_duplicates, parent_fitness, duplicates
+
+
+class Serial_evaluator(object):
+    """ Evaluates the solutions one after the other in the current process """
+    def __init__(self, rng=None):
+        self.rng = rng
+
+    def get_n_workers(self):
+        return 1
+
+    def evaluate(self, model, solutions, latencies=None):
+        seed = get_chunk_seed(self.rng)
+        if latencies is None:
+            return evaluate_chunk(model, solutions, seed=seed)
+        fitness, chunk_latencies = evaluate_chunk_timed(model, solutions, seed=seed)
+        latencies.extend(chunk_latencies)
+        return fitness
+
+    def submit(self, model, solutions):
+        """
+        Function that evaluates the solutions and returns the fitness vector wrapped in a finished future.
+        """
+        job = cf.Future()
+        job.set_result(evaluate_chunk(model, solutions, seed=get_chunk_seed(self.rng)))
+        return job
+
+    def close(self):
+        return 0
+
+
+class Pool_evaluator(object):
+    """
+    Evaluates the solutions in chunks submitted to a concurrent.futures executor. If a numpy Generator rng is given,
+    each chunk is evaluated after seeding the global random generators of its worker.
+    """
+    def __init__(self, executor, n_workers, chunk_size=None, rng=None):
+        self.executor = executor
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.rng = rng
+
+    def get_chunk_size(self, n_solutions):
+        """
+        Function that returns the chunk size. If none is set, it aims at 4 chunks per worker to balance the load.
+        """
+        if self.chunk_size:
+            return self.chunk_size
+        return max(1, math.ceil(n_solutions / (4*self.n_workers)))
+
+    def get_n_workers(self):
+        return self.n_workers
+
+    def submit(self, model, solutions):
+        """
+        Function that submits the evaluation of the solutions as a single job and returns its future.
+        """
+        return self.executor.submit(evaluate_chunk, model, solutions, get_chunk_seed(self.rng))
+
+    def evaluate(self, model, solutions, latencies=None):
+        """
+        Function that evaluates the solutions in chunks and places the results back in order. If a latencies list is
+        given, the durations of the model calls measured in the workers are appended to it.
+        """
+        n_solutions = len(solutions)
+        chunks = {}
+        chunk_size = self.get_chunk_size(n_solutions)
+        job_function = evaluate_chunk if latencies is None else evaluate_chunk_timed
+        jobs = {}
+        for start in range(0, n_solutions, chunk_size):
+            job = self.executor.submit(job_function, model, solutions[start:start+chunk_size], get_chunk_seed(self.rng))
+            jobs[job] = start
+        for job in cf.as_completed(jobs):
+            if latencies is None:
+                chunk_fitness = job.result()
+            else:
+                chunk_fitness, chunk_latencies = job.result()
+                latencies.extend(chunk_latencies)
+            chunks[jobs[job]] = chunk_fitness
+        return concatenate_fitness([chunks[start] for start in sorted(chunks)])
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        return 0
+
+
+class Thread_pool_evaluator(Pool_evaluator):
+    """ Evaluates the solutions in a pool of threads (for models that release the GIL or wait on I/O) """
+    def __init__(self, n_workers=None, chunk_size=None):
+        n_workers = n_workers or os.cpu_count()
+        executor = cf.ThreadPoolExecutor(max_workers=n_workers)
+        Pool_evaluator.__init__(self, executor, n_workers, chunk_size=chunk_size)
+
+
+class Process_pool_evaluator(Pool_evaluator):
+    """ Evaluates the solutions in a pool of processes. The model must be a module-level function """
+    def __init__(self, n_workers=None, chunk_size=None, rng=None):
+        n_workers = n_workers or os.cpu_count()
+        executor = cf.ProcessPoolExecutor(max_workers=n_workers)
+        Pool_evaluator.__init__(self, executor, n_workers, chunk_size=chunk_size, rng=rng)
+
+
+class Asyncio_evaluator(object):
+    """
+    Evaluates coroutine models in an asyncio event loop, with at most max_concurrency calls in flight (0 for no limit)
+    and a timeout per call in seconds (0 for none). Calls that time out count as failed evaluations. Batch models are
+    awaited once per chunk of solutions.
+    """
+    def __init__(self, max_concurrency=0, timeout=0, chunk_size=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.loop = asyncio.new_event_loop()
+
+    async def __evaluate_one(self, semaphore, model, solutions, latencies):
+        """
+        Internal coroutine that awaits the model on one solution (or one chunk for batch models).
+        """
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                if self.timeout:
+                    fitness = await asyncio.wait_for(model(solutions), self.timeout)
+                else:
+                    fitness = await model(solutions)
+            except asyncio.TimeoutError:
+                fitness = None
+            if latencies is not None:
+                latencies.append(time.perf_counter() - t0)
+        if is_batch_model(model):
+            if fitness is None:
+                return np.full(len(solutions), np.nan)
+            return to_fitness_vector(fitness, len(solutions))
+        return np.nan if is_failed_fitness(fitness) else fitness
+
+    async def __evaluate_all(self, model, solutions, latencies):
+        max_concurrency = self.max_concurrency or max(1, len(solutions))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        if is_batch_model(model):
+            chunk_size = self.chunk_size or max(1, math.ceil(len(solutions) / max_concurrency))
+            chunks = [solutions[start:start+chunk_size] for start in range(0, len(solutions), chunk_size)]
+            results = await asyncio.gather(*[self.__evaluate_one(semaphore, model, chunk, latencies) for chunk in chunks])
+            return concatenate_fitness(results)
+        results = await asyncio.gather(*[self.__evaluate_one(semaphore, model, solution, latencies) for solution in solutions])
+        return to_fitness_array(results)
+
+    def evaluate(self, model, solutions, latencies=None):
+        if not is_coroutine_model(model):
+            if latencies is None:
+                return evaluate_chunk(model, solutions)
+            fitness, chunk_latencies = evaluate_chunk_timed(model, solutions)
+            latencies.extend(chunk_latencies)
+            return fitness
+        return self.loop.run_until_complete(self.__evaluate_all(model, solutions, latencies))
+
+    def close(self):
+        self.loop.close()
+        return 0
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,220 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Island model: n_islands independent rcga populations, each one in its own process and with its own seed, spawned
+# from the run seed so that the random streams of the islands are independent. Every
+# migration_interval generations each island sends the encoded solutions and fitness of its n_migrants best
+# individuals to the coordinator, which routes them to the neighbouring islands given by the topology:
+#   - ring:            island i sends to island i+1
+#   - fully_connected: every island sends to all the others
+#   - random:          every island sends to another island drawn at random at each migration
+# Migrants replace the worst individuals of the receiving island, unless they are worse.
+# The stopping rules (see rcga_termination) are checked by the coordinator after each migration, on the global best
+# fitness and the total number of evaluations (the diversity rule is not checked). It sends the islands a stop flag
+# along with their migrants.
+# The islands do not write any output: the coordinator writes the global best of each migration epoch, and the global
+# and per-island statistics, with the configured results backend.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import copy
+import multiprocessing
+import numpy as np
+import rcga_classes
+import rcga_results
+import rcga_termination
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_seed_sequences(seed, n_islands):
+    """
+    Function that spawns the seed sequences of the islands, followed by the one of the coordinator.
+    """
+    return np.random.SeedSequence(seed).spawn(n_islands + 1)
+
+
+def get_island_params(params, island_index):
+    """
+    Function that returns the parameters of an island: its own seed and no output.
+    """
+    island_params = copy.deepcopy(params)
+    seed_sequence = get_seed_sequences(params['seed'], params['island_params']['n_islands'])[island_index]
+    island_params['seed'] = int(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+    island_params['results_backend'] = 'none'
+    island_params['write_to_console'] = False
+    island_params['checkpoint_every_generations'] = 0
+    island_params['checkpoint_every_seconds'] = 0
+    island_params['termination_params'] = {}
+    return island_params
+
+
+def get_destinations(topology, n_islands, island_index, rng):
+    """
+    Function that returns the indices of the islands that receive the migrants of a given island.
+    """
+    if n_islands < 2:
+        return []
+    if topology == 'ring':
+        return [(island_index + 1) % n_islands]
+    elif topology == 'fully_connected':
+        return [j for j in range(n_islands) if j != island_index]
+    elif topology == 'random':
+        j = int(rng.integers(n_islands - 1))
+        return [j if j < island_index else j + 1]
+    else:
+        raise ValueError("Unknown island topology {}".format(topology))
+
+
+def run_island(search_space, params, island_index, conn):
+    """
+    Function run in each island process. It evolves the population for migration_interval generations, sends its best
+    individuals, waits for the migrants of the other islands and inserts them, until the coordinator stops it.
+    """
+    island_params = params['island_params']
+    ga = rcga_classes.rcga(search_space, get_island_params(params, island_index))
+    ga.initialise()
+    stop = False
+    while not stop:
+        for g in range(island_params['migration_interval']):
+            if not ga.is_finished():
+                ga.step()
+        solutions, fitness = ga.get_migrants(island_params['n_migrants'])
+        conn.send((ga.N_gen, solutions, fitness, dict(ga.statistics)))
+        migrants, stop = conn.recv()
+        for solutions, fitness in migrants:
+            ga.insert_migrants(solutions, fitness)
+    ga.finalise()
+    best_solution, best_fitness = ga.get_migrants(1)
+    conn.send((ga.N_gen, best_solution, best_fitness, dict(ga.statistics)))
+    conn.close()
+    return 0
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Island_model(object):
+    """ Runs several rcga populations in separate processes, with periodic migration between them """
+    def __init__(self, search_space, params):
+        self.search_space_dic = search_space
+        self.search_space = rcga_classes.Search_space(search_space)
+        self.params = params
+        self.island_params = params['island_params']
+        self.n_islands = self.island_params['n_islands']
+        self.topology = self.island_params['topology']
+        self.opt_type = params['opt_type']
+        self.N_gen = 0
+        self.best_solution = None
+        self.best_fitness = None
+        self.statistics = {}
+        self.termination = rcga_termination.Termination(params)
+        if params.get('ga_mode', 'generational') != 'generational':
+            raise ValueError("The island model only supports the generational ga mode")
+        if params.get('objectives', None):
+            raise ValueError("The island model does not support the multi-objective mode")
+        if self.topology not in ['ring', 'fully_connected', 'random']:
+            raise ValueError("Unknown island topology {}".format(self.topology))
+
+    def __update_best(self, solutions, fitness):
+        """
+        Internal function that updates the global best with the best individuals received from the islands.
+        """
+        for solution, f in zip(solutions, fitness):
+            if np.isnan(f):
+                continue
+            if self.best_fitness is None or (f > self.best_fitness if self.opt_type == 'max' else f < self.best_fitness):
+                self.best_fitness = float(f)
+                self.best_solution = self.search_space.decode_solution(solution)
+        return 0
+
+    def __update_statistics(self, islands_statistics):
+        """
+        Internal function that aggregates the statistics of the islands.
+        """
+        self.statistics['N_evals'] = sum(st['N_evals'] for st in islands_statistics)
+        self.statistics['N_failed_evals'] = sum(st['N_failed_evals'] for st in islands_statistics)
+        for i, st in enumerate(islands_statistics):
+            self.statistics['Island {}'.format(i)] = st
+        return 0
+
+    def __write_generation(self, results_writer):
+        results_writer.write_generation(self.N_gen, self.best_fitness, self.best_solution)
+        if self.params['write_to_console']:
+            print("\t{}\t{}".format(self.N_gen, self.best_fitness))
+        return 0
+
+    def execute(self):
+        """
+        Main function of the class, as it runs the islands and routes the migrants between them.
+        Returns the global best solution and fitness.
+        """
+        rng = np.random.default_rng(get_seed_sequences(self.params['seed'], self.n_islands)[-1])
+        results_writer = rcga_results.create_results_writer(self.params, self.search_space)
+        results_writer.open()
+        results_writer.write_parameters(self.params)
+        if self.params['write_to_console']:
+            print("\nGen.\tFitness")
+
+        # Start the islands
+        conns = []
+        processes = []
+        for i in range(self.n_islands):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_island, args=(self.search_space_dic, self.params, i, child_conn))
+            process.start()
+            conns.append(parent_conn)
+            processes.append(process)
+
+        # Route the migrants until a stopping rule is met
+        islands_statistics = [None]*self.n_islands
+        termination_reason = None
+        while termination_reason is None:
+            messages = [conn.recv() for conn in conns]
+            incoming = [[] for i in range(self.n_islands)]
+            for i, (N_gen, solutions, fitness, statistics) in enumerate(messages):
+                self.__update_best(solutions, fitness)
+                islands_statistics[i] = statistics
+                for j in get_destinations(self.topology, self.n_islands, i, rng):
+                    incoming[j].append((solutions, fitness))
+            self.N_gen = messages[0][0]
+            termination_reason = self.termination.update(self.N_gen, self.best_fitness,
+                                                         sum(st['N_evals'] for st in islands_statistics))
+            for i, conn in enumerate(conns):
+                conn.send((incoming[i], termination_reason is not None))
+            self.__write_generation(results_writer)
+
+        # Collect the final results
+        for i, conn in enumerate(conns):
+            N_gen, solutions, fitness, statistics = conn.recv()
+            self.__update_best(solutions, fitness)
+            islands_statistics[i] = statistics
+            islands_statistics[i]['best_fitness'] = float(fitness[0]) if len(fitness) else None
+        for process in processes:
+            process.join()
+        self.__update_statistics(islands_statistics)
+        self.statistics['termination_reason'] = termination_reason
+
+        # Write optimal results and statistics
+        results_writer.write_optimal_point(self.best_solution)
+        results_writer.write_statistics(self.statistics)
+        results_writer.close()
+        if self.params['write_to_console']:
+            print("\nOptimal point:")
+            for v in self.search_space.get_variables_names():
+                print('{}: {}'.format(v, self.best_solution[v]))
+        return self.best_solution, self.best_fitness
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,220 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Multi-objective mode (NSGA-II), switched on by listing the sense of each objective in the objectives main parameter
+# (e.g. [min, max]). The model then returns a vector of objectives per solution (a 2-D array for batch models).
+# Each generation the offspring are merged with the current population and the next population is made of the best
+# population_size individuals by non-domination rank, then by crowding distance within a rank (see rcga.step).
+# The rank and crowding distance are folded into a single score, minimised, that is stored as the fitness of the
+# individuals, so the selection operators (e.g. tournament) compare individuals with the crowded-comparison operator
+# of NSGA-II without knowing about objectives:
+#   score = rank + 1 / (2 + crowding distance)
+# The non-dominated sort assigns each solution to the first front none of whose members dominates it, visiting the
+# solutions in lexicographic order (no solution can be dominated by a later one) and looking for the front by binary
+# search (ENS-BS). With two objectives a front only needs its smallest second objective and the sort is O(N log N);
+# with more objectives each check compares the solution to the members of a front at once. Identical objective
+# vectors are sorted once. The crowding distance of all the fronts is computed at once, one objective at a time.
+# Solutions with a NaN or infinite objective (failed evaluations) come last, in a front of their own.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import bisect
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def create_multi_objective(params):
+    """
+    Function that creates the multi-objective mode set in the objectives main parameter, or returns None if the run is
+    single-objective (no objectives listed).
+    """
+    senses = params.get('objectives', None) or []
+    if len(senses) == 0:
+        return None
+    return Multi_objective(senses)
+
+
+def sort_two_objectives(F):
+    """
+    Function that returns the front of each row of a 2-column array of unique rows in lexicographic order (minimised).
+    A front dominates a solution if its smallest second objective is not larger than the solution's.
+    """
+    ranks = np.empty(len(F), dtype=int)
+    front_min = []
+    for i, f2 in enumerate(F[:, 1].tolist()):
+        k = bisect.bisect_right(front_min, f2)
+        if k == len(front_min):
+            front_min.append(f2)
+        else:
+            front_min[k] = f2
+        ranks[i] = k
+    return ranks
+
+
+def sort_many_objectives(F):
+    """
+    Function that returns the front of each row of an array of unique rows in lexicographic order (minimised), for any
+    number of objectives. The members of each front are kept in a growing array (objective x member) compared at once
+    to each solution. The first objective is not compared: it is never smaller than the members' in that order.
+    """
+    n, m = F.shape
+    ranks = np.empty(n, dtype=int)
+    members = []
+    sizes = []
+    for i in range(n):
+        f = F[i]
+        lo, hi = 0, len(members)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            size = sizes[mid]
+            # The rows are unique, so a member not larger in every objective dominates f
+            dominated = members[mid][1, :size] <= f[1]
+            for j in range(2, m):
+                dominated &= members[mid][j, :size] <= f[j]
+            if dominated.any():
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(members):
+            members.append(np.empty((m, 16)))
+            sizes.append(0)
+        if sizes[lo] == members[lo].shape[1]:
+            members[lo] = np.concatenate([members[lo], np.empty_like(members[lo])], axis=1)
+        members[lo][:, sizes[lo]] = f
+        sizes[lo] += 1
+        ranks[i] = lo
+    return ranks
+
+
+def non_dominated_sort(F):
+    """
+    Function that returns the non-domination rank (0 for the Pareto front) of each row of a 2-D array of objectives,
+    all minimised and finite.
+    """
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.empty(0, dtype=int)
+    unique, inverse = np.unique(F, axis=0, return_inverse=True)
+    if F.shape[1] == 1:
+        unique_ranks = np.arange(len(unique))
+    elif F.shape[1] == 2:
+        unique_ranks = sort_two_objectives(unique)
+    else:
+        unique_ranks = sort_many_objectives(unique)
+    return unique_ranks[inverse.reshape(-1)]
+
+
+def crowding_distance(F, ranks):
+    """
+    Function that returns the crowding distance of each row of a 2-D array of objectives within its front: the sum
+    over the objectives of the gap between its neighbours, divided by the range of the front. The extremes of each
+    front get an infinite distance.
+    """
+    n, m = F.shape
+    crowding = np.zeros(n)
+    if n == 0:
+        return crowding
+    for j in range(m):
+        order = np.lexsort((F[:, j], ranks))
+        r = ranks[order]
+        values = F[order, j]
+        first = np.concatenate([[True], r[1:] != r[:-1]])
+        last = np.concatenate([r[1:] != r[:-1], [True]])
+        segments = np.cumsum(first) - 1
+        span = (values[last] - values[first])[segments]
+        distance = np.zeros(n)
+        interior = np.flatnonzero(~first & ~last & (span > 0))
+        distance[interior] = (values[interior + 1] - values[interior - 1]) / span[interior]
+        distance[first | last] = np.inf
+        crowding[order] += distance
+    return crowding
+
+
+def get_scores(ranks, crowding):
+    """
+    Function that folds the rank and the crowding distance into a single score to minimise: lower ranks first, then
+    larger crowding distances within a rank.
+    """
+    return ranks + 1.0 / (2.0 + crowding)
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Multi_objective(object):
+    """ Ranks vectors of objectives with the non-dominated sort and crowding distance of NSGA-II """
+    def __init__(self, senses):
+        for sense in senses:
+            if sense not in ['min', 'max']:
+                raise ValueError("Unknown objective sense {}".format(sense))
+        self.senses = list(senses)
+        self.signs = np.array([1.0 if sense == 'min' else -1.0 for sense in senses])
+
+    def get_number_objectives(self):
+        return len(self.senses)
+
+    def to_objectives_array(self, objectives):
+        """
+        Function that checks that an evaluation returned one objective per sense and returns it as a 2-D array.
+        """
+        objectives = np.asarray(objectives, dtype=float)
+        if objectives.ndim == 1:
+            if len(self.senses) > 1 and not np.all(np.isnan(objectives)):
+                raise ValueError("Model returned a single objective instead of {}".format(len(self.senses)))
+            # Single objective, or failed evaluations only
+            objectives = np.repeat(objectives[:, np.newaxis], len(self.senses), axis=1)
+        if objectives.shape[1] != len(self.senses):
+            raise ValueError("Model returned {} objectives instead of {}".format(objectives.shape[1], len(self.senses)))
+        return objectives
+
+    def rank(self, objectives):
+        """
+        Function that returns the non-domination rank and the crowding distance of each row of a 2-D array of
+        objectives. Rows with a NaN or infinite objective get the last rank and no crowding distance.
+        """
+        F = np.asarray(objectives, dtype=float) * self.signs
+        ok = np.all(np.isfinite(F), axis=1)
+        ranks = np.zeros(len(F), dtype=int)
+        crowding = np.zeros(len(F))
+        if ok.any():
+            ranks[ok] = non_dominated_sort(F[ok])
+            crowding[ok] = crowding_distance(F[ok], ranks[ok])
+            ranks[~ok] = ranks[ok].max() + 1
+        return ranks, crowding
+
+    def get_scores(self, objectives):
+        """
+        Function that returns the score (see get_scores) of each row of a 2-D array of objectives.
+        """
+        return get_scores(*self.rank(objectives))
+
+    def select(self, objectives, n_selected):
+        """
+        Function that returns the indices of the n_selected best rows of a 2-D array of objectives, by rank and then
+        by crowding distance, and their scores.
+        """
+        ranks, crowding = self.rank(objectives)
+        selected = np.lexsort((-crowding, ranks))[:n_selected]
+        return selected, get_scores(ranks, crowding)[selected]
+
+    def get_front_indices(self, scores, objectives):
+        """
+        Function that returns the indices of the individuals of a population on its Pareto front (rank 0, so a score
+        below 1), given their scores and objectives. Failed evaluations are left out.
+        """
+        return np.flatnonzero((scores < 1) & np.all(np.isfinite(np.asarray(objectives, dtype=float)), axis=1))
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -5,15 +5,75 @@ __email__ = "luis.hmd@gmail.com"
 #----------------------------------------------------------------------------------------
 # Notes
 #----------------------------------------------------------------------------------------
-
+# Selection, crossover and mutation operators draw all their random numbers from the numpy Generator rng they are
+# given. The rcga passes each kind of operator its own stream, spawned from the run seed, which advances from one
+# generation to the next. Called without one, an operator creates a generator from the population seed.
 
 #----------------------------------------------------------------------------------------
 # IMPORTS
 #----------------------------------------------------------------------------------------
 import math
-import random as rand
-import rcga_classes
+import random
+import numpy as np
+from rcga_registry import register
+
+
+
+#----------------------------------------------------------------------------------------
+# AUXILIARY FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_python_rng(rng):
+    """
+    Function that returns a python random.Random seeded from a numpy Generator. Operators that draw one number at a
+    time use it, as it is about ten times faster than drawing scalars from the Generator.
+    """
+    return random.Random(int(rng.integers(2**63)))
+
+
+def sample_without_replacement(rng, n, k, size, max_block_size=10**7):
+    """
+    Function that returns a (size x k) array in which each row holds k distinct indices drawn from range(n).
+    Small samples are drawn with replacement and the duplicates redrawn until there are none left. Samples larger than
+    half of n are the k smallest of n random keys per row, computed in blocks of rows to bound the memory used.
+    """
+    k = min(k, n)
+    if 2*k <= n:
+        samples = rng.integers(0, n, size=(size, k))
+        while k > 1:
+            order = np.argsort(samples, axis=1, kind='stable')
+            sorted_samples = np.take_along_axis(samples, order, axis=1)
+            rows, cols = np.nonzero(sorted_samples[:, 1:] == sorted_samples[:, :-1])
+            if len(rows) == 0:
+                break
+            samples[rows, order[rows, cols+1]] = rng.integers(0, n, size=len(rows))
+        return samples
+    samples = np.empty((size, k), dtype=int)
+    block = max(1, max_block_size // n)
+    for start in range(0, size, block):
+        keys = rng.random((min(block, size-start), n))
+        samples[start:start+block] = np.argpartition(keys, k-1, axis=1)[:, :k]
+    return samples
+
 
+def sample_bernoulli_positions(rng, n, p):
+    """
+    Function that returns, in increasing order, the positions in range(n) at which independent Bernoulli(p) trials
+    succeed. The gaps between successes are drawn from a geometric distribution, so the cost scales with the number of
+    successes rather than with n.
+    """
+    if p <= 0 or n == 0:
+        return np.empty(0, dtype=int)
+    if p >= 1:
+        return np.arange(n)
+    positions = []
+    last = -1
+    while last < n:
+        n_draw = max(16, int(1.1*p*(n - last)) + 16)
+        gaps = rng.geometric(p, size=n_draw)
+        block = last + np.cumsum(gaps)
+        positions.append(block[block < n])
+        last = block[-1]
+    return np.concatenate(positions)
 
 
 #----------------------------------------------------------------------------------------
@@ -21,27 +81,34 @@ import rcga_classes
 #----------------------------------------------------------------------------------------
 
 # Elitism operators
+@register('elitism')
 def elitism(Pop, params, reverse=False):
-    P = Pop.copy()
+    """
+    Returns the indices of the individuals kept in the next generation, best first.
+    """
     elitism_params = params['elitism_params']
-    best_ind_list = []
+    best_ind_indices = []
     if elitism_params['use_elitism']:
         n_best_ind = elitism_params['n_ind_elitism']
-        P.sort_by_fitness(reverse=reverse)
-        ind_list = P.get_individuals()
-        for i in range(n_best_ind):
-            best_ind_list.append(ind_list[i])
-    return best_ind_list
+        best_ind_indices = list(Pop.get_best_indices(n_best_ind, reverse=reverse))
+    return best_ind_indices
 
 
 # Selection operators
-def tournament(Pop, params):
-    rand.seed(a=Pop.get_seed())
+@register('selection')
+def tournament(Pop, params, rng=None):
+    """
+    Tournament selection in which the tournaments are run one at a time. Candidates are distinct within a tournament.
+    Individuals without fitness (failed evaluations) always lose, unless all the candidates are without fitness.
+    """
+    if rng is None:
+        rng = np.random.default_rng(Pop.get_seed())
+    py_rng = get_python_rng(rng)
     opt_type = params['opt_type']
     n_ind_tournament = params['selection_params']['n_ind_tournament']
     mp_fraction = params['selection_params']['mating_pool_fraction']
     mp_size = math.floor( mp_fraction*Pop.get_size() )
-    mp = rcga_classes.Population(Pop.get_search_space(), seed=Pop.get_seed())
+    mp = Pop.empty_copy()
 
     # Fill in the mating pool
     for m in range(mp_size):
@@ -54,13 +121,17 @@ def tournament(Pop, params):
 
         # Run a tournament
         for i in range(n_ind_tournament):
-            ind_index = math.floor( rand.random()*Pop.get_size())
+            ind_index = math.floor( py_rng.random()*Pop.get_size())
             # Make sure individual is not in the candidates for this tournament
             while ind_index in candidates:
-                ind_index = math.floor(rand.random() * Pop.get_size())
+                ind_index = math.floor(py_rng.random() * Pop.get_size())
 
             candidates.append(ind_index)
             ind_fitness = Pop.get_individual(ind_index).get_fitness()
+            if ind_fitness is None or math.isnan(ind_fitness):
+                if best_ind_index is None:
+                    best_ind_index = ind_index
+                continue
 
             # Update best
             if opt_type == 'max' and ind_fitness > best_fitness:
@@ -72,33 +143,70 @@ def tournament(Pop, params):
 
         # Insert winner in mating pool
         ind = Pop.get_individual(best_ind_index)
-        mp.insert_individual(ind.get_solution(), fitness=best_fitness)
+        mp.insert_individual(ind.get_solution(), fitness=ind.get_fitness())
 
     return mp
 
+@register('selection')
+def vectorized_tournament(Pop, params, rng=None):
+    """
+    Tournament selection in which all the tournaments are drawn at once. Candidates are distinct within a tournament.
+    With p_tournament < 1 the tournament is stochastic: the best candidate wins with probability p_tournament, the second
+    best with p_tournament*(1-p_tournament), and so on. Individuals without fitness always lose.
+    """
+    if rng is None:
+        rng = np.random.default_rng(Pop.get_seed())
+    n_ind_tournament = params['selection_params']['n_ind_tournament']
+    mp_fraction = params['selection_params']['mating_pool_fraction']
+    p_tournament = params['selection_params'].get('p_tournament', 1.0)
+    mp_size = math.floor( mp_fraction*Pop.get_size() )
+
+    # Draw all tournaments (mating pool x candidates)
+    candidates = sample_without_replacement(rng, Pop.get_size(), n_ind_tournament, mp_size)
+    fitness = Pop.get_fitness_array()
+    if params['opt_type'] == 'max':
+        fitness = -fitness
+    candidates_fitness = np.nan_to_num(fitness[candidates], nan=np.inf)
+
+    # Pick winners
+    if p_tournament >= 1.0:
+        winners_col = np.argmin(candidates_fitness, axis=1)
+    else:
+        ranks = np.argsort(candidates_fitness, axis=1, kind='stable')
+        winners_rank = np.minimum(rng.geometric(p_tournament, size=mp_size) - 1, candidates.shape[1] - 1)
+        winners_col = ranks[np.arange(mp_size), winners_rank]
+    winners = candidates[np.arange(mp_size), winners_col]
+
+    return Pop.get_subpopulation(winners)
+
 # Crossover operators
-def blend_xover(mp, params):
-    rand.seed(a=mp.get_seed())
+@register('crossover')
+def blend_xover(mp, params, rng=None):
+    if rng is None:
+        rng = np.random.default_rng(mp.get_seed())
+    py_rng = get_python_rng(rng)
     search_space = mp.get_search_space()
     vars_names = search_space.get_variables_names()
     ALPHA = params['crossover_params']['alpha']
     P_CROSS = params['crossover_params']['p_crossover']
     POP_SIZE = params['population_size']
     MP_SIZE = mp.get_size()
-    pop_crossed = rcga_classes.Population(mp.get_search_space(), seed=mp.get_seed())
+    if MP_SIZE < 2:
+        raise ValueError("Blend crossover needs a mating pool of at least 2 individuals, got {}".format(MP_SIZE))
+    pop_crossed = mp.empty_copy()
 
     # Select parents
     for i in range(0, POP_SIZE, 2):
         parents_index = []
-        r1 = math.floor( rand.random()*MP_SIZE)
+        r1 = math.floor( py_rng.random()*MP_SIZE)
         parents_index.append(r1)
-        r2 = math.floor(rand.random() * MP_SIZE)
+        r2 = math.floor(py_rng.random() * MP_SIZE)
         while r2 in parents_index:
-            r2 = math.floor(rand.random() * MP_SIZE)
+            r2 = math.floor(py_rng.random() * MP_SIZE)
         parents_index.append(r2)
 
         # Apply crossover
-        if rand.random() < P_CROSS:
+        if py_rng.random() < P_CROSS:
             p_solution_1 = mp.get_individual(parents_index[0]).get_solution()
             p_solution_2 = mp.get_individual(parents_index[1]).get_solution()
             c_solution_1 = {}
@@ -111,23 +219,25 @@ def blend_xover(mp, params):
                     gamma = c_max - c_min
                     lower = c_min - gamma*ALPHA
                     upper = c_max + gamma*ALPHA
-                    c_solution_1[v] = lower + rand.random() * (upper - lower)
-                    c_solution_2[v] = lower + rand.random() * (upper - lower)
+                    c_solution_1[v] = lower + py_rng.random() * (upper - lower)
+                    c_solution_2[v] = lower + py_rng.random() * (upper - lower)
                 elif var_type == 'enumerate':
                     values = search_space.get_variable_values(v)
-                    c_max = max(values.index(p_solution_1[v]), values.index(p_solution_2[v]))
-                    c_min = min(values.index(p_solution_1[v]), values.index(p_solution_2[v]))
+                    i_1 = search_space.get_value_index(v, p_solution_1[v])
+                    i_2 = search_space.get_value_index(v, p_solution_2[v])
+                    c_max = max(i_1, i_2)
+                    c_min = min(i_1, i_2)
                     gamma = c_max - c_min
                     lower = c_min - gamma * ALPHA
                     upper = c_max + gamma * ALPHA
-                    c_solution_1[v] = values[min(max(math.floor(lower + rand.random() * (upper - lower)), 0), len(values))]
-                    c_solution_2[v] = values[min(max(math.floor(lower + rand.random() * (upper - lower)), 0), len(values))]
+                    c_solution_1[v] = values[min(max(math.floor(lower + py_rng.random() * (upper - lower)), 0), len(values)-1)]
+                    c_solution_2[v] = values[min(max(math.floor(lower + py_rng.random() * (upper - lower)), 0), len(values)-1)]
                 elif var_type == 'binary':
                     c_max = max(p_solution_1[v], p_solution_2[v])
                     c_min = min(p_solution_1[v], p_solution_2[v])
                     gamma = c_max - c_min
-                    c_solution_1[v] = min(max(c_min + rand.random() * gamma, 0), 1)
-                    c_solution_2[v] = min(max(c_min + rand.random() * gamma, 0), 1)
+                    c_solution_1[v] = min(max(c_min + py_rng.random() * gamma, 0), 1)
+                    c_solution_2[v] = min(max(c_min + py_rng.random() * gamma, 0), 1)
 
             pop_crossed.insert_individual(c_solution_1)
             # Only inser child 2 if there is space in population
@@ -136,25 +246,83 @@ def blend_xover(mp, params):
 
     return pop_crossed
 
+@register('crossover')
+def vectorized_blend_xover(mp, params, rng=None):
+    """
+    Blend-alpha crossover applied to all the parent pairs at once. Each pair gives two children. Pairs that are not
+    crossed (probability 1 - p_crossover) pass copies of the parents, with their fitness, to the next step.
+    Enumerate variables are crossed on the index of their values and binary variables take either parent value.
+    The two parents of a pair are distinct individuals: the mating pool must hold at least two of them.
+    """
+    if rng is None:
+        rng = np.random.default_rng(mp.get_seed())
+    search_space = mp.get_search_space()
+    ALPHA = params['crossover_params']['alpha']
+    P_CROSS = params['crossover_params']['p_crossover']
+    POP_SIZE = params['population_size']
+    MP_SIZE = mp.get_size()
+    if MP_SIZE < 2:
+        raise ValueError("Blend crossover needs a mating pool of at least 2 individuals, got {}".format(MP_SIZE))
+    n_pairs = math.ceil(POP_SIZE / 2)
+
+    # Select parents (two distinct individuals of the mating pool per pair)
+    parents = mp.get_solutions_array()
+    parents_fitness = mp.get_fitness_array()
+    r1 = rng.integers(0, MP_SIZE, size=n_pairs)
+    r2 = (r1 + rng.integers(1, MP_SIZE, size=n_pairs)) % MP_SIZE
+    p_1 = parents[r1]
+    p_2 = parents[r2]
+    crossed = rng.random(n_pairs) < P_CROSS
+
+    # Apply crossover (pair x child x variable)
+    c_min = np.minimum(p_1, p_2)[:, np.newaxis, :]
+    gamma = np.abs(p_1 - p_2)[:, np.newaxis, :]
+    children = rng.random((n_pairs, 2, parents.shape[1]))
+    children *= gamma*(1 + 2*ALPHA)
+    children += c_min - gamma*ALPHA
+    enum_cols = search_space.get_variables_indices(['enumerate'])
+    if len(enum_cols) > 0:
+        n_values = search_space.get_number_values_array()[enum_cols]
+        children[:, :, enum_cols] = np.clip(np.floor(children[:, :, enum_cols]), 0, n_values - 1)
+    bin_cols = search_space.get_variables_indices(['binary'])
+    if len(bin_cols) > 0:
+        r = rng.random((n_pairs, 2, len(bin_cols)))
+        children[:, :, bin_cols] = np.rint(c_min[:, :, bin_cols] + r*gamma[:, :, bin_cols])
+
+    # Pairs not crossed keep the parents
+    children[~crossed, 0, :] = p_1[~crossed]
+    children[~crossed, 1, :] = p_2[~crossed]
+    children_fitness = np.full((n_pairs, 2), np.nan)
+    children_fitness[~crossed, 0] = parents_fitness[r1[~crossed]]
+    children_fitness[~crossed, 1] = parents_fitness[r2[~crossed]]
+
+    pop_crossed = mp.empty_copy()
+    pop_crossed.insert_solutions_array(children.reshape(2*n_pairs, -1)[:POP_SIZE], fitness=children_fitness.reshape(-1)[:POP_SIZE])
+    return pop_crossed
+
 # Mutation operators
-def polynomial_mutation(Pop, params):
-    rand.seed(a=Pop.get_seed())
+@register('mutation')
+def polynomial_mutation(Pop, params, rng=None):
+    if rng is None:
+        rng = np.random.default_rng(Pop.get_seed())
+    py_rng = get_python_rng(rng)
     P_MUT = params['mutation_params']['p_mutation']
     C = params['mutation_params']['distribution_constant']
     search_space = Pop.get_search_space()
     vars_names = search_space.get_variables_names()
-    Pop_new = rcga_classes.Population(Pop.get_search_space(), seed=Pop.get_seed())
+    Pop_new = Pop.empty_copy()
     for i in Pop.get_individuals():
-        solution = i.get_solution()
+        # Mutate a copy, so that the parent solution is left untouched
+        solution = dict(i.get_solution())
         mutation_occurred = False
         for v in vars_names:
-            if rand.random() < P_MUT:
+            if py_rng.random() < P_MUT:
                 mutation_occurred = True
                 # Mutate
                 var_type = search_space.get_variable_type(v)
                 if var_type == 'int' or var_type == 'float':
                     # Generate tau_k
-                    r = rand.random()
+                    r = py_rng.random()
                     if r < 0.5:
                         tau_k = (2.0 * r) ** (1 / (C + 1)) - 1
                     else:
@@ -164,9 +332,9 @@ def polynomial_mutation(Pop, params):
                     solution[v] = solution[v] + (ub - lb)*tau_k
                 elif var_type == 'enumerate':
                     values = search_space.get_variable_values(v)
-                    solution[v] = values[rand.randint(0, len(values)-1)]
+                    solution[v] = values[py_rng.randrange(len(values))]
                 elif var_type == 'binary':
-                    solution[v] = rand.randint(2)
+                    solution[v] = py_rng.randrange(2)
                 else:
                     print("Could not determine type for variable {}".format(v))
                     solution[v] = None
@@ -176,4 +344,43 @@ def polynomial_mutation(Pop, params):
         else:
             Pop_new.insert_individual(solution, fitness=i.get_fitness())
 
-    return Pop_new
\ No newline at end of file
+    return Pop_new
+
+
+@register('mutation')
+def vectorized_polynomial_mutation(Pop, params, rng=None):
+    """
+    Polynomial mutation applied to the whole population at once. Only the positions of the mutated genes are drawn, so
+    the cost scales with the number of mutations. The result is written into a new array, leaving the parents
+    untouched. Enumerate and binary genes are mutated to a random value.
+    """
+    if rng is None:
+        rng = np.random.default_rng(Pop.get_seed())
+    P_MUT = params['mutation_params']['p_mutation']
+    C = params['mutation_params']['distribution_constant']
+    search_space = Pop.get_search_space()
+    solutions = Pop.get_solutions_array()
+    n_ind, n_vars = solutions.shape
+
+    # Draw the mutated genes
+    positions = sample_bernoulli_positions(rng, n_ind*n_vars, P_MUT)
+    rows = positions // n_vars
+    cols = positions % n_vars
+    new_solutions = np.array(solutions, dtype=float)
+    new_fitness = np.array(Pop.get_fitness_array(), dtype=float)
+    new_fitness[rows] = np.nan
+
+    # Mutate numeric genes
+    lb, ub = search_space.get_bounds_arrays()
+    n_values = search_space.get_number_values_array()
+    num = n_values[cols] == 0
+    r = rng.random(np.count_nonzero(num))
+    tau_k = np.where(r < 0.5, (2.0*r)**(1/(C + 1)) - 1, 1 - (2.0*(1 - r))**(1/(C + 1)))
+    new_solutions[rows[num], cols[num]] += (ub[cols[num]] - lb[cols[num]])*tau_k
+
+    # Mutate enumerate and binary genes
+    new_solutions[rows[~num], cols[~num]] = np.floor(rng.random(np.count_nonzero(~num))*n_values[cols[~num]])
+
+    Pop_new = Pop.empty_copy()
+    Pop_new.insert_solutions_array(new_solutions, fitness=new_fitness)
+    return Pop_new
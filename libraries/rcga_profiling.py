@@ -0,0 +1,122 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Instrumentation of the generations of the rcga, switched on with the 'profiling' main parameter. The timer records
+# the wall time of each phase of a generation:
+#   - selection, crossover, mutation, elitism: the operators
+#   - deduplication: finding and replacing the duplicate offspring
+#   - constraints:  checking the constraints and repairing or resampling the infeasible individuals
+#   - adaptation:   adapting the operator parameters
+#   - replacement:  building the next generation from the elite and the offspring (in the multi-objective mode, from
+#                   the non-dominated sort of the population and the offspring)
+#   - cache:        fitness cache lookups
+#   - surrogate:    screening the offspring with the surrogate and updating its archive
+#   - evaluation:   model evaluations, including the executor overhead
+#   - bounds:       bounds enforcement, which happens inside the operators and is also counted in their phase
+#   - results:      writing the generation results
+#   - checkpoint:   saving checkpoints
+# and the latency of each model call (one per solution, or one per chunk of solutions for batch models).
+# When profiling is off no timer is created and the populations and evaluators skip all the measurements.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import contextlib
+import time
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+PHASES = ['selection', 'crossover', 'mutation', 'constraints', 'deduplication', 'elitism', 'replacement', 'surrogate',
+          'cache', 'evaluation', 'adaptation', 'bounds', 'results', 'checkpoint']
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_latency_statistics(latencies):
+    """
+    Function that returns the number of model calls and the p50, p95 and max of their latencies (None if there were
+    no calls).
+    """
+    if len(latencies) == 0:
+        return {'N_model_calls': 0, 'eval_latency_p50': None, 'eval_latency_p95': None, 'eval_latency_max': None}
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {'N_model_calls': len(latencies), 'eval_latency_p50': float(p50), 'eval_latency_p95': float(p95),
+            'eval_latency_max': float(np.max(latencies))}
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Phase_timer(object):
+    """ Accumulates the wall time of the phases of each generation and the latencies of the model calls """
+    def __init__(self):
+        self.times = {}
+        self.latencies = []
+        self.total_times = {}
+        self.all_latencies = []
+        self.generation_start = time.perf_counter()
+
+    def __deepcopy__(self, memo):
+        # Copies of a population keep reporting to the same timer
+        return self
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager that adds the time spent in its block to a phase.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+        return 0
+
+    def add_latencies(self, latencies):
+        self.latencies.extend(latencies)
+        return 0
+
+    def end_generation(self):
+        """
+        Function that closes the current generation and returns its record: the wall time of the generation and of
+        each phase, and the latency statistics of its model calls.
+        """
+        now = time.perf_counter()
+        record = {'generation_time': now - self.generation_start,
+                  'phase_times': {name: self.times.get(name, 0.0) for name in PHASES}}
+        record.update(get_latency_statistics(self.latencies))
+        for name, seconds in self.times.items():
+            self.total_times[name] = self.total_times.get(name, 0.0) + seconds
+        self.all_latencies.extend(self.latencies)
+        self.times = {}
+        self.latencies = []
+        self.generation_start = now
+        return record
+
+    def get_statistics(self):
+        """
+        Function that returns the statistics of the whole run: the total time of each phase and the latency
+        statistics of all the model calls.
+        """
+        statistics = {'time_' + name: self.total_times.get(name, 0.0) for name in PHASES}
+        statistics.update(get_latency_statistics(self.all_latencies))
+        return statistics
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
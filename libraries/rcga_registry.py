@@ -0,0 +1,124 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Registry of the operators and models that can be named in inputs.yaml. Names are resolved into functions once, when
+# the rcga is created, and their signatures are checked at that point rather than in the middle of a run.
+# Operators are registered with the register decorator (see rcga_operators). Models and constraint functions (see
+# rcga_constraints) are looked up in the registry first and then in model/models.py. Third-party modules listed in the
+# 'plugins' main parameter are imported before resolving, so that they can register their own operators and models.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import importlib
+import inspect
+import models
+
+
+#----------------------------------------------------------------------------------------
+# REGISTRY
+#----------------------------------------------------------------------------------------
+# Arguments each kind of function is called with (see rcga.execute)
+CALL_SIGNATURES = {
+    'model': (('inputs',), {}),
+    'elitism': (('Pop', 'params'), {'reverse': False}),
+    'selection': (('Pop', 'params'), {'rng': None}),
+    'crossover': (('mp', 'params'), {'rng': None}),
+    'mutation': (('Pop', 'params'), {'rng': None}),
+    'constraint': (('variables',), {}),
+}
+
+REGISTRY = {kind: {} for kind in CALL_SIGNATURES}
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def check_signature(kind, function):
+    """
+    Function that checks that a function can be called the way rcga calls functions of a given kind.
+    """
+    args, kwargs = CALL_SIGNATURES[kind]
+    try:
+        inspect.signature(function).bind(*args, **kwargs)
+    except TypeError as e:
+        call = ', '.join(list(args) + [k + '=...' for k in kwargs])
+        raise TypeError("{} function {} cannot be called as f({}): {}".format(kind, function.__name__, call, e))
+    except ValueError:
+        # Builtins without signature information cannot be checked
+        pass
+    return 0
+
+
+def register_operator(kind, name, function):
+    """
+    Function that registers a function of a given kind (model, elitism, selection, crossover, mutation or constraint)
+    under a name.
+    """
+    if kind not in REGISTRY:
+        raise ValueError("Unknown kind of operator {}".format(kind))
+    check_signature(kind, function)
+    REGISTRY[kind][name] = function
+    return function
+
+
+def register(kind, name=None):
+    """
+    Decorator that registers a function of a given kind, under its own name unless another one is given.
+    """
+    def decorator(function):
+        return register_operator(kind, name or function.__name__, function)
+    return decorator
+
+
+def get_registered_names(kind):
+    return tuple(REGISTRY[kind].keys())
+
+
+def resolve(kind, name):
+    """
+    Function that returns the function of a given kind registered under a name. Models and constraint functions not
+    registered are looked up in model/models.py.
+    """
+    if name in REGISTRY[kind]:
+        return REGISTRY[kind][name]
+    if kind in ['model', 'constraint'] and callable(getattr(models, name, None)):
+        return register_operator(kind, name, getattr(models, name))
+    raise ValueError("No {} function named {}. Registered: {}".format(kind, name, ', '.join(get_registered_names(kind))))
+
+
+def load_plugins(module_names):
+    """
+    Function that imports the third-party modules that register operators or models.
+    """
+    for module_name in module_names or []:
+        importlib.import_module(module_name)
+    return 0
+
+
+def resolve_functions(params):
+    """
+    Function that resolves all the functions named in the parameters and returns them in a dictionary by kind.
+    """
+    load_plugins(params.get('plugins', []))
+    return {
+        'model': resolve('model', params['model_function']),
+        'elitism': resolve('elitism', params['elitism_params']['elitism_function']),
+        'selection': resolve('selection', params['selection_params']['selection_function']),
+        'crossover': resolve('crossover', params['crossover_params']['crossover_function']),
+        'mutation': resolve('mutation', params['mutation_params']['mutation_function']),
+        'constraints': [resolve('constraint', name)
+                        for name in params.get('constraint_params', {}).get('constraint_functions', None) or []],
+    }
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,620 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Results writers store the parameters, the best individual of each generation, the optimal point and the statistics
+# of a run in a subdirectory of 'outputs/' named after the current date_time. In the multi-objective mode the Pareto
+# front of each generation (its solutions and objectives) is written instead of the best individual and the optimal
+# point. Available backends:
+#   - excel: the original output, copied from the excel template and saved at the end of the run. The Pareto fronts go
+#            to a "Pareto fronts" sheet
+#   - csv:   parameters.json, an append-only generations.csv flushed after every generation, optimal_point.json and
+#            statistics.json. The Pareto fronts go to an append-only pareto_fronts.csv
+#   - npz:   generations stored as compressed numpy arrays, written in parts of results_flush_every generations and
+#            merged into results.npz at the end, plus parameters.json and statistics.json. The Pareto fronts are
+#            merged into pareto_fronts.npz
+#   - none:  nothing is written
+# The csv and npz backends do not need openpyxl. They can export the excel output after the run (export_excel).
+# When a run is resumed from a checkpoint, the writers reopen its output directory and discard the generations written
+# after the checkpoint.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import collections
+import csv
+import datetime
+import json
+import os
+import numpy as np
+import lib_directory_ops
+import lib_path_ops
+import lib_file_ops
+import rcga_profiling
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+# Labels of the statistics written after the template rows of the Statistics sheet
+STATISTICS_LABELS = {
+    'termination_reason': 'Termination reason',
+    'N_cache_hits': 'Fitness cache hits',
+    'N_cache_misses': 'Fitness cache misses',
+    'N_duplicates_dropped': 'Duplicate offspring dropped',
+    'N_duplicates_parent': 'Offspring duplicating the parents',
+    'N_duplicates_intra': 'Offspring duplicating other offspring',
+    'N_duplicates_regenerated': 'Duplicate offspring regenerated',
+    'N_duplicates_reused': 'Duplicate offspring reusing a fitness',
+    'N_infeasible_skipped': 'Infeasible individuals not evaluated',
+    'N_infeasible_repaired': 'Infeasible individuals repaired',
+    'N_infeasible_resampled': 'Infeasible individuals resampled',
+    'N_surrogate_predicted': 'Offspring given a surrogate fitness',
+    'N_surrogate_explored': 'Offspring evaluated for exploration',
+    'N_model_calls': 'Model calls',
+    'eval_latency_p50': 'Model call latency p50 (s)',
+    'eval_latency_p95': 'Model call latency p95 (s)',
+    'eval_latency_max': 'Model call latency max (s)',
+}
+STATISTICS_LABELS.update({'time_' + phase: 'Time in {} (s)'.format(phase) for phase in rcga_profiling.PHASES})
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def create_results_writer(params, search_space):
+    """
+    Function that creates the results writer set in the main parameters (results_backend).
+    """
+    backend = params.get('results_backend', 'excel')
+    if backend == 'excel':
+        return Excel_results_writer(params, search_space)
+    elif backend == 'csv':
+        return Csv_results_writer(params, search_space)
+    elif backend == 'npz':
+        return Npz_results_writer(params, search_space)
+    elif backend == 'none':
+        return Results_writer(params, search_space)
+    else:
+        raise ValueError("Unknown results backend {}".format(backend))
+
+
+def to_json(value):
+    """
+    Function that converts a value into something json can serialise (numpy scalars, tuples, unknown objects).
+    """
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def parse_value(s):
+    """
+    Function that converts a value read from a csv file back into a number whenever possible.
+    """
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s)
+    except ValueError:
+        return s
+
+
+def export_excel(writer, generations, fronts=()):
+    """
+    Function that exports the results of a csv or npz writer to the excel template, in the same output directory.
+    Fronts is a list of (generation, encoded solutions, objectives) of the multi-objective mode.
+    """
+    excel_writer = Excel_results_writer(dict(writer.params), writer.search_space)
+    excel_writer.output_dir = writer.get_output_dir()
+    excel_writer.open()
+    excel_writer.write_parameters(writer.params_written)
+    for N_gen, best_fitness, best_solution in generations:
+        excel_writer.write_generation(N_gen, best_fitness, best_solution)
+    for N_gen, solutions, objectives in fronts:
+        excel_writer.write_front(N_gen, solutions, objectives)
+    if writer.optimal_point is not None:
+        excel_writer.write_optimal_point(writer.optimal_point)
+    excel_writer.write_statistics(writer.statistics)
+    excel_writer.write_adaptation(writer.adaptation)
+    excel_writer.close()
+    return 0
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Results_writer(object):
+    """ Base results writer. It writes nothing and is used as is by the 'none' backend """
+    def __init__(self, params, search_space):
+        self.params = params
+        self.search_space = search_space
+        self.output_dir = None
+        self.params_written = {}
+        self.optimal_point = None
+        self.statistics = {}
+        self.adaptation = []
+
+    def create_output_dir(self):
+        """
+        Function that creates the output directory, named after the current date_time, and returns its name. Runs
+        started in the same second get a numbered suffix, so that a run never writes into the directory of another.
+        If the writer already has an output directory, it is reused.
+        """
+        if self.output_dir is not None:
+            return lib_path_ops.get_relative_path(self.output_dir, lib_path_ops.join_paths(self.output_dir, '..'))
+        base_name = datetime.datetime.now().strftime("%d%m%Y_%H%M%S")
+        dir_name = base_name
+        n = 1
+        while True:
+            output_dir = lib_path_ops.join_paths(self.params['Excel output dir'], dir_name)
+            try:
+                os.mkdir(output_dir)
+                break
+            except FileExistsError:
+                n += 1
+                dir_name = '{}_{}'.format(base_name, n)
+        self.output_dir = output_dir
+        return dir_name
+
+    def get_output_dir(self):
+        return self.output_dir
+
+    def open(self):
+        return 0
+
+    def resume(self, N_gen):
+        """
+        Function that reopens the output of an interrupted run, in output_dir, to continue it after generation N_gen.
+        Anything written after the last checkpoint is discarded.
+        """
+        return 0
+
+    def write_parameters(self, params):
+        return 0
+
+    def write_generation(self, N_gen, best_fitness, best_solution):
+        return 0
+
+    def write_optimal_point(self, best_solution):
+        return 0
+
+    def write_front(self, N_gen, solutions, objectives):
+        """
+        Function that writes the Pareto front of a generation of the multi-objective mode: its encoded solutions
+        (individual x variable) and their objectives (individual x objective).
+        """
+        return 0
+
+    def get_front_header(self, n_objectives):
+        return ['generation'] + ['objective_{}'.format(j + 1) for j in range(n_objectives)] + \
+            list(self.search_space.get_variables_names())
+
+    def get_front_rows(self, N_gen, solutions, objectives):
+        """
+        Function that returns the rows (generation, objectives, decoded variables) of a Pareto front.
+        """
+        vars_names = self.search_space.get_variables_names()
+        rows = []
+        for row, f in zip(solutions, objectives):
+            solution = self.search_space.decode_solution(row)
+            rows.append([N_gen] + [float(x) for x in f] + [solution[v] for v in vars_names])
+        return rows
+
+    def write_statistics(self, statistics):
+        return 0
+
+    def write_adaptation(self, trajectory):
+        """
+        Function that writes the trajectory of the adapted operator parameters (see rcga_adaptation), a list of
+        dictionaries with the same keys, one per generation.
+        """
+        return 0
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        return 0
+
+
+class Excel_results_writer(Results_writer):
+    """ Writes the results in a copy of the excel template. The workbook is kept in memory and saved on flush/close """
+    def open(self):
+        import lib_excel_ops_openpyxl as lib_excel
+        self.lib_excel = lib_excel
+        dir_name = self.create_output_dir()
+        output_file = lib_path_ops.join_paths(self.output_dir, 'output_' + dir_name + '.xlsx')
+        r = lib_file_ops.copy_file(self.params['Excel template file'], output_file)
+        assert r != None
+        self.params['Excel output file'] = output_file
+        self.generation_row_index = 13
+        self.wb = self.lib_excel.open_workbook(output_file)
+        # Write variables names
+        ws = self.wb["Optimisation"]
+        col_i = 3
+        for v in self.search_space.get_variables_names():
+            ws.cell(row=12, column=col_i, value=v)
+            col_i += 1
+        return 0
+
+    def resume(self, N_gen):
+        import lib_excel_ops_openpyxl as lib_excel
+        self.lib_excel = lib_excel
+        self.wb = self.lib_excel.open_workbook(self.params['Excel output file'])
+        self.generation_row_index = 13 + N_gen + 1
+        if "Pareto fronts" in self.wb.sheetnames:
+            ws = self.wb["Pareto fronts"]
+            for row_i in range(2, ws.max_row + 1):
+                if ws.cell(row=row_i, column=1).value > N_gen:
+                    ws.delete_rows(row_i, ws.max_row - row_i + 1)
+                    break
+        return 0
+
+    def write_front(self, N_gen, solutions, objectives):
+        if "Pareto fronts" not in self.wb.sheetnames:
+            ws = self.wb.create_sheet("Pareto fronts")
+            ws.append(self.get_front_header(objectives.shape[1]))
+        ws = self.wb["Pareto fronts"]
+        for row in self.get_front_rows(N_gen, solutions, objectives):
+            ws.append(row)
+        return 0
+
+    def write_parameters(self, params):
+        ws = self.wb["Parameters"]
+        row_i = 4
+        for param in params.keys():
+            ws.cell(row=row_i, column=1, value=param)
+            if type(params[param]) in [type({}), type([])]:
+                ws.cell(row=row_i, column=2, value=str(params[param]))
+            else:
+                ws.cell(row=row_i, column=2, value=params[param])
+            row_i += 1
+        return 0
+
+    def write_generation(self, N_gen, best_fitness, best_solution):
+        ws = self.wb["Optimisation"]
+        row_i = self.generation_row_index
+        ws.cell(row=row_i, column=1, value=N_gen)
+        ws.cell(row=row_i, column=2, value=best_fitness)
+        col_i = 3
+        for v in self.search_space.get_variables_names():
+            ws.cell(row=row_i, column=col_i, value=best_solution[v])
+            col_i += 1
+        self.generation_row_index += 1
+        return 0
+
+    def write_optimal_point(self, best_solution):
+        ws = self.wb["Optimisation"]
+        col_i = 2
+        for v in self.search_space.get_variables_names():
+            ws.cell(row=5, column=col_i, value=v)
+            ws.cell(row=6, column=col_i, value=best_solution[v])
+            col_i += 1
+        return 0
+
+    def write_statistics(self, statistics):
+        ws = self.wb["Statistics"]
+        ws.cell(row=3, column=2, value=statistics['N_failed_evals'])
+        ws.cell(row=4, column=2, value=statistics['N_evals'])
+        # Additional statistics go below the template rows
+        row_i = 6
+        for key, value in statistics.items():
+            if key in ['N_failed_evals', 'N_evals']:
+                continue
+            ws.cell(row=row_i, column=1, value=STATISTICS_LABELS.get(key, key))
+            if type(value) in [type({}), type([])]:
+                ws.cell(row=row_i, column=2, value=str(value))
+            else:
+                ws.cell(row=row_i, column=2, value=value)
+            row_i += 1
+        return 0
+
+    def write_adaptation(self, trajectory):
+        if len(trajectory) == 0:
+            return 0
+        if "Adaptation" in self.wb.sheetnames:
+            del self.wb["Adaptation"]
+        ws = self.wb.create_sheet("Adaptation")
+        columns = list(trajectory[0].keys())
+        for col_i, key in enumerate(columns):
+            ws.cell(row=1, column=col_i+1, value=key)
+        for row_i, entry in enumerate(trajectory):
+            for col_i, key in enumerate(columns):
+                ws.cell(row=row_i+2, column=col_i+1, value=entry[key])
+        return 0
+
+    def flush(self):
+        self.lib_excel.save_workbook(self.wb, self.params['Excel output file'])
+        return 0
+
+    def close(self):
+        self.flush()
+        self.wb.close()
+        return 0
+
+
+class Csv_results_writer(Results_writer):
+    """ Streams the generations to an append-only csv file and writes the rest as json """
+    def open(self):
+        self.create_output_dir()
+        self.generations_file = lib_path_ops.join_paths(self.output_dir, 'generations.csv')
+        self.f = open(self.generations_file, 'w', newline='')
+        self.csv_writer = csv.writer(self.f)
+        self.csv_writer.writerow(['generation', 'best_fitness'] + list(self.search_space.get_variables_names()))
+        self.f.flush()
+        self.fronts_file = lib_path_ops.join_paths(self.output_dir, 'pareto_fronts.csv')
+        self.fronts_f = None
+        return 0
+
+    def resume(self, N_gen):
+        self.generations_file = lib_path_ops.join_paths(self.output_dir, 'generations.csv')
+        self.fronts_file = lib_path_ops.join_paths(self.output_dir, 'pareto_fronts.csv')
+        self.fronts_f = None
+        self.params_written = dict(self.params)
+        for file_name in [self.generations_file, self.fronts_file]:
+            if not os.path.isfile(file_name):
+                continue
+            with open(file_name, 'r', newline='') as f:
+                rows = list(csv.reader(f))
+            rows = rows[:1] + [row for row in rows[1:] if int(row[0]) <= N_gen]
+            with open(file_name, 'w', newline='') as f:
+                csv.writer(f).writerows(rows)
+        self.f = open(self.generations_file, 'a', newline='')
+        self.csv_writer = csv.writer(self.f)
+        return 0
+
+    def __write_json(self, file_name, data):
+        with open(lib_path_ops.join_paths(self.output_dir, file_name), 'w') as f:
+            json.dump(to_json(data), f, indent=1)
+        return 0
+
+    def write_parameters(self, params):
+        self.params_written = dict(params)
+        return self.__write_json('parameters.json', params)
+
+    def write_generation(self, N_gen, best_fitness, best_solution):
+        row = [N_gen, best_fitness] + [best_solution[v] for v in self.search_space.get_variables_names()]
+        self.csv_writer.writerow(row)
+        self.f.flush()
+        return 0
+
+    def write_optimal_point(self, best_solution):
+        self.optimal_point = dict(best_solution)
+        return self.__write_json('optimal_point.json', best_solution)
+
+    def write_front(self, N_gen, solutions, objectives):
+        if self.fronts_f is None:
+            write_header = not os.path.isfile(self.fronts_file)
+            self.fronts_f = open(self.fronts_file, 'a', newline='')
+            self.fronts_writer = csv.writer(self.fronts_f)
+            if write_header:
+                self.fronts_writer.writerow(self.get_front_header(objectives.shape[1]))
+        self.fronts_writer.writerows(self.get_front_rows(N_gen, solutions, objectives))
+        self.fronts_f.flush()
+        return 0
+
+    def write_statistics(self, statistics):
+        self.statistics = dict(statistics)
+        return self.__write_json('statistics.json', statistics)
+
+    def write_adaptation(self, trajectory):
+        self.adaptation = list(trajectory)
+        if len(trajectory) == 0:
+            return 0
+        columns = list(trajectory[0].keys())
+        with open(lib_path_ops.join_paths(self.output_dir, 'adaptation.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows([['' if entry[key] is None else entry[key] for key in columns] for entry in trajectory])
+        return 0
+
+    def read_generations(self):
+        """
+        Function that reads back the generations written, as a list of (generation, best fitness, best solution).
+        """
+        generations = []
+        vars_names = self.search_space.get_variables_names()
+        with open(self.generations_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                solution = {v: parse_value(x) for v, x in zip(vars_names, row[2:])}
+                generations.append((int(row[0]), float(row[1]), solution))
+        return generations
+
+    def read_fronts(self):
+        """
+        Function that reads back the Pareto fronts written, as a list of (generation, encoded solutions, objectives).
+        """
+        if not os.path.isfile(self.fronts_file):
+            return []
+        vars_names = self.search_space.get_variables_names()
+        fronts = collections.OrderedDict()
+        with open(self.fronts_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+            n_objectives = len(next(reader)) - 1 - len(vars_names)
+            for row in reader:
+                solution = {v: parse_value(x) for v, x in zip(vars_names, row[1+n_objectives:])}
+                front = fronts.setdefault(int(row[0]), ([], []))
+                front[0].append(self.search_space.encode_solution(solution))
+                front[1].append([float(x) for x in row[1:1+n_objectives]])
+        return [(N_gen, np.array(rows, dtype=float), np.array(objectives, dtype=float))
+                for N_gen, (rows, objectives) in fronts.items()]
+
+    def close(self):
+        self.f.close()
+        if self.fronts_f is not None:
+            self.fronts_f.close()
+        if self.params.get('export_excel', False):
+            export_excel(self, self.read_generations(), self.read_fronts())
+        return 0
+
+
+class Npz_results_writer(Results_writer):
+    """
+    Stores the generations as columns (generation, best fitness, encoded best solution). Every results_flush_every
+    generations the buffered ones are written to a compressed part file; at the end the parts are merged into
+    results.npz and removed.
+    """
+    def open(self):
+        self.create_output_dir()
+        self.flush_every = max(1, self.params.get('results_flush_every', 1))
+        self.parts = []
+        self.buffer = []
+        self.front_parts = []
+        self.front_buffer = []
+        return 0
+
+    def resume(self, N_gen):
+        # The writer is flushed at every checkpoint, so a part is either fully before or fully after it
+        self.open()
+        self.params_written = dict(self.params)
+        for file_name in sorted(lib_directory_ops.listdir(self.output_dir)):
+            if file_name.startswith('generations_') and file_name.endswith('.npz'):
+                parts = self.parts
+            elif file_name.startswith('fronts_') and file_name.endswith('.npz'):
+                parts = self.front_parts
+            else:
+                continue
+            part_file = lib_path_ops.join_paths(self.output_dir, file_name)
+            with np.load(part_file) as data:
+                after_checkpoint = data['generation'][0] > N_gen
+            if after_checkpoint:
+                lib_file_ops.delete_file(part_file)
+            else:
+                parts.append(part_file)
+        return 0
+
+    def __write_json(self, file_name, data):
+        with open(lib_path_ops.join_paths(self.output_dir, file_name), 'w') as f:
+            json.dump(to_json(data), f, indent=1)
+        return 0
+
+    def write_parameters(self, params):
+        self.params_written = dict(params)
+        return self.__write_json('parameters.json', params)
+
+    def write_generation(self, N_gen, best_fitness, best_solution):
+        self.buffer.append((N_gen, best_fitness, self.search_space.encode_solution(best_solution)))
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+        return 0
+
+    def write_optimal_point(self, best_solution):
+        self.optimal_point = dict(best_solution)
+        return 0
+
+    def write_front(self, N_gen, solutions, objectives):
+        self.front_buffer.append((N_gen, np.array(solutions, dtype=float), np.array(objectives, dtype=float)))
+        if len(self.front_buffer) >= self.flush_every:
+            self.flush()
+        return 0
+
+    def write_statistics(self, statistics):
+        self.statistics = dict(statistics)
+        return self.__write_json('statistics.json', statistics)
+
+    def write_adaptation(self, trajectory):
+        self.adaptation = list(trajectory)
+        if len(trajectory) == 0:
+            return 0
+        columns = {key: np.array([np.nan if entry[key] is None else entry[key] for entry in trajectory])
+                   for key in trajectory[0]}
+        np.savez_compressed(lib_path_ops.join_paths(self.output_dir, 'adaptation.npz'), **columns)
+        return 0
+
+    def flush(self):
+        if self.front_buffer:
+            part_file = lib_path_ops.join_paths(self.output_dir, 'fronts_{:06d}.npz'.format(len(self.front_parts)))
+            np.savez_compressed(part_file,
+                                generation=np.concatenate([np.full(len(f[1]), f[0], dtype=int) for f in self.front_buffer]),
+                                solutions=np.concatenate([f[1] for f in self.front_buffer]),
+                                objectives=np.concatenate([f[2] for f in self.front_buffer]))
+            self.front_parts.append(part_file)
+            self.front_buffer = []
+        if not self.buffer:
+            return 0
+        part_file = lib_path_ops.join_paths(self.output_dir, 'generations_{:06d}.npz'.format(len(self.parts)))
+        np.savez_compressed(part_file,
+                            generation=np.array([g[0] for g in self.buffer], dtype=int),
+                            best_fitness=np.array([g[1] for g in self.buffer], dtype=float),
+                            best_solution=np.array([g[2] for g in self.buffer], dtype=float))
+        self.parts.append(part_file)
+        self.buffer = []
+        return 0
+
+    def read_generations(self):
+        """
+        Function that reads back the generations written, as a list of (generation, best fitness, best solution).
+        """
+        generations = []
+        for part_file in self.parts:
+            with np.load(part_file) as data:
+                for g, f, row in zip(data['generation'], data['best_fitness'], data['best_solution']):
+                    generations.append((int(g), float(f), self.search_space.decode_solution(row)))
+        return generations
+
+    def read_fronts(self):
+        """
+        Function that reads back the Pareto fronts written, as a list of (generation, encoded solutions, objectives).
+        """
+        fronts = []
+        for part_file in self.front_parts:
+            with np.load(part_file) as data:
+                for N_gen in np.unique(data['generation']):
+                    rows = data['generation'] == N_gen
+                    fronts.append((int(N_gen), data['solutions'][rows], data['objectives'][rows]))
+        return fronts
+
+    def close(self):
+        self.flush()
+        columns = {
+            'generation': [np.empty(0, dtype=int)],
+            'best_fitness': [np.empty(0)],
+            'best_solution': [np.empty((0, self.search_space.get_number_variables()))],
+        }
+        for part_file in self.parts:
+            with np.load(part_file) as data:
+                for key in columns:
+                    columns[key].append(data[key])
+        results = {key: np.concatenate(columns[key]) for key in columns}
+        results['variables_names'] = np.array(self.search_space.get_variables_names())
+        if self.optimal_point is not None:
+            results['optimal_point'] = np.array(self.search_space.encode_solution(self.optimal_point))
+        np.savez_compressed(lib_path_ops.join_paths(self.output_dir, 'results.npz'), **results)
+        if self.front_parts:
+            fronts = {'generation': [], 'solutions': [], 'objectives': []}
+            for part_file in self.front_parts:
+                with np.load(part_file) as data:
+                    for key in fronts:
+                        fronts[key].append(data[key])
+            fronts = {key: np.concatenate(fronts[key]) for key in fronts}
+            fronts['variables_names'] = np.array(self.search_space.get_variables_names())
+            np.savez_compressed(lib_path_ops.join_paths(self.output_dir, 'pareto_fronts.npz'), **fronts)
+        if self.params.get('export_excel', False):
+            export_excel(self, self.read_generations(), self.read_fronts())
+        for part_file in self.parts + self.front_parts:
+            lib_file_ops.delete_file(part_file)
+        self.parts = []
+        self.front_parts = []
+        return 0
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
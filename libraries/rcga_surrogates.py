@@ -0,0 +1,154 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Surrogate models that predict the fitness of new offspring from an archive of solutions already evaluated by the
+# true model, so that only the most promising offspring are sent to it (see rcga.step). The archive grows by the
+# offspring evaluated each generation and keeps the max_archive_size most recent ones. Solutions are scaled to [0, 1]
+# per variable (see Search_space.get_normalisation_arrays) before measuring distances.
+#   - knn: mean fitness of the n_neighbours nearest archived solutions, weighted by the inverse of their distance. New
+#          solutions only need to be appended to the archive.
+#   - rbf: cubic radial basis function interpolation with a linear tail, refitted on the archive after each
+#          generation in which it grew. The refit grows with the cube of the archive size, so keep the archive small
+#          (a few hundred solutions) unless the model is much slower than the fit.
+# Predictions are only used for ranking the offspring and for the fitness of those not sent to the model; they never
+# enter the fitness cache or the archive.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def create_surrogate(params, search_space):
+    """
+    Function that creates the surrogate set in the surrogate parameters, or returns None if it is not used.
+    """
+    surrogate_params = params.get('surrogate_params', {})
+    if not surrogate_params.get('use_surrogate', False):
+        return None
+    surrogate_model = surrogate_params.get('surrogate_model', 'knn')
+    lower, width = search_space.get_normalisation_arrays()
+    max_archive_size = surrogate_params.get('max_archive_size', 2000)
+    if surrogate_model == 'knn':
+        return Knn_surrogate(lower, width, max_archive_size=max_archive_size,
+                             n_neighbours=surrogate_params.get('n_neighbours', 5))
+    elif surrogate_model == 'rbf':
+        return Rbf_surrogate(lower, width, max_archive_size=max_archive_size)
+    else:
+        raise ValueError("Unknown surrogate model {}".format(surrogate_model))
+
+
+def get_distances(X, Y):
+    """
+    Function that returns the euclidean distances between the rows of X and the rows of Y.
+    """
+    squared = np.sum(X**2, axis=1)[:, np.newaxis] + np.sum(Y**2, axis=1)[np.newaxis, :] - 2*X @ Y.T
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Surrogate(object):
+    """ Base surrogate: an archive of scaled solutions and their fitness """
+    def __init__(self, lower, width, max_archive_size=2000):
+        self.lower = lower
+        self.width = width
+        self.max_archive_size = max_archive_size
+        self.X = np.empty((0, len(lower)))
+        self.y = np.empty(0)
+
+    def get_size(self):
+        return len(self.y)
+
+    def scale(self, solutions):
+        return (np.asarray(solutions, dtype=float) - self.lower) / self.width
+
+    def add(self, solutions, fitness):
+        """
+        Function that adds encoded solutions evaluated by the true model to the archive. Failed evaluations are skipped.
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        ok = ~np.isnan(fitness)
+        if not ok.any():
+            return 0
+        self.X = np.concatenate([self.X, self.scale(solutions)[ok]])[-self.max_archive_size:]
+        self.y = np.concatenate([self.y, fitness[ok]])[-self.max_archive_size:]
+        self.fit()
+        return 0
+
+    def get_state(self):
+        return self.X, self.y
+
+    def set_state(self, X, y):
+        self.X = np.asarray(X, dtype=float).reshape(-1, len(self.lower))
+        self.y = np.asarray(y, dtype=float)
+        self.fit()
+        return 0
+
+    def fit(self):
+        return 0
+
+    def predict(self, solutions):
+        raise NotImplementedError
+
+
+class Knn_surrogate(Surrogate):
+    """ Inverse distance weighted mean of the k nearest archived solutions """
+    def __init__(self, lower, width, max_archive_size=2000, n_neighbours=5):
+        Surrogate.__init__(self, lower, width, max_archive_size=max_archive_size)
+        self.n_neighbours = n_neighbours
+
+    def predict(self, solutions):
+        distances = get_distances(self.scale(solutions), self.X)
+        k = min(self.n_neighbours, self.get_size())
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        d = np.take_along_axis(distances, nearest, axis=1)
+        weights = 1.0 / np.maximum(d, 1e-12)
+        return np.sum(weights*self.y[nearest], axis=1) / np.sum(weights, axis=1)
+
+
+class Rbf_surrogate(Surrogate):
+    """ Cubic radial basis function interpolation with a linear tail """
+    def __init__(self, lower, width, max_archive_size=2000):
+        Surrogate.__init__(self, lower, width, max_archive_size=max_archive_size)
+        self.weights = None
+        self.tail = None
+
+    def fit(self):
+        n, n_vars = self.X.shape
+        if n == 0:
+            return 0
+        P = np.hstack([np.ones((n, 1)), self.X])
+        A = np.zeros((n + n_vars + 1, n + n_vars + 1))
+        A[:n, :n] = get_distances(self.X, self.X)**3
+        A[:n, n:] = P
+        A[n:, :n] = P.T
+        b = np.concatenate([self.y, np.zeros(n_vars + 1)])
+        try:
+            coefficients = np.linalg.solve(A, b)
+        except np.linalg.LinAlgError:
+            # Repeated solutions in the archive
+            coefficients = np.linalg.lstsq(A, b, rcond=None)[0]
+        self.weights = coefficients[:n]
+        self.tail = coefficients[n:]
+        return 0
+
+    def predict(self, solutions):
+        X = self.scale(solutions)
+        return get_distances(X, self.X)**3 @ self.weights + self.tail[0] + X @ self.tail[1:]
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
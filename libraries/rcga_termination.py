@@ -0,0 +1,127 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Stopping rules of a run, set in the Termination section of the inputs and checked at the end of every generation:
+#   - max_evaluations:  the number of model evaluations reaches max_evaluations
+#   - max_time:         the wall time of the run reaches max_time seconds
+#   - target_fitness:   the best fitness reaches target_fitness
+#   - stagnation:       the best fitness has not improved by more than stagnation_tolerance over the last
+#                       stagnation_generations generations
+#   - diversity:        the diversity of the population (see Population.get_diversity) falls below min_diversity
+# A rule is off when its parameter is 0 (None for target_fitness). With logic 'any' the run stops as soon as one of the
+# rules is met, with 'all' when all the rules switched on are met in the same generation. max_generations always stops
+# the run. The rule that stopped the run is written to the statistics as termination_reason. The target_fitness and
+# stagnation rules are not checked in the multi-objective mode (see rcga_multiobjective).
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import time
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+RULES = ['max_evaluations', 'max_time', 'target_fitness', 'stagnation', 'diversity']
+
+
+#----------------------------------------------------------------------------------------
+# CLASSES
+#----------------------------------------------------------------------------------------
+class Termination(object):
+    """ Checks the stopping rules of a run at the end of each generation """
+    def __init__(self, params):
+        termination_params = params.get('termination_params', {})
+        self.max_gen = params['max_generations']
+        self.reverse = params['opt_type'] == 'max'
+        self.max_evaluations = termination_params.get('max_evaluations', 0)
+        self.max_time = termination_params.get('max_time', 0)
+        self.target_fitness = termination_params.get('target_fitness', None)
+        self.stagnation_generations = termination_params.get('stagnation_generations', 0)
+        self.stagnation_tolerance = termination_params.get('stagnation_tolerance', 0)
+        self.min_diversity = termination_params.get('min_diversity', 0)
+        self.logic = termination_params.get('logic', 'any')
+        if self.logic not in ['any', 'all']:
+            raise ValueError("Unknown termination logic {}".format(self.logic))
+        self.rules = [rule for rule, on in zip(RULES, [self.max_evaluations, self.max_time,
+                                                       self.target_fitness is not None, self.stagnation_generations,
+                                                       self.min_diversity]) if on]
+        if params.get('objectives', None):
+            # The multi-objective mode has no best fitness to follow
+            self.rules = [rule for rule in self.rules if rule not in ['target_fitness', 'stagnation']]
+        self.start_time = time.time()
+        self.best_fitness = None
+        self.best_generation = 0
+
+    def uses_diversity(self):
+        return 'diversity' in self.rules
+
+    def get_elapsed_time(self):
+        return time.time() - self.start_time
+
+    def get_state(self):
+        """
+        Function that returns the state of the rules (elapsed time and stagnation record), to be saved in checkpoints.
+        """
+        return {'elapsed_time': self.get_elapsed_time(), 'best_fitness': self.best_fitness,
+                'best_generation': self.best_generation}
+
+    def set_state(self, state):
+        """
+        Function that restores a state returned by get_state. The wall time keeps counting from the elapsed time saved.
+        """
+        self.start_time = time.time() - state['elapsed_time']
+        self.best_fitness = state['best_fitness']
+        self.best_generation = state['best_generation']
+        return 0
+
+    def __is_better(self, fitness, reference, tolerance=0):
+        if self.reverse:
+            return fitness > reference + tolerance
+        return fitness < reference - tolerance
+
+    def __is_met(self, rule, N_gen, best_fitness, N_evals, diversity):
+        """
+        Internal function that checks a single rule. The diversity rule is not met when the diversity is not given.
+        """
+        if rule == 'max_evaluations':
+            return N_evals >= self.max_evaluations
+        elif rule == 'max_time':
+            return self.get_elapsed_time() >= self.max_time
+        elif rule == 'target_fitness':
+            return best_fitness is not None and not self.__is_better(self.target_fitness, best_fitness)
+        elif rule == 'stagnation':
+            return N_gen - self.best_generation >= self.stagnation_generations
+        elif rule == 'diversity':
+            return diversity is not None and diversity < self.min_diversity
+        return False
+
+    def update(self, N_gen, best_fitness, N_evals, diversity=None):
+        """
+        Function called at the end of every generation (including generation 0). Returns the name of the rule that stops
+        the run (the rules met joined by ' and ' with logic 'all', 'max_generations' if none), or None to continue.
+        """
+        if best_fitness is not None and (self.best_fitness is None or
+                                         self.__is_better(best_fitness, self.best_fitness, self.stagnation_tolerance)):
+            self.best_fitness = best_fitness
+            self.best_generation = N_gen
+        met = [rule for rule in self.rules if self.__is_met(rule, N_gen, best_fitness, N_evals, diversity)]
+        if self.logic == 'any' and len(met) > 0:
+            return met[0]
+        if self.logic == 'all' and len(met) > 0 and len(met) == len(self.rules):
+            return ' and '.join(met)
+        if N_gen >= self.max_gen:
+            return 'max_generations'
+        return None
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    pass
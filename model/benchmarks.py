@@ -0,0 +1,231 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Classic scalable test functions to measure the performance and the convergence of the rcga (see benchmark_main.py).
+# Add 'benchmarks' to the plugins main parameter to register the models below and use them as model_function.
+# Every problem takes any number of variables x1..xn, has its minimum at fitness 0 and comes in two forms:
+# model_<problem>(inputs) receives a solution dictionary and model_<problem>_batch(inputs) a 2-D array of solutions.
+# get_search_space(problem, n_dims) returns the matching search space, in the format of inputs.yaml.
+# The mixed problem is a Rastrigin function over float, int and enumerate variables, plus one unit per binary variable
+# set to 1. The variable types cycle float, int, enumerate, binary along x1..xn.
+# The multi-objective problems (ZDT1 and ZDT2, variables in [0, 1]) return two objectives to minimise, for the
+# multi-objective mode (objectives: [min, min]). Their Pareto front is x2 = ... = xn = 0, with f2 = 1 - sqrt(f1) for
+# ZDT1 (convex) and f2 = 1 - f1**2 for ZDT2 (concave).
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+from rcga_registry import register
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+# Bounds of the variables of each problem, and fitness of its global minimum
+BENCHMARKS = {
+    'sphere': {'LBound': -5.12, 'UBound': 5.12, 'optimum': 0.0},
+    'rastrigin': {'LBound': -5.12, 'UBound': 5.12, 'optimum': 0.0},
+    'rosenbrock': {'LBound': -5.0, 'UBound': 10.0, 'optimum': 0.0},
+    'ackley': {'LBound': -32.768, 'UBound': 32.768, 'optimum': 0.0},
+    'griewank': {'LBound': -600.0, 'UBound': 600.0, 'optimum': 0.0},
+    'mixed': {'LBound': -5.12, 'UBound': 5.12, 'optimum': 0.0},
+}
+
+# Bounds of the variables and senses of the objectives of the multi-objective problems
+MULTI_OBJECTIVE_BENCHMARKS = {
+    'zdt1': {'LBound': 0.0, 'UBound': 1.0, 'objectives': ['min', 'min']},
+    'zdt2': {'LBound': 0.0, 'UBound': 1.0, 'objectives': ['min', 'min']},
+}
+
+# Values of the enumerate variables of the mixed problem
+MIXED_VALUES = [-4.0, -2.5, -1.0, 0.0, 0.5, 2.0, 3.5]
+
+MIXED_TYPES = ['float', 'int', 'enumerate', 'binary']
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def get_search_space(problem, n_dims):
+    """
+    Function that returns the search space of a problem with n_dims variables.
+    """
+    problems = dict(BENCHMARKS, **MULTI_OBJECTIVE_BENCHMARKS)
+    if problem not in problems:
+        raise ValueError("Unknown benchmark problem {}. Available: {}".format(problem, ', '.join(problems)))
+    search_space = {}
+    for j in range(n_dims):
+        var_type = MIXED_TYPES[j % len(MIXED_TYPES)] if problem == 'mixed' else 'float'
+        if var_type == 'enumerate':
+            search_space['x{}'.format(j + 1)] = {'Type': var_type, 'Values': list(MIXED_VALUES)}
+        elif var_type == 'binary':
+            search_space['x{}'.format(j + 1)] = {'Type': var_type}
+        else:
+            search_space['x{}'.format(j + 1)] = {'LBound': problems[problem]['LBound'],
+                                                 'UBound': problems[problem]['UBound'], 'Type': var_type}
+    return search_space
+
+
+def to_array(inputs):
+    """
+    Function that converts a solution dictionary into a 2-D array with a single row.
+    """
+    return np.array([list(inputs.values())], dtype=float)
+
+
+def sphere(X):
+    return np.sum(X**2, axis=1)
+
+
+def rastrigin(X):
+    return 10*X.shape[1] + np.sum(X**2 - 10*np.cos(2*np.pi*X), axis=1)
+
+
+def rosenbrock(X):
+    return np.sum(100*(X[:, 1:] - X[:, :-1]**2)**2 + (1 - X[:, :-1])**2, axis=1)
+
+
+def ackley(X):
+    n = X.shape[1]
+    return -20*np.exp(-0.2*np.sqrt(np.sum(X**2, axis=1)/n)) - np.exp(np.sum(np.cos(2*np.pi*X), axis=1)/n) + 20 + np.e
+
+
+def griewank(X):
+    i = np.arange(1, X.shape[1] + 1)
+    return 1 + np.sum(X**2, axis=1)/4000 - np.prod(np.cos(X/np.sqrt(i)), axis=1)
+
+
+def mixed(X):
+    """
+    Mixed problem over the decoded values (enumerate variables given by their value).
+    """
+    types = np.array([MIXED_TYPES[j % len(MIXED_TYPES)] for j in range(X.shape[1])])
+    binary = types == 'binary'
+    return rastrigin(X[:, ~binary]) + np.sum(X[:, binary], axis=1)
+
+
+def zdt1(X):
+    f1 = X[:, 0]
+    g = 1 + 9*np.sum(X[:, 1:], axis=1)/max(1, X.shape[1] - 1)
+    return np.column_stack([f1, g*(1 - np.sqrt(f1/g))])
+
+
+def zdt2(X):
+    f1 = X[:, 0]
+    g = 1 + 9*np.sum(X[:, 1:], axis=1)/max(1, X.shape[1] - 1)
+    return np.column_stack([f1, g*(1 - (f1/g)**2)])
+
+
+def decode_mixed(X):
+    """
+    Function that replaces the indices of the enumerate variables of the mixed problem by their values.
+    """
+    X = np.array(X, dtype=float)
+    enumerate_columns = np.arange(2, X.shape[1], len(MIXED_TYPES))
+    X[:, enumerate_columns] = np.asarray(MIXED_VALUES)[X[:, enumerate_columns].astype(int)]
+    return X
+
+
+@register('model')
+def model_sphere(inputs):
+    return float(sphere(to_array(inputs))[0])
+
+
+@register('model')
+def model_sphere_batch(inputs):
+    return sphere(inputs)
+
+
+@register('model')
+def model_rastrigin(inputs):
+    return float(rastrigin(to_array(inputs))[0])
+
+
+@register('model')
+def model_rastrigin_batch(inputs):
+    return rastrigin(inputs)
+
+
+@register('model')
+def model_rosenbrock(inputs):
+    return float(rosenbrock(to_array(inputs))[0])
+
+
+@register('model')
+def model_rosenbrock_batch(inputs):
+    return rosenbrock(inputs)
+
+
+@register('model')
+def model_ackley(inputs):
+    return float(ackley(to_array(inputs))[0])
+
+
+@register('model')
+def model_ackley_batch(inputs):
+    return ackley(inputs)
+
+
+@register('model')
+def model_griewank(inputs):
+    return float(griewank(to_array(inputs))[0])
+
+
+@register('model')
+def model_griewank_batch(inputs):
+    return griewank(inputs)
+
+
+@register('model')
+def model_mixed(inputs):
+    return float(mixed(to_array(inputs))[0])
+
+
+@register('model')
+def model_mixed_batch(inputs):
+    return mixed(decode_mixed(inputs))
+
+
+@register('model')
+def model_zdt1(inputs):
+    return zdt1(to_array(inputs))[0].tolist()
+
+
+@register('model')
+def model_zdt1_batch(inputs):
+    return zdt1(inputs)
+
+
+@register('model')
+def model_zdt2(inputs):
+    return zdt2(to_array(inputs))[0].tolist()
+
+
+@register('model')
+def model_zdt2_batch(inputs):
+    return zdt2(inputs)
+
+
+for f in [model_sphere_batch, model_rastrigin_batch, model_rosenbrock_batch, model_ackley_batch,
+          model_griewank_batch, model_mixed_batch, model_zdt1_batch, model_zdt2_batch]:
+    f.batch_evaluation = True
+
+
+#----------------------------------------------------------------------------------------
+# TESTING
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    for problem in BENCHMARKS:
+        search_space = get_search_space(problem, 4)
+        inputs = {v: 0 for v in search_space}
+        print(problem, globals()['model_' + problem](inputs))
+    for problem in MULTI_OBJECTIVE_BENCHMARKS:
+        search_space = get_search_space(problem, 4)
+        inputs = {v: 0.5 for v in search_space}
+        print(problem, globals()['model_' + problem](inputs))
@@ -5,12 +5,19 @@ __email__ = "luis.hmd@gmail.com"
 #----------------------------------------------------------------------------------------
 # Notes
 #----------------------------------------------------------------------------------------
+# Models receive a dictionary {variable name: value} and return a fitness value (None if the evaluation failed).
+# Models flagged with batch_evaluation = True instead receive a 2-D numpy array with one row per solution and one
+# column per variable (in the order of the search space, with enumerate variables given as the index of their value)
+# and return a vector of fitness values (NaN if an evaluation failed).
+# In the multi-objective mode (objectives main parameter), models return a list of objectives instead of a fitness
+# value, and batch models a 2-D array with one row per solution and one column per objective.
 
 
 #----------------------------------------------------------------------------------------
 # IMPORTS
 #----------------------------------------------------------------------------------------
 import math
+import numpy as np
 
 #----------------------------------------------------------------------------------------
 # FUNCTIONS
@@ -26,10 +33,25 @@ def model_polynomial(inputs):
     return output
 
 
+def model_polynomial_batch(inputs):
+    # extract inputs values
+    x1 = inputs[:, 0]
+    x2 = inputs[:, 1]
+
+    # evaluate model
+    output = np.sqrt(x1) + 3*x2**2
+
+    return output
+
+model_polynomial_batch.batch_evaluation = True
+
+
 #----------------------------------------------------------------------------------------
 # TESTING
 #----------------------------------------------------------------------------------------
 if __name__ == "__main__":
     inputs = {'x1': 2, 'x2': 10}
     out = model_polynomial(inputs)
+    print(out)
+    out = model_polynomial_batch(np.array([[2, 10]]))
     print(out)
\ No newline at end of file
@@ -0,0 +1,256 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Runs the rcga of inputs/inputs.yaml over a sweep of its parameters and seeds, set in inputs/sweep.yaml, and writes
+# one csv table to 'outputs/' with a row per run instead of a results directory per run.
+#   - parameters:   the parameters swept, by name. Main parameters are named as in inputs.yaml (population_size),
+#                   operator parameters by their name alone when only one section has it (n_ind_tournament) or
+#                   prefixed with their main parameter otherwise (termination_params.min_diversity)
+#   - mode:         'grid' runs every combination of the lists of values. 'random' draws n_samples configurations,
+#                   each parameter from a list of values or from a range {low, high} (integers if both bounds are
+#                   integers, log-uniform with log: True), with the random generator seeded by sampling_seed
+#   - seeds:        each configuration is run once per seed (the seed of inputs.yaml if there are none)
+# The runs are spread over a pool of n_workers processes, which caps the processes of the whole sweep: each run
+# evaluates its model serially, without output files or checkpoints. A failed run is written with its error.
+# For each run the table holds the best fitness, the number of evaluations, the evaluations needed to reach the
+# target fitness (measured at the end of the generation that reached it, empty if it was not reached), the number of
+# generations, the termination reason and the wall time. The runs of a configuration share its config number.
+# The multi-objective mode has no best fitness to compare and cannot be swept.
+# Example: python sweep_main.py --spec inputs/sweep.yaml --n-workers 8
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import argparse
+import copy
+import csv
+import datetime
+import itertools
+import multiprocessing
+import os
+import time
+import numpy as np
+import yaml
+import lib_path_ops
+import rcga_classes as rcga
+import ga_main
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+MODES = ['grid', 'random']
+
+# Parameters set for every run of a sweep, which cannot be swept
+FIXED_PARAMETERS = {
+    'evaluation_executor': 'serial',
+    'results_backend': 'none',
+    'export_excel': False,
+    'write_to_console': False,
+    'checkpoint_every_generations': 0,
+    'checkpoint_every_seconds': 0,
+}
+
+RESULTS_COLUMNS = ['best_fitness', 'N_evals', 'evals_to_target', 'N_gen', 'termination_reason', 'wall_time', 'error']
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def read_spec(spec_file):
+    """
+    Function that reads the yaml sweep file and returns it as a dictionary.
+    """
+    with open(spec_file, 'r') as ymlfile:
+        spec = yaml.load(ymlfile, Loader=yaml.FullLoader)
+    if spec.get('mode', 'grid') not in MODES:
+        raise ValueError("Unknown sweep mode {}".format(spec['mode']))
+    if not spec.get('parameters', None):
+        raise ValueError("The sweep has no parameters")
+    return spec
+
+
+def get_parameter_path(params, name):
+    """
+    Function that returns where a swept parameter is in the parameters dictionary, as (section, key): section is None
+    for a main parameter, or the main parameter holding the operator parameters (e.g. 'selection_params').
+    """
+    if '.' in name:
+        section, key = name.split('.', 1)
+        if not isinstance(params.get(section, None), dict):
+            raise ValueError("Unknown parameters section {}".format(section))
+        return section, key
+    if name in FIXED_PARAMETERS or name in ['seed', 'objectives']:
+        raise ValueError("Parameter {} cannot be swept".format(name))
+    if name in params:
+        return None, name
+    sections = [section for section, value in params.items() if isinstance(value, dict) and name in value]
+    if len(sections) == 0:
+        raise ValueError("Unknown parameter {}".format(name))
+    if len(sections) > 1:
+        raise ValueError("Parameter {} is in {}: write it as <section>.{}".format(name, ', '.join(sections), name))
+    return sections[0], name
+
+
+def draw_value(values, rng):
+    """
+    Function that draws a value of a parameter of a random sweep, from a list of values or from a range {low, high}.
+    """
+    if isinstance(values, list):
+        return values[rng.integers(len(values))]
+    low, high = values['low'], values['high']
+    if isinstance(low, int) and isinstance(high, int):
+        if values.get('log', False):
+            return min(int(np.exp(rng.uniform(np.log(low), np.log(high + 1)))), high)
+        return int(rng.integers(low, high + 1))
+    if values.get('log', False):
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    return float(rng.uniform(low, high))
+
+
+def get_configurations(spec):
+    """
+    Function that returns the list of configurations of a sweep, each a dictionary {parameter name: value}.
+    """
+    names = list(spec['parameters'])
+    if spec.get('mode', 'grid') == 'grid':
+        for name in names:
+            if not isinstance(spec['parameters'][name], list):
+                raise ValueError("Parameter {} of a grid sweep must be a list of values".format(name))
+        return [dict(zip(names, values)) for values in itertools.product(*[spec['parameters'][name] for name in names])]
+    rng = np.random.default_rng(spec.get('sampling_seed', None))
+    return [{name: draw_value(spec['parameters'][name], rng) for name in names}
+            for i in range(spec.get('n_samples', 10))]
+
+
+def get_run_parameters(base_params, paths, configuration, seed):
+    """
+    Function that returns the parameters of one run: those of inputs.yaml with the values of a configuration, the seed
+    and the fixed parameters of the sweep.
+    """
+    params = copy.deepcopy(base_params)
+    for name, value in configuration.items():
+        section, key = paths[name]
+        if section is None:
+            params[key] = value
+        else:
+            params[section][key] = value
+    params.update(FIXED_PARAMETERS)
+    params['seed'] = seed
+    return params
+
+
+def run_sweep_point(search_space, params, target_fitness):
+    """
+    Function that runs the rcga with a set of parameters and returns its results. The evaluations to the target are
+    taken at the end of the first generation whose best fitness reaches target_fitness (None if it is not reached).
+    """
+    if target_fitness is None:
+        target_fitness = params.get('termination_params', {}).get('target_fitness', None)
+    reverse = params['opt_type'] == 'max'
+    target = {'N_evals': None}
+
+    def callback(ga, record):
+        if target['N_evals'] is None and target_fitness is not None and not np.isnan(record['best_fitness']):
+            if (record['best_fitness'] >= target_fitness) if reverse else (record['best_fitness'] <= target_fitness):
+                target['N_evals'] = record['N_evals']
+
+    t0 = time.perf_counter()
+    ga = rcga.rcga(search_space, params, callback=callback)
+    ga.execute()
+    return {
+        'best_fitness': ga.best_ind.get_fitness(),
+        'N_evals': ga.statistics['N_evals'],
+        'evals_to_target': target['N_evals'],
+        'N_gen': ga.N_gen,
+        'termination_reason': ga.termination_reason,
+        'wall_time': time.perf_counter() - t0,
+    }
+
+
+def run_sweep_point_star(args):
+    """
+    Function that runs a sweep point from a tuple of arguments. A failed run is reported with its error.
+    """
+    run, config, seed, search_space, params, target_fitness = args
+    try:
+        results = run_sweep_point(search_space, params, target_fitness)
+    except Exception as e:
+        results = {'error': '{}: {}'.format(type(e).__name__, e)}
+    return run, config, seed, results
+
+
+def print_summary(names, configurations, rows):
+    """
+    Function that prints, for each configuration, the mean best fitness over its seeds, the number of runs reaching the
+    target and their mean evaluations to the target.
+    """
+    for config, configuration in enumerate(configurations):
+        results = [row for row in rows if row['config'] == config and row.get('error', None) is None]
+        if len(results) == 0:
+            continue
+        best = np.array([row['best_fitness'] for row in results], dtype=float)
+        hits = [row['evals_to_target'] for row in results if row['evals_to_target'] is not None]
+        print("{}\t{}\tbest={:.3e} +- {:.1e}\ttarget {}/{}{}".format(
+            config, ' '.join('{}={}'.format(name, configuration[name]) for name in names), np.nanmean(best),
+            np.nanstd(best), len(hits), len(results), ' in {:.0f} evals'.format(np.mean(hits)) if hits else ''))
+    return 0
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description="Runs the rcga over a sweep of parameters and seeds and writes a csv table")
+    parser.add_argument('--spec', default=None, help="yaml sweep file (default: inputs/sweep.yaml)")
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help="number of processes running the sweep (default: the one in the sweep file, 0 for one per CPU)")
+    parser.add_argument('--output', default=None, help="csv table (default: outputs/sweep_<date_time>.csv)")
+    return parser.parse_args()
+
+
+#----------------------------------------------------------------------------------------
+# EXECUTION
+#----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    args = get_arguments()
+    search_space, base_params = ga_main.get_parameters(ga_main.root_dir)
+    spec = read_spec(args.spec or lib_path_ops.join_paths(ga_main.root_dir, 'inputs/sweep.yaml'))
+    if base_params.get('objectives', None):
+        raise ValueError("The multi-objective mode cannot be swept")
+
+    names = list(spec['parameters'])
+    paths = {name: get_parameter_path(base_params, name) for name in names}
+    configurations = get_configurations(spec)
+    seeds = spec.get('seeds', None) or [base_params['seed']]
+    target_fitness = spec.get('target_fitness', None)
+    grid = []
+    for config, configuration in enumerate(configurations):
+        for seed in seeds:
+            grid.append((len(grid), config, seed, search_space,
+                         get_run_parameters(base_params, paths, configuration, seed), target_fitness))
+
+    n_workers = args.n_workers if args.n_workers is not None else spec.get('n_workers', 0)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(grid))
+    output_file = args.output or lib_path_ops.join_paths(base_params['Excel output dir'],
+                                                         datetime.datetime.now().strftime("sweep_%d%m%Y_%H%M%S.csv"))
+    print("Running {} configurations x {} seeds on {} workers".format(len(configurations), len(seeds), n_workers))
+
+    rows = []
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['run', 'config', 'seed'] + names + RESULTS_COLUMNS)
+        writer.writeheader()
+        with multiprocessing.Pool(n_workers) as pool:
+            for run, config, seed, results in pool.imap(run_sweep_point_star, grid):
+                row = dict(run=run, config=config, seed=seed, **configurations[config])
+                row.update(results)
+                writer.writerow(row)
+                f.flush()
+                rows.append(row)
+                if 'error' in results:
+                    print("run {}\tconfig {}\tseed {}\tfailed: {}".format(run, config, seed, results['error']))
+
+    print_summary(names, configurations, rows)
+    print("Results written to {}".format(output_file))
@@ -0,0 +1,38 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# Notes
+#----------------------------------------------------------------------------------------
+# Run from the root of the repository with: python -m pytest tests
+# The libraries, the models and ga_main are put on the path the same way as when running ga_main.py. The inputs
+# fixture reads inputs/inputs.yaml and sends the results of the runs to a temporary directory.
+
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import os
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'libraries'), os.path.join(ROOT_DIR, 'model'), ROOT_DIR]
+
+import ga_main
+
+
+#----------------------------------------------------------------------------------------
+# FIXTURES
+#----------------------------------------------------------------------------------------
+@pytest.fixture
+def inputs(tmp_path):
+    """
+    Fixture that returns the search space and parameters of inputs/inputs.yaml, writing nothing to the console and the
+    results to a temporary directory.
+    """
+    search_space, params = ga_main.get_parameters(ROOT_DIR + '/')
+    params['Excel output dir'] = str(tmp_path) + '/'
+    params['write_to_console'] = False
+    return search_space, params
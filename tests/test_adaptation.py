@@ -0,0 +1,40 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+import pytest
+import rcga_adaptation
+import rcga_classes as rcga
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('reverse, success_rate', [(False, 0.25), (True, 0.5)])
+def test_success_rate_counts_offspring_better_than_the_parents_median(reverse, success_rate):
+    offspring_fitness = np.array([1.0, 3.0, 5.0, np.nan])
+    assert rcga_adaptation.get_success_rate(offspring_fitness, 2.0, reverse=reverse) == success_rate
+
+
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_adapted_parameters_stay_within_their_bounds(inputs, backend):
+    search_space, params = inputs
+    # A large rate takes the parameters to their bounds within a few generations
+    params.update(population_backend=backend, results_backend='none', max_generations=20, population_size=30)
+    params['adaptation_params'].update(use_adaptation=True, adaptation_rate=1.0, alpha_bounds=[0.2, 0.4],
+                                       p_crossover_bounds=[0.7, 0.9], p_mutation_bounds=[0.01, 0.1],
+                                       distribution_constant_bounds=[2, 20])
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    trajectory = ga.adaptation.trajectory
+    assert len(trajectory) == 21
+    for name, (section, default_bounds) in rcga_adaptation.ADAPTED_PARAMETERS.items():
+        lower, upper = params['adaptation_params'][name + '_bounds']
+        values = [entry[name] for entry in trajectory[1:]]
+        assert all(lower <= value <= upper for value in values)
+        assert lower in values or upper in values
+        assert ga.params[section][name] == values[-1]
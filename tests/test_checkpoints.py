@@ -0,0 +1,73 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import glob
+import json
+import os
+import numpy as np
+import openpyxl
+import pytest
+import rcga_classes as rcga
+import rcga_checkpoints
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def read_results(output_dir, results_backend):
+    """
+    Function that reads back the generations and statistics written in an output directory. The path of the excel
+    file, which names the output directory, is left out.
+    """
+    if results_backend == 'csv':
+        with open(os.path.join(output_dir, 'generations.csv'), 'r') as f:
+            generations = f.read()
+        with open(os.path.join(output_dir, 'statistics.json'), 'r') as f:
+            statistics = json.load(f)
+        return generations, statistics
+    if results_backend == 'npz':
+        with np.load(os.path.join(output_dir, 'results.npz')) as data:
+            generations = {key: data[key].tolist() for key in data.files}
+        with open(os.path.join(output_dir, 'statistics.json'), 'r') as f:
+            statistics = json.load(f)
+        return generations, statistics
+    wb = openpyxl.load_workbook(glob.glob(os.path.join(output_dir, 'output_*.xlsx'))[0])
+    sheets = {name: [[cell.value for cell in row] for row in wb[name].iter_rows()] for name in wb.sheetnames}
+    sheets['Parameters'] = [row for row in sheets['Parameters'] if row[0] != 'Excel output file']
+    wb.close()
+    return sheets, None
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('results_backend', ['csv', 'npz', 'excel'])
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_resumed_run_matches_uninterrupted_run(inputs, results_backend, backend):
+    search_space, params = inputs
+    params.update(results_backend=results_backend, population_backend=backend, max_generations=20,
+                  checkpoint_every_generations=5, population_size=30)
+    full = rcga.rcga(search_space, dict(params))
+    full.execute()
+
+    # Interrupt a run after generation 12: the last checkpoint was saved at generation 10
+    interrupted = rcga.rcga(search_space, dict(params))
+    interrupted.initialise()
+    while interrupted.N_gen < 12:
+        interrupted.step()
+    output_dir = interrupted.results_writer.get_output_dir()
+    checkpoint_file = os.path.join(output_dir, 'checkpoint.npz')
+    checkpoint = rcga_checkpoints.read_checkpoint(checkpoint_file)
+    assert checkpoint['N_gen'] == 10
+    resumed = rcga.rcga(checkpoint['search_space'], checkpoint['params'])
+    resumed.resume(checkpoint_file)
+
+    assert np.array_equal(resumed.Pop.get_solutions_array(), full.Pop.get_solutions_array())
+    assert np.array_equal(resumed.Pop.get_fitness_array(), full.Pop.get_fitness_array())
+    assert resumed.statistics == full.statistics
+    assert read_results(output_dir, results_backend) == read_results(full.results_writer.get_output_dir(),
+                                                                     results_backend)
@@ -0,0 +1,61 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+import pytest
+import rcga_classes as rcga
+import rcga_constraints
+import rcga_registry
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+evaluated_solutions = []
+
+def model_recording_solutions(solution):
+    """
+    Model that records every solution it is given.
+    """
+    evaluated_solutions.append(dict(solution))
+    return solution['x1']**2 + solution['x2']**2
+
+rcga_registry.register_operator('model', 'model_recording_solutions', model_recording_solutions)
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('backend', ['list', 'array'])
+@pytest.mark.parametrize('handling', ['penalty', 'repair', 'resample'])
+def test_infeasible_solutions_never_reach_the_model(inputs, handling, backend):
+    search_space, params = inputs
+    params.update(model_function='model_recording_solutions', population_backend=backend, results_backend='none',
+                  max_generations=5, population_size=30)
+    params['constraint_params'].update(constraints=['x1 >= 20', 'x1 + x2 <= 60'], infeasible_handling=handling)
+    del evaluated_solutions[:]
+    ga = rcga.rcga(search_space, params)
+    best_ind = ga.execute()
+    assert len(evaluated_solutions) > 0
+    assert all(s['x1'] >= 20 and s['x1'] + s['x2'] <= 60 for s in evaluated_solutions)
+    assert best_ind.get_solution()['x1'] >= 20
+
+
+def test_repair_without_feasible_point_leaves_the_solution_unchanged(inputs):
+    search_space, params = inputs
+    space = rcga.Search_space(search_space)
+    constraints = rcga_constraints.Constraints(space, ['x1 <= 50'], [], handling='repair')
+    references = np.array([[0.0, 0.0]])
+    solutions = np.array([[100.0, 0.0]])
+    repaired, feasible = constraints.repair(solutions, references, np.random.default_rng(0))
+    assert feasible.tolist() == [True]
+    assert 45 < repaired[0, 0] <= 50
+    # No point of the segment tried by the bisection is feasible: the reference is not returned in its place
+    constraints = rcga_constraints.Constraints(space, ['(x1 <= 0) | (x2 >= 50)'], [], handling='repair')
+    repaired, feasible = constraints.repair(solutions + [[0.0, 10.0]], references, np.random.default_rng(0))
+    assert feasible.tolist() == [False]
+    assert repaired.tolist() == [[100.0, 10.0]]
@@ -0,0 +1,115 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import collections
+import numpy as np
+import pytest
+import models
+import rcga_classes as rcga
+import rcga_evaluators as ev
+import rcga_registry
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+evaluated_solutions = []
+
+def model_recording_deduplication(solution):
+    """
+    Model that records every solution it is given.
+    """
+    evaluated_solutions.append(dict(solution))
+    return models.model_polynomial(solution)
+
+rcga_registry.register_operator('model', 'model_recording_deduplication', model_recording_deduplication)
+
+
+def copy_xover(mp, params, rng=None):
+    """
+    Crossover that returns population_size copies of the mating pool, without their fitness.
+    """
+    crossed_pop = mp.empty_copy()
+    ind_indices = np.arange(params['population_size']) % mp.get_size()
+    crossed_pop.insert_solutions_array(mp.get_solutions_rows(ind_indices))
+    return crossed_pop
+
+rcga_registry.register_operator('crossover', 'copy_xover', copy_xover)
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_find_duplicates_of_the_parents_and_of_other_offspring(inputs):
+    search_space, params = inputs
+    space = rcga.Search_space(search_space)
+    Pop = rcga.Array_population(space, seed=0)
+    Pop.insert_solutions_array(np.array([[1.0, 1.0], [2.0, 2.0]]), fitness=np.array([5.0, 6.0]))
+    offspring = rcga.Array_population(space, seed=0)
+    offspring.insert_solutions_array(np.array([[3.0, 3.0], [2.0, 2.0], [3.0, 3.0], [4.0, 4.0], [3.0, 3.0]]))
+    deduplicator = ev.Deduplicator('reuse')
+    parent_duplicates, parent_fitness, duplicates = deduplicator.find_duplicates(deduplicator.index_population(Pop),
+                                                                                 offspring)
+    assert parent_duplicates == [1]
+    assert parent_fitness == [6.0]
+    assert duplicates == [(2, 0), (4, 0)]
+
+
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_reuse_copies_the_fitness_to_the_right_individuals(inputs, backend):
+    search_space, params = inputs
+    # Solutions rounded to integers: many offspring duplicate each other
+    params.update(model_function='model_recording_deduplication', population_backend=backend, results_backend='none',
+                  max_generations=5, population_size=50, fitness_cache_size=0, deduplication='reuse',
+                  deduplication_decimals=0)
+    params['elitism_params']['n_ind_elitism'] = 3
+    del evaluated_solutions[:]
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    assert ga.statistics['N_duplicates_intra'] > 0
+    assert ga.statistics['N_duplicates_parent'] > 0
+    assert ga.statistics['N_evals'] == len(evaluated_solutions)
+    # The offspring sharing a key share the fitness, whatever their place after the elite
+    offspring = np.arange(3, ga.Pop.get_size())
+    keys = ev.get_solution_keys(ga.Pop.get_solutions_rows(offspring), 0)
+    fitness = ga.Pop.get_fitness_array()[offspring]
+    groups = collections.defaultdict(set)
+    for key, f in zip(keys, fitness):
+        groups[key].add(f)
+    assert max(len(group) for group in groups.values()) == 1
+    assert len(groups) < len(offspring)
+
+
+@pytest.mark.parametrize('mode', ['reuse', 'regenerate'])
+def test_copies_of_the_parents_are_not_evaluated(inputs, mode):
+    search_space, params = inputs
+    # Every offspring is a copy of a parent
+    params.update(model_function='model_recording_deduplication', results_backend='none', max_generations=3,
+                  population_size=20, fitness_cache_size=0, deduplication=mode, deduplication_max_retries=2)
+    params['crossover_params']['crossover_function'] = 'copy_xover'
+    params['mutation_params']['p_mutation'] = 0.0
+    del evaluated_solutions[:]
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    n_offspring = 3*params['population_size']
+    assert len(evaluated_solutions) == params['population_size']
+    assert ga.statistics['N_duplicates_parent'] == n_offspring
+    assert ga.statistics['N_duplicates_intra'] == 0
+    assert ga.statistics['N_duplicates_reused'] == n_offspring
+    assert ga.statistics['N_duplicates_regenerated'] == (2*n_offspring if mode == 'regenerate' else 0)
+
+
+def test_regenerate_replaces_duplicates_by_new_offspring(inputs):
+    search_space, params = inputs
+    params.update(model_function='model_recording_deduplication', results_backend='none', max_generations=5,
+                  population_size=50, fitness_cache_size=0, deduplication='regenerate', deduplication_decimals=0)
+    del evaluated_solutions[:]
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    n_duplicates = ga.statistics['N_duplicates_parent'] + ga.statistics['N_duplicates_intra']
+    assert ga.statistics['N_duplicates_regenerated'] > 0
+    assert ga.statistics['N_duplicates_reused'] < n_duplicates
@@ -0,0 +1,69 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import asyncio
+import numpy as np
+import pytest
+import rcga_classes as rcga
+import rcga_evaluators as ev
+import rcga_registry
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+async def model_timing_out(solution):
+    """
+    Coroutine model that takes too long on half of the search space of inputs.yaml.
+    """
+    if solution['x1'] > 50:
+        await asyncio.sleep(10)
+    return solution['x1']**2 + solution['x2']**2
+
+rcga_registry.register_operator('model', 'model_timing_out', model_timing_out)
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_default_operators_run_with_evaluations_timing_out(inputs, backend):
+    search_space, params = inputs
+    params.update(model_function='model_timing_out', evaluation_timeout=0.01, population_backend=backend,
+                  results_backend='none', max_generations=3, population_size=20)
+    ga = rcga.rcga(search_space, params)
+    best_ind = ga.execute()
+    assert ga.statistics['N_failed_evals'] > 0
+    assert np.isfinite(best_ind.get_fitness())
+
+
+def test_fitness_cache_evicts_the_least_recently_used_entries():
+    cache = ev.Fitness_cache(2, decimals=3)
+    solutions = np.array([[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]])
+    cache.store(solutions[:2], [1.0, 2.0])
+    assert cache.lookup(solutions[:1])[0] == 1.0
+    cache.store(solutions[2:], [3.0])
+    assert cache.get_size() == 2
+    fitness = cache.lookup(solutions + 1e-5)
+    assert fitness[0] == 1.0 and np.isnan(fitness[1]) and fitness[2] == 3.0
+    assert (cache.get_hits(), cache.get_misses()) == (3, 1)
+    restored = ev.Fitness_cache(2, decimals=3)
+    restored.set_state(*cache.get_state())
+    assert restored.entries == cache.entries
+    assert (restored.get_hits(), restored.get_misses()) == (3, 1)
+
+
+def test_fitness_cache_does_not_change_a_seeded_run(inputs):
+    search_space, params = inputs
+    params.update(results_backend='none', max_generations=10)
+    best_fitness = []
+    for cache_size in [0, 1000]:
+        ga = rcga.rcga(search_space, dict(params, fitness_cache_size=cache_size))
+        best_fitness.append(ga.execute().get_fitness())
+        assert (ga.cache is None) == (cache_size == 0)
+    assert best_fitness[0] == best_fitness[1]
+    assert ga.statistics['N_cache_hits'] > 0
@@ -0,0 +1,40 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+import pytest
+import models
+import rcga_islands
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_migration_destinations():
+    rng = np.random.default_rng(0)
+    assert [rcga_islands.get_destinations('ring', 4, i, rng) for i in range(4)] == [[1], [2], [3], [0]]
+    assert rcga_islands.get_destinations('fully_connected', 4, 2, rng) == [0, 1, 3]
+    for i in range(4):
+        destinations = [rcga_islands.get_destinations('random', 4, i, rng)[0] for draw in range(100)]
+        assert i not in destinations
+        assert set(destinations) == set(range(4)) - {i}
+    assert rcga_islands.get_destinations('ring', 1, 0, rng) == []
+
+
+@pytest.mark.parametrize('topology', ['ring', 'fully_connected', 'random'])
+def test_island_model_is_reproducible_and_reports_the_global_best(inputs, topology):
+    search_space, params = inputs
+    params.update(results_backend='none', population_size=20, max_generations=4)
+    params['island_params'].update(use_islands=True, n_islands=3, migration_interval=2, n_migrants=2,
+                                   topology=topology)
+    islands = rcga_islands.Island_model(search_space, params)
+    best_solution, best_fitness = islands.execute()
+    assert islands.N_gen == 4
+    islands_best = [islands.statistics['Island {}'.format(i)]['best_fitness'] for i in range(3)]
+    assert best_fitness == min(islands_best)
+    assert best_fitness == models.model_polynomial(best_solution)
+    assert rcga_islands.Island_model(search_space, params).execute() == (best_solution, best_fitness)
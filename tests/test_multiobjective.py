@@ -0,0 +1,77 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+import pytest
+import rcga_multiobjective as mo
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def brute_force_sort(F):
+    """
+    Function that returns the non-domination rank of each row of F (minimised) by peeling off the non-dominated rows
+    one front at a time.
+    """
+    ranks = np.full(len(F), -1)
+    rank = 0
+    while np.any(ranks < 0):
+        left = np.flatnonzero(ranks < 0)
+        for i in left:
+            dominated = np.all(F[left] <= F[i], axis=1) & np.any(F[left] < F[i], axis=1)
+            if not dominated.any():
+                ranks[i] = rank
+        rank += 1
+    return ranks
+
+
+def brute_force_crowding(F, ranks):
+    """
+    Function that returns the crowding distance of each row of F within its front, one front and objective at a time.
+    """
+    crowding = np.zeros(len(F))
+    for rank in np.unique(ranks):
+        front = np.flatnonzero(ranks == rank)
+        for j in range(F.shape[1]):
+            order = front[np.argsort(F[front, j], kind='stable')]
+            span = F[order[-1], j] - F[order[0], j]
+            crowding[order[0]] = crowding[order[-1]] = np.inf
+            for k in range(1, len(order) - 1):
+                if span > 0:
+                    crowding[order[k]] += (F[order[k+1], j] - F[order[k-1], j]) / span
+    return crowding
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('n_objectives', [2, 3, 4])
+@pytest.mark.parametrize('integer', [False, True])
+def test_sort_and_crowding_match_brute_force(n_objectives, integer):
+    rng = np.random.default_rng(n_objectives)
+    for trial in range(5):
+        if integer:
+            # Many ties and repeated rows
+            F = rng.integers(0, 5, size=(150, n_objectives)).astype(float)
+        else:
+            F = rng.random((150, n_objectives))
+        ranks = mo.non_dominated_sort(F)
+        assert np.array_equal(ranks, brute_force_sort(F))
+        assert np.array_equal(mo.crowding_distance(F, ranks), brute_force_crowding(F, ranks))
+
+
+def test_rank_follows_senses_and_puts_failed_evaluations_last():
+    rng = np.random.default_rng(0)
+    objectives = rng.random((60, 3))
+    objectives[[3, 17], 1] = np.nan
+    multi_objective = mo.Multi_objective(['min', 'max', 'min'])
+    ranks, crowding = multi_objective.rank(objectives)
+    ok = ~np.isnan(objectives).any(axis=1)
+    F = objectives[ok] * np.array([1.0, -1.0, 1.0])
+    assert np.array_equal(ranks[ok], brute_force_sort(F))
+    assert np.all(ranks[~ok] == ranks[ok].max() + 1)
@@ -0,0 +1,63 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import copy
+import numpy as np
+import pytest
+import rcga_classes as rcga
+import rcga_operators
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def create_population(search_space, n_ind, backend='list', seed=1):
+    """
+    Function that returns a population of n_ind random individuals with the given backend, their fitness set to
+    their index.
+    """
+    space = rcga.Search_space(search_space)
+    if backend == 'array':
+        Pop = rcga.Array_population(space, seed=seed, capacity=n_ind)
+    else:
+        Pop = rcga.Population(space, seed=seed)
+    Pop.initialise(n_ind)
+    Pop.update_fitness(np.arange(n_ind), np.arange(n_ind, dtype=float))
+    return Pop
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_polynomial_mutation_leaves_parents_untouched(inputs):
+    search_space, params = inputs
+    params = copy.deepcopy(params)
+    params['mutation_params']['p_mutation'] = 1.0
+    for backend in ['list', 'array']:
+        Pop = create_population(search_space, 20, backend=backend)
+        parents = [dict(i.get_solution()) for i in Pop.get_individuals()]
+        for mutation in [rcga_operators.polynomial_mutation, rcga_operators.vectorized_polynomial_mutation]:
+            mutated = mutation(Pop, params)
+            assert [i.get_solution() for i in Pop.get_individuals()] == parents
+            assert [i.get_solution() for i in mutated.get_individuals()] != parents
+
+
+@pytest.mark.parametrize('n_ind', [0, 1])
+def test_blend_xover_needs_two_parents(inputs, n_ind):
+    search_space, params = inputs
+    mp = create_population(search_space, n_ind, backend='array')
+    for xover in [rcga_operators.blend_xover, rcga_operators.vectorized_blend_xover]:
+        with pytest.raises(ValueError):
+            xover(mp, params)
+
+
+@pytest.mark.parametrize('n, k', [(100, 2), (100, 16), (100, 50), (100, 51), (100, 99), (100, 100), (10, 16), (1, 1)])
+def test_sample_without_replacement_draws_distinct_indices(n, k):
+    samples = rcga_operators.sample_without_replacement(np.random.default_rng(n + k), n, k, 500, max_block_size=1000)
+    assert samples.shape == (500, min(k, n))
+    assert samples.min() >= 0 and samples.max() < n
+    assert all(len(np.unique(row)) == len(row) for row in samples)
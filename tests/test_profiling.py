@@ -0,0 +1,54 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import time
+import pytest
+import models
+import rcga_classes as rcga
+import rcga_profiling
+import rcga_registry
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def model_sleeping(solution):
+    """
+    Model that takes a millisecond per call.
+    """
+    time.sleep(0.001)
+    return models.model_polynomial(solution)
+
+rcga_registry.register_operator('model', 'model_sleeping', model_sleeping)
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_callback_receives_the_phase_times_of_each_generation(inputs, backend):
+    search_space, params = inputs
+    params.update(model_function='model_sleeping', population_backend=backend, results_backend='none',
+                  max_generations=3, population_size=20, fitness_cache_size=0, profiling=True)
+    records = []
+    ga = rcga.rcga(search_space, params, callback=lambda ga, record: records.append(dict(record)))
+    ga.execute()
+    assert [record['N_gen'] for record in records] == [0, 1, 2, 3]
+    previous_evals = 0
+    for record in records:
+        phase_times = record['phase_times']
+        assert set(phase_times) == set(rcga_profiling.PHASES)
+        assert all(seconds >= 0 for seconds in phase_times.values())
+        # Bounds enforcement is also counted in the phase of the operator calling it
+        assert sum(phase_times.values()) - phase_times['bounds'] <= record['generation_time']
+        assert record['N_model_calls'] == record['N_evals'] - previous_evals
+        assert phase_times['evaluation'] >= 0.001*record['N_model_calls']
+        assert record['eval_latency_p50'] >= 0.001
+        previous_evals = record['N_evals']
+    for record in records[1:]:
+        assert all(record['phase_times'][name] > 0 for name in ['selection', 'crossover', 'mutation', 'replacement'])
+    assert ga.statistics['time_evaluation'] == pytest.approx(sum(r['phase_times']['evaluation'] for r in records))
@@ -0,0 +1,53 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import copy
+import numpy as np
+import pytest
+import rcga_classes as rcga
+
+
+#----------------------------------------------------------------------------------------
+# INPUTS
+#----------------------------------------------------------------------------------------
+LOOP_OPERATORS = {'selection': 'tournament', 'crossover': 'blend_xover', 'mutation': 'polynomial_mutation'}
+VECTORIZED_OPERATORS = {'selection': 'vectorized_tournament', 'crossover': 'vectorized_blend_xover',
+                        'mutation': 'vectorized_polynomial_mutation'}
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+def run(search_space, params, operators, **kwargs):
+    """
+    Function that runs the rcga with the given operators and parameters, and returns the solutions and fitness of its
+    final population and its number of evaluations.
+    """
+    params = copy.deepcopy(params)
+    params.update(results_backend='none', max_generations=10, population_size=40, n_workers=3, chunk_size=4)
+    params.update(kwargs)
+    for kind, name in operators.items():
+        params[kind + '_params'][kind + '_function'] = name
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    return ga.Pop.get_solutions_array(), ga.Pop.get_fitness_array(), ga.statistics['N_evals']
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('operators', [LOOP_OPERATORS, VECTORIZED_OPERATORS], ids=['loop', 'vectorized'])
+def test_seeded_runs_are_identical_across_backends_and_executors(inputs, operators):
+    search_space, params = inputs
+    reference = run(search_space, params, operators)
+    for backend in ['list', 'array']:
+        for executor in ['serial', 'thread', 'process']:
+            solutions, fitness, N_evals = run(search_space, params, operators, population_backend=backend,
+                                              evaluation_executor=executor)
+            assert np.array_equal(solutions, reference[0]), (backend, executor)
+            assert np.array_equal(fitness, reference[1]), (backend, executor)
+            assert N_evals == reference[2]
@@ -0,0 +1,29 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import csv
+import os
+import rcga_classes as rcga
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_csv_runs_started_in_the_same_second_do_not_share_files(inputs):
+    search_space, params = inputs
+    params['results_backend'] = 'csv'
+    params['max_generations'] = 3
+    output_dirs = []
+    for i in range(3):
+        ga = rcga.rcga(search_space, dict(params))
+        ga.execute()
+        output_dirs.append(ga.results_writer.get_output_dir())
+    assert len(set(output_dirs)) == 3
+    for output_dir in output_dirs:
+        with open(os.path.join(output_dir, 'generations.csv'), 'r', newline='') as f:
+            rows = list(csv.reader(f))
+        assert [row[0] for row in rows] == ['generation', '0', '1', '2', '3']
@@ -0,0 +1,43 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import numpy as np
+import pytest
+import rcga_classes as rcga
+import benchmarks
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_repair_is_the_same_for_dictionaries_and_arrays():
+    space = rcga.Search_space(benchmarks.get_search_space('mixed', 8))
+    rng = np.random.default_rng(0)
+    Pop = rcga.Population(space, seed=0)
+    Pop.initialise(200, rng=rng)
+    rows = Pop.get_solutions_array()
+    # Move the int, float and binary genes out of their bounds
+    cols = space.get_variables_indices(['int', 'float', 'binary'])
+    rows[:, cols] += rng.normal(0, 10, size=(len(rows), len(cols)))
+    repaired_rows = space.repair_solutions(rows.copy())
+    for row, repaired_row in zip(rows, repaired_rows):
+        solution = dict(zip(space.get_variables_names(), row))
+        for v in space.get_variables_names():
+            if space.get_variable_type(v) == 'enumerate':
+                solution[v] = space.get_variable_values(v)[int(solution[v])]
+        assert space.encode_solution(space.repair_solution(solution)) == list(repaired_row)
+
+
+@pytest.mark.parametrize('value, repaired', [(-100, -4.0), (0.3, 0.5), (1.9, 2.0), (100, 3.5), ('not a value', -4.0)])
+def test_repair_maps_unknown_enumerate_values_to_a_value(value, repaired):
+    space = rcga.Search_space(benchmarks.get_search_space('mixed', 8))
+    Pop = rcga.Population(space, seed=0)
+    Pop.initialise(1, rng=np.random.default_rng(0))
+    solution = dict(Pop.get_individual(0).get_solution())
+    v = [v for v in space.get_variables_names() if space.get_variable_type(v) == 'enumerate'][0]
+    solution[v] = value
+    assert space.repair_solution(solution)[v] == repaired
@@ -0,0 +1,60 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import pytest
+import rcga_classes as rcga
+import rcga_registry
+
+
+#----------------------------------------------------------------------------------------
+# FUNCTIONS
+#----------------------------------------------------------------------------------------
+evaluated_solutions = []
+
+def model_recording_steady_state(solution):
+    """
+    Model that records every solution it is given.
+    """
+    evaluated_solutions.append(tuple(sorted(solution.items())))
+    return solution['x1']**2 + solution['x2']**2
+
+rcga_registry.register_operator('model', 'model_recording_steady_state', model_recording_steady_state)
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_steady_state_evaluates_each_solution_once(inputs, backend):
+    search_space, params = inputs
+    params.update(ga_mode='steady_state', model_function='model_recording_steady_state', population_backend=backend,
+                  results_backend='none', max_generations=20)
+    del evaluated_solutions[:]
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    assert len(set(evaluated_solutions)) == len(evaluated_solutions)
+    # Dropped offspring do not count toward the generations
+    assert ga.N_gen == 20
+    assert ga.statistics['N_evals'] + ga.statistics['N_cache_hits'] == 21*params['population_size']
+    # Only the pairs left uncrossed and unmutated (about 5% of them) are copies of their parents
+    assert ga.statistics['N_duplicates_dropped'] < 0.1*20*params['population_size']
+
+
+@pytest.mark.parametrize('p_mutation', [0.0, 0.03])
+def test_steady_state_ends_when_the_crossover_gives_no_offspring(inputs, p_mutation):
+    search_space, params = inputs
+    params.update(ga_mode='steady_state', results_backend='none', max_generations=5, population_size=20)
+    params['crossover_params'].update(crossover_function='blend_xover', p_crossover=0.0)
+    params['mutation_params']['p_mutation'] = p_mutation
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    if p_mutation == 0:
+        # The offspring are copies of their parents: the run stops as soon as they are all dropped
+        assert ga.N_gen == 0
+        assert ga.statistics['N_duplicates_dropped'] == 10*params['population_size']
+    else:
+        assert ga.N_gen == 5
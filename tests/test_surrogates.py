@@ -0,0 +1,47 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import math
+import numpy as np
+import pytest
+import rcga_classes as rcga
+import rcga_surrogates
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+@pytest.mark.parametrize('surrogate_model', ['knn', 'rbf'])
+def test_surrogate_predicts_the_archived_solutions(inputs, surrogate_model):
+    search_space, params = inputs
+    params['surrogate_params'].update(use_surrogate=True, surrogate_model=surrogate_model)
+    space = rcga.Search_space(search_space)
+    surrogate = rcga_surrogates.create_surrogate(params, space)
+    solutions = np.random.default_rng(0).uniform([0, -10], [100, 50], size=(40, 2))
+    fitness = solutions[:, 0] + solutions[:, 1]
+    surrogate.add(solutions, fitness)
+    assert np.allclose(surrogate.predict(solutions), fitness)
+
+
+@pytest.mark.parametrize('backend', ['list', 'array'])
+def test_screening_sends_only_the_kept_fraction_to_the_model(inputs, backend):
+    search_space, params = inputs
+    # The knn predictions are averages of true fitness values, never better than the best individual so far, and no
+    # offspring is explored: only the screen_fraction best predicted offspring reach the model
+    params.update(population_backend=backend, results_backend='none', max_generations=6, population_size=50,
+                  fitness_cache_size=0)
+    params['surrogate_params'].update(use_surrogate=True, surrogate_model='knn', screen_fraction=0.3,
+                                      exploration_fraction=0.0, min_archive_size=50)
+    records = []
+    ga = rcga.rcga(search_space, params, callback=lambda ga, record: records.append(dict(record)))
+    ga.execute()
+    assert records[0]['N_evals'] == 50
+    for previous, record in zip(records, records[1:]):
+        n_evals = record['N_evals'] - previous['N_evals']
+        n_predicted = record['N_surrogate_predicted'] - previous['N_surrogate_predicted']
+        assert n_predicted > 0
+        assert n_evals == math.ceil(0.3*(n_evals + n_predicted))
@@ -0,0 +1,51 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import pytest
+import sweep_main
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_grid_sweep_runs_every_combination():
+    spec = {'mode': 'grid', 'parameters': {'population_size': [50, 100], 'alpha': [0.3, 0.5, 0.7]}}
+    configurations = sweep_main.get_configurations(spec)
+    assert len(configurations) == 6
+    assert len(set(tuple(c.items()) for c in configurations)) == 6
+
+
+def test_random_sweep_draws_within_the_ranges():
+    spec = {'mode': 'random', 'n_samples': 50, 'sampling_seed': 0,
+            'parameters': {'population_size': {'low': 10, 'high': 200, 'log': True},
+                           'alpha': {'low': 0.1, 'high': 0.9}, 'n_ind_tournament': [2, 4]}}
+    configurations = sweep_main.get_configurations(spec)
+    assert configurations == sweep_main.get_configurations(spec)
+    for c in configurations:
+        assert isinstance(c['population_size'], int) and 10 <= c['population_size'] <= 200
+        assert 0.1 <= c['alpha'] <= 0.9
+        assert c['n_ind_tournament'] in [2, 4]
+
+
+def test_parameter_paths(inputs):
+    search_space, params = inputs
+    assert sweep_main.get_parameter_path(params, 'population_size') == (None, 'population_size')
+    assert sweep_main.get_parameter_path(params, 'n_ind_tournament') == ('selection_params', 'n_ind_tournament')
+    assert sweep_main.get_parameter_path(params, 'selection_params.n_ind_tournament') == \
+        ('selection_params', 'n_ind_tournament')
+    for name in ['seed', 'results_backend', 'not_a_parameter']:
+        with pytest.raises(ValueError):
+            sweep_main.get_parameter_path(params, name)
+
+
+def test_run_parameters_leave_the_base_parameters_untouched(inputs):
+    search_space, params = inputs
+    paths = {'n_ind_tournament': ('selection_params', 'n_ind_tournament')}
+    run_params = sweep_main.get_run_parameters(params, paths, {'n_ind_tournament': 3}, seed=7)
+    assert run_params['selection_params']['n_ind_tournament'] == 3
+    assert params['selection_params']['n_ind_tournament'] != 3
+    assert run_params['seed'] == 7 and run_params['results_backend'] == 'none'
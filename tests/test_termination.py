@@ -0,0 +1,70 @@
+__author__ = "Luis Domingues"
+__maintainer__ = "Luis Domingues"
+__email__ = "luis.hmd@gmail.com"
+
+#----------------------------------------------------------------------------------------
+# IMPORTS
+#----------------------------------------------------------------------------------------
+import pytest
+import rcga_classes as rcga
+import rcga_termination
+
+
+#----------------------------------------------------------------------------------------
+# TESTS
+#----------------------------------------------------------------------------------------
+def test_stagnation_counts_generations_without_improvement_beyond_the_tolerance():
+    params = {'max_generations': 100, 'opt_type': 'min',
+              'termination_params': {'stagnation_generations': 3, 'stagnation_tolerance': 0.1}}
+    termination = rcga_termination.Termination(params)
+    reasons = [termination.update(N_gen, f, 0) for N_gen, f in enumerate([10.0, 9.0, 8.95, 8.92, 8.91, 8.0, 8.0])]
+    # 8.95, 8.92 and 8.91 improve on 9.0 by less than the tolerance
+    assert reasons == [None, None, None, None, 'stagnation', None, None]
+
+
+@pytest.mark.parametrize('opt_type, target, fitness, reasons',
+                         [('min', 1.5, [3.0, 2.0, 1.0], [None, None, 'target_fitness']),
+                          ('max', 2.0, [1.0, 2.0, 3.0], [None, 'target_fitness', 'target_fitness'])])
+def test_target_fitness_follows_the_optimisation_type(opt_type, target, fitness, reasons):
+    params = {'max_generations': 100, 'opt_type': opt_type, 'termination_params': {'target_fitness': target}}
+    termination = rcga_termination.Termination(params)
+    assert [termination.update(N_gen, f, 0) for N_gen, f in enumerate(fitness)] == reasons
+
+
+def test_all_logic_needs_every_rule():
+    params = {'max_generations': 100, 'opt_type': 'min',
+              'termination_params': {'logic': 'all', 'max_evaluations': 50, 'target_fitness': 1.0}}
+    termination = rcga_termination.Termination(params)
+    assert termination.update(1, 0.5, 10) is None
+    assert termination.update(2, 2.0, 60) is None
+    assert termination.update(3, 0.5, 60) == 'max_evaluations and target_fitness'
+
+
+@pytest.mark.parametrize('termination_params, reason', [({}, 'max_generations'),
+                                                        ({'target_fitness': 0.5}, 'target_fitness'),
+                                                        ({'stagnation_generations': 2}, 'stagnation'),
+                                                        ({'max_evaluations': 150}, 'max_evaluations')])
+def test_run_stops_on_the_rule_met_and_records_it(inputs, termination_params, reason):
+    search_space, params = inputs
+    params.update(results_backend='none', max_generations=100, population_size=50)
+    params['termination_params'].update(termination_params)
+    ga = rcga.rcga(search_space, params)
+    best_ind = ga.execute()
+    assert ga.termination_reason == reason
+    assert ga.statistics['termination_reason'] == reason
+    assert (ga.N_gen == 100) == (reason == 'max_generations')
+    if reason == 'target_fitness':
+        assert best_ind.get_fitness() <= 0.5
+    if reason == 'max_evaluations':
+        assert ga.statistics['N_evals'] >= 150
+
+
+def test_steady_state_records_when_it_runs_out_of_new_offspring(inputs):
+    search_space, params = inputs
+    params.update(ga_mode='steady_state', results_backend='none', max_generations=5, population_size=20)
+    params['crossover_params'].update(crossover_function='blend_xover', p_crossover=0.0)
+    params['mutation_params']['p_mutation'] = 0.0
+    ga = rcga.rcga(search_space, params)
+    ga.execute()
+    assert ga.termination_reason == 'no_new_offspring'
+    assert ga.statistics['termination_reason'] == 'no_new_offspring'